@@ -1,10 +1,15 @@
 from typing import List, Dict
+import metrics
 
 class CategoryOrganizer:
     """Organizes deals by shopping categories"""
 
     def organize_by_category(self, deals: List[Dict]) -> Dict[str, List[str]]:
         """Group deals by their category field"""
+        with metrics.timed(metrics.ORGANIZE_SECONDS):
+            return self._organize_by_category(deals)
+
+    def _organize_by_category(self, deals: List[Dict]) -> Dict[str, List[str]]:
         categories = {}
 
         for deal in deals:
@@ -17,6 +22,10 @@ class CategoryOrganizer:
 
     def get_category_stats(self, deals: List[Dict]) -> Dict[str, Dict]:
         """Get statistics for each category"""
+        with metrics.timed(metrics.ORGANIZE_SECONDS):
+            return self._get_category_stats(deals)
+
+    def _get_category_stats(self, deals: List[Dict]) -> Dict[str, Dict]:
         stats = {}
 
         for deal in deals:
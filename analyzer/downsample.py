@@ -0,0 +1,77 @@
+from typing import List, Sequence, Tuple
+
+Point = Tuple[float, float]
+
+def lttb(points: Sequence[Point], threshold: int) -> List[Point]:
+    """Largest-Triangle-Three-Buckets downsampling of a time-ordered series
+
+    Keeps the first and last points and, from each bucket in between, the
+    point forming the largest triangle with its neighbours. Preserves the
+    visual shape (spikes and dips) far better than picking every n-th point.
+    """
+    count = len(points)
+    if threshold >= count or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (count - 2) / (threshold - 2)
+    previous = 0
+
+    for bucket in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        next_start = int((bucket + 1) * bucket_size) + 1
+        next_end = min(int((bucket + 2) * bucket_size) + 1, count)
+        next_points = points[next_start:next_end] or [points[-1]]
+        avg_x = sum(p[0] for p in next_points) / len(next_points)
+        avg_y = sum(p[1] for p in next_points) / len(next_points)
+
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        prev_x, prev_y = points[previous]
+
+        best_area = -1.0
+        best_index = start
+        for index in range(start, end):
+            x, y = points[index]
+            area = abs((prev_x - avg_x) * (y - prev_y) - (prev_x - x) * (avg_y - prev_y))
+            if area > best_area:
+                best_area = area
+                best_index = index
+
+        sampled.append(points[best_index])
+        previous = best_index
+
+    sampled.append(points[-1])
+    return sampled
+
+def min_max(points: Sequence[Point], threshold: int) -> List[Point]:
+    """Per-bucket min and max downsampling (keeps every extreme price)
+
+    Splits the series into threshold / 2 buckets and emits each bucket's
+    lowest and highest point in time order.
+    """
+    count = len(points)
+    if threshold >= count or threshold < 2:
+        return list(points)
+
+    buckets = threshold // 2
+    bucket_size = count / buckets
+    sampled: List[Point] = []
+
+    for bucket in range(buckets):
+        chunk = points[int(bucket * bucket_size):int((bucket + 1) * bucket_size)]
+        if not chunk:
+            continue
+        low = min(chunk, key=lambda p: p[1])
+        high = max(chunk, key=lambda p: p[1])
+        if low is high:
+            sampled.append(low)
+        else:
+            sampled.extend(sorted((low, high)))
+
+    return sampled
+
+METHODS = {
+    'lttb': lttb,
+    'minmax': min_max
+}
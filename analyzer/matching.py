@@ -0,0 +1,221 @@
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set
+import random
+import re
+import zlib
+from analyzer.search import tokenize
+
+# Joined onto a preceding number so "256 GB" and "256GB" give the same token
+UNITS = frozenset({
+    'gb', 'tb', 'mb', 'mah', 'w', 'mm', 'cm', 'm', 'inch', 'in', 'hz', 'l', 'ml',
+    'kg', 'g', 'pack', 'pk', 'x', 'v'
+})
+
+# Marketing filler that differs between retailers' titles for the same product
+MATCH_STOP_WORDS = frozenset({
+    'new', 'deal', 'sale', 'latest', 'genuine', 'official', 'au', 'australian',
+    'stock', 'version', 'edition', 'model', 'free', 'shipping', 'by', 'from'
+})
+
+# "WH-1000XM5" / "WH1000XM5" and "Wi-Fi" / "WiFi" should tokenize the same
+HYPHEN_PATTERN = re.compile(r'(?<=[A-Za-z0-9])-(?=[A-Za-z0-9])')
+MEASURE_PATTERN = re.compile(r'\d+(?:' + '|'.join(sorted(UNITS, key=len, reverse=True)) + r')')
+MODEL_PATTERN = re.compile(r'(?=[a-z0-9]*[a-z])(?=[a-z0-9]*\d)[a-z0-9]{4,}')
+
+# MinHash signature length = LSH_BANDS * LSH_ROWS. With 8 bands of 4 rows, titles
+# with Jaccard similarity ~0.6 become candidates about half the time, 0.8 almost always
+LSH_BANDS = 8
+LSH_ROWS = 4
+# A blocking key shared by this many listings identifies nothing (e.g. "ddr4"), so
+# it stops producing candidates
+MAX_BLOCK_SIZE = 64
+
+_PRIME = (1 << 31) - 1  # Keeps a * h + b small enough to stay cheap in CPython
+_rng = random.Random(1125)  # Fixed seed: signatures must agree between runs
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME))
+    for _ in range(LSH_BANDS * LSH_ROWS)
+]
+
+def normalize_title(title: str) -> List[str]:
+    """Title tokens for matching: search tokens with measures joined, filler dropped"""
+    tokens = tokenize(HYPHEN_PATTERN.sub('', title))
+    normalized = []
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        following = tokens[index + 1] if index + 1 < len(tokens) else None
+        if token.isdigit() and following in UNITS:
+            token += following
+            index += 1
+        if token not in MATCH_STOP_WORDS:
+            normalized.append(token)
+        index += 1
+    return normalized
+
+def model_tokens(tokens: Iterable[str]) -> Set[str]:
+    """Tokens that look like model numbers (letters and digits, not a measure)"""
+    return {token for token in tokens
+            if MODEL_PATTERN.fullmatch(token) and not MEASURE_PATTERN.fullmatch(token)}
+
+@lru_cache(maxsize=65536)
+def _token_hashes(token: str) -> tuple:
+    """One hash per permutation for a token (titles share most of their vocabulary)"""
+    h = zlib.crc32(token.encode())
+    return tuple((a * h + b) % _PRIME for a, b in _PERMUTATIONS)
+
+def minhash(tokens: Iterable[str]) -> tuple:
+    """MinHash signature of a token set"""
+    vectors = [_token_hashes(token) for token in set(tokens)]
+    if not vectors:
+        return ()
+    return tuple(map(min, zip(*vectors)))
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+class _Listing:
+    __slots__ = ('deal_id', 'retailer', 'asin', 'price', 'tokens', 'models')
+
+    def __init__(self, deal, tokens: Set[str]):
+        self.deal_id = deal['id']
+        self.retailer = deal.get('retailer', '')
+        self.asin = deal.get('asin', '')
+        self.price = deal.get('price', 0)
+        self.tokens = tokens
+        self.models = model_tokens(tokens)
+
+class ProductMatcher:
+    """Links listings of the same product across retailers into groups
+
+    Candidates come from three blocking keys: a shared ASIN, a shared
+    model-number token, or a shared MinHash-LSH band of the normalised title.
+    Candidates are then verified by title Jaccard similarity and joined with
+    union-find, so deals can be added one retailer (or one page) at a time.
+    Two groups are only joined when no listing in one names a model number
+    that conflicts with a listing in the other, so a model-less title can't
+    bridge two different models into one group.
+    """
+
+    def __init__(self, threshold: float = 0.6):
+        self.threshold = threshold
+        self.listings: List[_Listing] = []
+        self.slots: Dict[str, int] = {}       # Deal id -> listing slot
+        self.parent: List[int] = []           # Union-find forest over slots
+        self.members: Dict[int, List[int]] = {}  # Root slot -> slots in its group
+        self.group_models: Dict[int, List[frozenset]] = {}  # Root slot -> distinct model sets in its group
+        self.band_buckets: Dict[tuple, List[int]] = {}
+        self.asin_index: Dict[str, List[int]] = {}
+        self.model_index: Dict[str, List[int]] = {}
+
+    def add(self, deal) -> str:
+        """Index one deal (Deal or dict) and link it to matching listings; returns its group id"""
+        if deal['id'] in self.slots:
+            return self.group_id(deal['id'])
+
+        tokens = set(normalize_title(deal.get('title', '')))
+        listing = _Listing(deal, tokens)
+        slot = len(self.listings)
+        self.listings.append(listing)
+        self.slots[listing.deal_id] = slot
+        self.parent.append(slot)
+        self.members[slot] = [slot]
+        self.group_models[slot] = [frozenset(listing.models)] if listing.models else []
+
+        candidates = set()
+        keys = []
+        if listing.asin:
+            keys.append(self.asin_index.setdefault(listing.asin, []))
+        for model in listing.models:
+            keys.append(self.model_index.setdefault(model, []))
+        signature = minhash(tokens)
+        for band in range(LSH_BANDS if signature else 0):
+            key = (band,) + signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+            keys.append(self.band_buckets.setdefault(key, []))
+
+        for bucket in keys:
+            if len(bucket) < MAX_BLOCK_SIZE:
+                candidates.update(bucket)
+            bucket.append(slot)
+
+        for other in candidates:
+            if self._find(other) != self._find(slot) and self._is_match(listing, self.listings[other]) \
+                    and self._compatible(slot, other):
+                self._union(slot, other)
+
+        return self.group_id(listing.deal_id)
+
+    def add_many(self, deals: Iterable) -> int:
+        """Add a batch of deals; returns how many were new"""
+        before = len(self.listings)
+        for deal in deals:
+            self.add(deal)
+        return len(self.listings) - before
+
+    def group_id(self, deal_id: str) -> Optional[str]:
+        """Stable id of a deal's product group (its lowest member deal id)"""
+        slot = self.slots.get(deal_id)
+        if slot is None:
+            return None
+        members = self.members[self._find(slot)]
+        return 'grp-' + min(self.listings[member].deal_id for member in members)
+
+    def groups(self, min_size: int = 2) -> List[Dict]:
+        """Product groups with at least `min_size` listings, cheapest listing first"""
+        groups = []
+        for members in self.members.values():
+            if len(members) < min_size:
+                continue
+            listings = sorted((self.listings[slot] for slot in members),
+                              key=lambda listing: (listing.price, listing.deal_id))
+            best = listings[0]
+            groups.append({
+                'id': 'grp-' + min(listing.deal_id for listing in listings),
+                'deal_ids': [listing.deal_id for listing in listings],
+                'retailers': sorted({listing.retailer for listing in listings}),
+                'best_deal_id': best.deal_id,
+                'best_price': best.price,
+                'best_retailer': best.retailer,
+                'max_price': listings[-1].price
+            })
+        groups.sort(key=lambda group: group['id'])
+        return groups
+
+    def _is_match(self, a: _Listing, b: _Listing) -> bool:
+        if a.asin and a.asin == b.asin:
+            return True
+        if a.retailer == b.retailer:
+            # Same-retailer duplicates are already collapsed by ASIN
+            return False
+        if a.models and b.models and not (a.models & b.models):
+            # Both name a model number and they differ: different products
+            return False
+        similarity = jaccard(a.tokens, b.tokens)
+        if a.models & b.models:
+            return similarity >= self.threshold / 2
+        return similarity >= self.threshold
+
+    def _compatible(self, a: int, b: int) -> bool:
+        """Whether every model number named in a's group overlaps every one named in b's"""
+        models_b = self.group_models[self._find(b)]
+        return all(x & y for x in self.group_models[self._find(a)] for y in models_b)
+
+    def _find(self, slot: int) -> int:
+        parent = self.parent
+        while parent[slot] != slot:
+            parent[slot] = parent[parent[slot]]
+            slot = parent[slot]
+        return slot
+
+    def _union(self, a: int, b: int):
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a == root_b:
+            return
+        if len(self.members[root_a]) < len(self.members[root_b]):
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.members[root_a].extend(self.members.pop(root_b))
+        models = self.group_models[root_a]
+        models.extend(model_set for model_set in self.group_models.pop(root_b) if model_set not in models)
@@ -0,0 +1,255 @@
+"""
+Batch fake-discount detection over the daily price history
+
+Loads the last HISTORY_DAYS of daily prices for every tracked product into one
+products x days array and works on whole columns at a time:
+
+- gaps are forward-filled and a ROLLING_DAYS rolling median smooths one-day blips
+- the baseline is the median price before the pre-sale window (PRE_SALE_DAYS)
+- the inflation ratio is the highest rolling median inside that window over the
+  baseline: "raise it three weeks out, then discount it" shows up as a peak well
+  above the baseline with today's price back near it
+- change points are days where the rolling median steps by CHANGE_THRESHOLD or more
+
+Turning millions of SQLite rows into Python tuples is the slow part, so the
+array is kept next to the database (<db>.prices.npz) and each run only reads
+the rollups from the last cached day onwards. Flags are stored per product in
+the price_flags table, where the scorer's legitimacy check reads them. Run
+after each crawl (see the orchestrator) or on its own:
+
+    python -m analyzer.price_flags [--rebuild]
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import argparse
+import os
+import time
+import warnings
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import database
+import metrics
+
+HISTORY_DAYS = 90
+ROLLING_DAYS = 7
+PRE_SALE_DAYS = 30
+# Enough days before the pre-sale window for its median to be a baseline
+MIN_BASELINE_DAYS = 14
+# Peak rolling median / baseline at which a product counts as marked up before the sale
+INFLATION_RATIO = 1.15
+# Relative day-to-day step in the rolling median that counts as a change point
+CHANGE_THRESHOLD = 0.10
+
+FLAG_INFLATED = 'inflated_before_sale'                  # Raised before the sale, "discounted" back down
+FLAG_ORIGINAL_NEVER_CHARGED = 'original_never_charged'  # Listed "was" price above anything seen
+FLAG_NOT_BELOW_BASELINE = 'not_below_baseline'          # Today's price isn't under the usual price
+FLAG_LOWEST = 'lowest_in_window'                        # Cheapest it has been in the whole window
+
+ROW_DTYPE = np.dtype([('product_id', np.int64), ('day', np.int64),
+                      ('price', np.float32), ('original_price', np.float32)])
+SECONDS_PER_DAY = 86400
+
+class PriceMatrix(NamedTuple):
+    """Daily last prices: one row per product id, one column per day from first_day (epoch days)"""
+    product_ids: np.ndarray
+    first_day: int
+    prices: np.ndarray
+    originals: np.ndarray
+
+    @property
+    def last_day(self) -> int:
+        return self.first_day + self.prices.shape[1] - 1
+
+def cache_path_for(db_path: str) -> str:
+    return os.path.splitext(db_path)[0] + '.prices.npz'
+
+def _day_string(epoch_day: int) -> str:
+    return datetime.fromtimestamp(epoch_day * SECONDS_PER_DAY, timezone.utc).strftime('%Y-%m-%d')
+
+def _read_cache(path: str) -> Optional[PriceMatrix]:
+    try:
+        with np.load(path) as cached:
+            return PriceMatrix(cached['product_ids'], int(cached['first_day']),
+                               cached['prices'], cached['originals'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+def _write_cache(path: str, matrix: PriceMatrix):
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, product_ids=matrix.product_ids, first_day=matrix.first_day,
+                 prices=matrix.prices, originals=matrix.originals)
+    os.replace(tmp_path, path)
+
+def load_price_matrix(days: int = HISTORY_DAYS, as_of: Optional[datetime] = None,
+                      cache_path: Optional[str] = None) -> PriceMatrix:
+    """The last `days` days of prices up to as_of, NaN where a product wasn't seen
+
+    With a cache_path, the cached array supplies every day before its last one
+    and only rollups from that day on are read (the last day may have changed).
+    """
+    last_day = int((as_of or datetime.now(timezone.utc)).timestamp()) // SECONDS_PER_DAY
+    first_day = last_day - days + 1
+
+    cached = _read_cache(cache_path) if cache_path else None
+    if cached is not None and not first_day <= cached.last_day <= last_day:
+        cached = None
+    since = cached.last_day if cached is not None else first_day
+
+    rows = np.fromiter(database.iter_daily_prices(_day_string(since), _day_string(last_day)), dtype=ROW_DTYPE)
+    product_ids = rows['product_id'] if cached is None else np.concatenate([cached.product_ids, rows['product_id']])
+    product_ids = np.unique(product_ids)
+
+    prices = np.full((len(product_ids), days), np.nan, dtype=np.float32)
+    originals = np.full((len(product_ids), days), np.nan, dtype=np.float32)
+    if cached is not None:
+        # Days both arrays cover, up to (not including) the re-read day
+        start = max(first_day, cached.first_day)
+        at = np.searchsorted(product_ids, cached.product_ids)
+        span = slice(start - cached.first_day, since - cached.first_day)
+        prices[at, start - first_day:since - first_day] = cached.prices[:, span]
+        originals[at, start - first_day:since - first_day] = cached.originals[:, span]
+
+    at = np.searchsorted(product_ids, rows['product_id'])
+    prices[at, rows['day'] - first_day] = rows['price']
+    originals[at, rows['day'] - first_day] = rows['original_price']
+
+    # Products not seen at all in the window drop out
+    seen = ~np.isnan(prices).all(axis=1)
+    matrix = PriceMatrix(product_ids[seen], first_day, prices[seen], originals[seen])
+    if cache_path:
+        _write_cache(cache_path, matrix)
+    return matrix
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """Carry each row's last seen value over later gaps (leading gaps stay NaN)"""
+    seen = np.where(~np.isnan(values), np.arange(values.shape[1]), 0)
+    np.maximum.accumulate(seen, axis=1, out=seen)
+    return np.take_along_axis(values, seen, axis=1)
+
+def rolling_median(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing median over `window` days of forward-filled values; NaN until a row has a full window"""
+    result = np.full(values.shape, np.nan, dtype=values.dtype)
+    if values.shape[1] >= window:
+        windows = sliding_window_view(values, window, axis=1)
+        # A plain sort beats np.median's NaN-aware partition about 2x here; after
+        # forward_fill NaNs only lead, so a window is incomplete iff it starts with one
+        ordered = np.sort(windows, axis=-1)
+        medians = (ordered[..., (window - 1) // 2] + ordered[..., window // 2]) / 2
+        medians[np.isnan(windows[..., 0])] = np.nan
+        result[:, window - 1:] = medians
+    return result
+
+def row_medians(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(median, count) of each row's non-NaN values; one sort instead of np.nanmedian"""
+    counts = np.count_nonzero(~np.isnan(values), axis=1)
+    ordered = np.sort(values, axis=1)  # NaNs sort last
+    low = np.take_along_axis(ordered, np.maximum(counts - 1, 0)[:, None] // 2, axis=1)[:, 0]
+    high = np.take_along_axis(ordered, (counts // 2)[:, None].clip(max=values.shape[1] - 1), axis=1)[:, 0]
+    return np.where(counts > 0, (low + high) / 2, np.nan), counts
+
+def analyze(prices: np.ndarray, originals: np.ndarray) -> Dict:
+    """Per-product statistics and flag masks for a products x days price array"""
+    filled = forward_fill(prices)
+    rolling = rolling_median(filled, ROLLING_DAYS)
+    split = max(prices.shape[1] - PRE_SALE_DAYS, 0)
+
+    with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+        warnings.simplefilter('ignore', RuntimeWarning)  # All-NaN rows (products too new)
+
+        baseline, baseline_days = row_medians(filled[:, :split])
+        baseline[baseline_days < MIN_BASELINE_DAYS] = np.nan
+        peak = np.nanmax(rolling[:, split:], axis=1)
+        current = filled[:, -1]
+        original = forward_fill(originals)[:, -1]
+
+        inflation = peak / baseline
+        real_discount = (1 - current / baseline) * 100
+        steps = np.abs(np.diff(rolling, axis=1)) / rolling[:, :-1]
+        change_points = np.count_nonzero(steps >= CHANGE_THRESHOLD, axis=1)
+
+        has_baseline = ~np.isnan(baseline)
+        seen_days = np.count_nonzero(~np.isnan(prices), axis=1)
+        flags = {
+            FLAG_INFLATED: has_baseline & (inflation >= INFLATION_RATIO) & (current < peak * 0.95),
+            FLAG_ORIGINAL_NEVER_CHARGED: (seen_days >= ROLLING_DAYS) & (original > np.nanmax(filled, axis=1) * 1.05),
+            FLAG_NOT_BELOW_BASELINE: has_baseline & (current >= baseline * 0.97),
+            FLAG_LOWEST: (seen_days >= MIN_BASELINE_DAYS) & (current <= np.nanmin(filled, axis=1)),
+        }
+
+    return {
+        'baseline': baseline,
+        'peak': peak,
+        'current': current,
+        'inflation': inflation,
+        'real_discount': real_discount,
+        'change_points': change_points,
+        'flags': flags
+    }
+
+def _rounded(values: np.ndarray, digits: int) -> List[Optional[float]]:
+    rounded = np.round(values.astype(np.float64), digits)
+    return [None if value != value else value for value in rounded.tolist()]  # NaN -> None
+
+def flag_rows(product_ids: np.ndarray, result: Dict, computed_at: int) -> List[Tuple]:
+    """Rows for database.save_price_flags"""
+    # Each distinct combination of flags is joined once, then looked up by bitmask
+    names = list(result['flags'])
+    bits = sum(mask.astype(np.int64) << bit for bit, mask in enumerate(result['flags'].values()))
+    labels = {code: ','.join(name for bit, name in enumerate(names) if code >> bit & 1)
+              for code in np.unique(bits).tolist()}
+
+    return list(zip(
+        product_ids.tolist(),
+        [computed_at] * len(product_ids),
+        _rounded(result['baseline'], 2),
+        _rounded(result['peak'], 2),
+        _rounded(result['current'], 2),
+        _rounded(result['inflation'], 3),
+        _rounded(result['real_discount'], 1),
+        result['change_points'].tolist(),
+        [labels[code] for code in bits.tolist()]
+    ))
+
+def refresh_price_flags(days: int = HISTORY_DAYS, as_of: Optional[datetime] = None,
+                        rebuild: bool = False) -> Dict:
+    """Recompute and store flags for every product with history in the window"""
+    as_of = as_of or datetime.now(timezone.utc)
+    cache_path = cache_path_for(database.DB_PATH)
+    if rebuild and os.path.exists(cache_path):
+        os.remove(cache_path)
+
+    with metrics.timed(metrics.PRICE_FLAGS_SECONDS):
+        started = time.perf_counter()
+        matrix = load_price_matrix(days, as_of, cache_path)
+        loaded = time.perf_counter()
+        result = analyze(matrix.prices, matrix.originals)
+        analyzed = time.perf_counter()
+        saved = database.save_price_flags(flag_rows(matrix.product_ids, result, int(as_of.timestamp())))
+
+    return {
+        'products': len(matrix.product_ids),
+        'saved': saved,
+        'flagged': {name: int(mask.sum()) for name, mask in result['flags'].items()},
+        'load_seconds': round(loaded - started, 3),
+        'analyze_seconds': round(analyzed - loaded, 3),
+        'total_seconds': round(time.perf_counter() - started, 3)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Recompute fake-discount flags from the price history')
+    parser.add_argument('--days', type=int, default=HISTORY_DAYS, help='History window in days')
+    parser.add_argument('--db', default=database.DB_PATH, help='Price history database')
+    parser.add_argument('--rebuild', action='store_true', help='Reload the whole window instead of the cached array')
+    args = parser.parse_args()
+
+    database.DB_PATH = args.db
+    summary = refresh_price_flags(args.days, rebuild=args.rebuild)
+    print(f"Price flags: {summary['products']} products in {summary['total_seconds']}s "
+          f"(load {summary['load_seconds']}s, analyze {summary['analyze_seconds']}s)")
+    for name, count in summary['flagged'].items():
+        print(f"  {name}: {count}")
+
+if __name__ == '__main__':
+    main()
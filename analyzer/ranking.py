@@ -0,0 +1,73 @@
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Sequence, Union
+import heapq
+from scrapers.deal import Deal
+
+# Length of the ready-made "top" lists shipped in the deals cache
+TOP_K = 50
+
+def percentile_ranks(values: Sequence[float]) -> List[float]:
+    """Percentile rank (0-100) of each value within the batch; ties share the mid-rank"""
+    ordered = sorted(values)
+    count = len(ordered)
+    ranks = {}
+    for value in values:
+        if value not in ranks:
+            ranks[value] = 100 * (bisect_left(ordered, value) + bisect_right(ordered, value)) / (2 * count)
+    return [ranks[value] for value in values]
+
+class TopK:
+    """Streaming top-k selector: O(log k) per item, ties keep the earlier item"""
+
+    def __init__(self, k: int = TOP_K):
+        self.k = k
+        self._heap = []   # Min-heap of (score, -arrival, item)
+        self._arrivals = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, score: float, item) -> bool:
+        """Offer an item; returns whether it is (for now) in the top k"""
+        entry = (score, -self._arrivals, item)
+        self._arrivals += 1
+
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+            return True
+        if entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+            return True
+        return False
+
+    def items(self) -> List:
+        """Selected items, best first"""
+        return [item for _, _, item in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
+
+class TopDeals:
+    """Top-k deal ids by total score, globally and per category, fed one deal at a time"""
+
+    def __init__(self, k: int = TOP_K):
+        self.k = k
+        self.overall = TopK(k)
+        self.by_category: Dict[str, TopK] = {}
+
+    def add(self, deal: Union[Deal, Dict]):
+        score = deal['scores']['total']
+        category = deal.get('category', 'Other')
+        self.overall.push(score, deal['id'])
+        if category not in self.by_category:
+            self.by_category[category] = TopK(self.k)
+        self.by_category[category].push(score, deal['id'])
+
+    def add_many(self, deals: Iterable[Union[Deal, Dict]]) -> 'TopDeals':
+        for deal in deals:
+            self.add(deal)
+        return self
+
+    def to_dict(self) -> Dict:
+        return {
+            'k': self.k,
+            'overall': self.overall.items(),
+            'categories': {category: top.items() for category, top in self.by_category.items()}
+        }
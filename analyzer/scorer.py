@@ -1,5 +1,13 @@
 import math
-from typing import Dict
+import os
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import metrics
+from analyzer.ranking import percentile_ranks
+from scrapers.deal import Deal, DealScores
+
+# 'absolute' uses the fixed cut-offs below; 'percentile' ranks each sub-score
+# against the rest of the crawl (see score_batch)
+DEFAULT_SCORING_MODE = os.getenv('SCORING_MODE', 'absolute')
 
 class DealScorer:
     """Calculates value scores for deals based on multiple dimensions"""
@@ -13,6 +21,21 @@ class DealScorer:
         'legitimacy': 0.15
     }
 
+    MODES = ('absolute', 'percentile')
+
+    # What each sub-score is ranked on in percentile mode: the raw deal field
+    # where the absolute score buckets it, otherwise the absolute score itself
+    PERCENTILE_FIELDS = {
+        'quality': 'rating',
+        'credibility': 'review_count',
+        'price_tier': 'price'
+    }
+
+    def __init__(self, mode: str = DEFAULT_SCORING_MODE):
+        if mode not in self.MODES:
+            raise ValueError(f'Unknown scoring mode: {mode}')
+        self.mode = mode
+
     def calculate_discount_score(self, discount_pct: float) -> float:
         """Score based on discount percentage (0-100)"""
         # Linear scale, capped at 90 to prevent scam detection
@@ -57,9 +80,20 @@ class DealScorer:
         else:
             return 100
 
+    # Legitimacy from the batch price-history flags (analyzer/price_flags.py), worst flag first
+    HISTORY_FLAG_SCORES = (
+        ('inflated_before_sale', 15),    # Marked up before the sale, then "discounted"
+        ('original_never_charged', 30),  # "Was" price never actually charged
+        ('not_below_baseline', 40),      # No cheaper than it usually is
+        ('lowest_in_window', 100)        # Cheapest in the whole history window
+    )
+
     def calculate_legitimacy_score(self, price: float, original_price: float,
-                                   market_range: Dict = None) -> float:
+                                   market_range: Dict = None, price_flags: Dict = None) -> float:
         """Score based on price legitimacy (0-100)"""
+        if price_flags:
+            return self.calculate_history_legitimacy_score(price_flags)
+
         # Default to neutral if no market data
         if not market_range:
             return 60
@@ -81,22 +115,82 @@ class DealScorer:
 
         return 60
 
+    def calculate_history_legitimacy_score(self, price_flags: Dict) -> float:
+        """Score from a product's stored price flags (0-100)"""
+        flags = price_flags.get('flags', [])
+        for flag, score in self.HISTORY_FLAG_SCORES:
+            if flag in flags:
+                return score
+
+        real_discount = price_flags.get('real_discount_pct')
+        if real_discount is None:
+            return 60  # Too little history for a baseline: neutral
+        if real_discount >= 10:
+            return 100
+        return 70
+
     def score_deal(self, deal: Dict, market_range: Dict = None) -> Dict[str, float]:
         """Calculate all scores for a deal"""
-        scores = {
-            'discount': self.calculate_discount_score(deal.get('discount_pct', 0)),
-            'quality': self.calculate_quality_score(deal.get('rating', 0)),
-            'credibility': self.calculate_credibility_score(deal.get('review_count', 0)),
-            'price_tier': self.calculate_price_tier_score(deal.get('price', 0)),
-            'legitimacy': self.calculate_legitimacy_score(
-                deal.get('price', 0),
-                deal.get('original_price', 0),
-                market_range
+        return self.score(deal, market_range).to_dict()
+
+    def score(self, deal: Union[Deal, Dict], market_range: Dict = None,
+              price_flags: Dict = None) -> DealScores:
+        """Calculate all scores for a Deal (or deal dict) as a DealScores record"""
+        with metrics.timed(metrics.SCORE_SECONDS):
+            if isinstance(deal, Deal):
+                discount_pct, rating, review_count = deal.discount_pct, deal.rating, deal.review_count
+                price, original_price = deal.price, deal.original_price
+            else:
+                discount_pct = deal.get('discount_pct', 0)
+                rating = deal.get('rating', 0)
+                review_count = deal.get('review_count', 0)
+                price = deal.get('price', 0)
+                original_price = deal.get('original_price', 0)
+
+            scores = DealScores(
+                discount=self.calculate_discount_score(discount_pct),
+                quality=self.calculate_quality_score(rating),
+                credibility=self.calculate_credibility_score(review_count),
+                price_tier=self.calculate_price_tier_score(price),
+                legitimacy=self.calculate_legitimacy_score(price, original_price, market_range, price_flags)
             )
-        }
 
-        # Calculate weighted total
-        total = sum(scores[key] * self.WEIGHTS[key] for key in scores.keys())
-        scores['total'] = round(total, 1)
+            scores.total = self.weighted_total(scores)
 
         return scores
+
+    def score_batch(self, deals: Sequence[Union[Deal, Dict]],
+                    price_flags: Optional[Dict[Tuple[str, str], Dict]] = None) -> List[DealScores]:
+        """Score a whole crawl; in percentile mode sub-scores are ranked within the batch
+
+        price_flags maps (asin, retailer) to the product's stored price flags.
+        """
+        price_flags = price_flags or {}
+        scores = [self.score(deal, price_flags=price_flags.get((deal.get('asin', ''), deal.get('retailer', ''))))
+                  for deal in deals]
+        if self.mode != 'percentile' or not scores:
+            return scores
+
+        # One sort per dimension, then each deal's sub-score becomes its percentile
+        for name in self.WEIGHTS:
+            field = self.PERCENTILE_FIELDS.get(name)
+            values = [deal.get(field, 0) if field else getattr(deal_scores, name)
+                      for deal, deal_scores in zip(deals, scores)]
+            for deal_scores, rank in zip(scores, percentile_ranks(values)):
+                # No data (unrated, no reviews) stays at 0 rather than ranking
+                if getattr(deal_scores, name) > 0:
+                    setattr(deal_scores, name, round(rank, 1))
+
+        for deal_scores in scores:
+            deal_scores.total = self.weighted_total(deal_scores)
+        return scores
+
+    def weighted_total(self, scores: DealScores) -> float:
+        """Weighted sum of the sub-scores (0-100)"""
+        weights = self.WEIGHTS
+        total = (scores.discount * weights['discount'] +
+                 scores.quality * weights['quality'] +
+                 scores.credibility * weights['credibility'] +
+                 scores.price_tier * weights['price_tier'] +
+                 scores.legitimacy * weights['legitimacy'])
+        return round(total, 1)
@@ -0,0 +1,441 @@
+from array import array
+from itertools import compress
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import heapq
+import math
+import re
+import sys
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+STOP_WORDS = frozenset({
+    'a', 'an', 'and', 'for', 'in', 'of', 'on', 'or', 'the', 'to', 'with'
+})
+
+# Prefix expansion is capped so a one-letter query can't touch the whole vocabulary
+MAX_PREFIX_TERMS = 64
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens, without stop words"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+class SearchDoc:
+    """Just the fields SearchIndex filters and ranks on, for indexing without the full deal
+
+    Slotted (and with interned categories) so a per-worker index over a
+    large crawl doesn't carry a dict per deal; dict-style get / [] like Deal.
+    """
+
+    __slots__ = ('id', 'title', 'category', 'discount_pct', 'rating', 'price', 'score')
+
+    def __init__(self, deal: Dict):
+        self.id = deal['id']
+        self.title = deal.get('title', '')
+        self.category = sys.intern(deal.get('category') or 'Other')
+        self.discount_pct = deal.get('discount_pct', 0)
+        self.rating = deal.get('rating', 0)
+        self.price = deal.get('price', 0)
+        self.score = (deal.get('scores') or {}).get('total', 0)
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key == 'scores':
+            return {'total': self.score}
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+class SearchIndex:
+    """In-memory inverted index over deal titles with BM25 ranking
+
+    Postings map term -> {doc slot: term frequency}. A sorted vocabulary gives
+    prefix matching for the last (still being typed) query term. The index can
+    be rebuilt or synced incrementally against a new list of deals; removed
+    deals leave a free slot that the next added deal reuses.
+
+    Every term's per-deal contributions are scored when the index is built or
+    synced, never while answering a query. The statistics BM25 needs (deal
+    count, average title length, each term's document frequency) are frozen
+    until they drift by STATS_DRIFT, so a sync only patches the entries of
+    deals that changed into their terms' ranked lists.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    # How much the DealScorer total (0-100) lifts text relevance
+    SCORE_BOOST = 0.5
+
+    # Relative change in deal count or average title length that rescores every term
+    # (and in a term's document frequency that rescores that term)
+    STATS_DRIFT = 0.05
+
+    # Filter fields kept sorted, so selective filters can pick their deals by bisection
+    FILTER_FIELDS = ('discount_pct', 'rating', 'price')
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.vocabulary: List[str] = []      # Sorted indexed terms, for prefix lookups
+        self.slots: Dict[str, int] = {}      # Deal id -> doc slot
+        self.docs: List[Optional[Dict]] = []
+        self.doc_terms: List[Tuple[str, ...]] = []
+        self.doc_lengths: List[int] = []
+        self.norms: List[float] = []         # BM25 length normalisation per slot
+        self.boosts: List[float] = []        # Relevance multiplier from the deal's score
+        self.free_slots: List[int] = []
+        self.total_length = 0
+        # Collection statistics the scores were computed with
+        self.stats_docs = 0
+        self.stats_avg_length = 1.0
+        # Term -> BM25 weight (idf * (k1 + 1)), and its contributions best first
+        self.weights: Dict[str, float] = {}
+        self.term_df: Dict[str, int] = {}   # Document frequency each weight was computed with
+        self.ranked: Dict[str, Tuple[array, array]] = {}  # Term -> (impacts, slots)
+        # Live slots by category, and by each filter field in ascending order
+        self.category_slots: Dict[str, array] = {}
+        self.field_slots: Dict[str, Tuple[List[float], array]] = {}
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def build(self, deals: Iterable[Dict]):
+        """Index a full set of deals from scratch"""
+        self.__init__()
+        for deal in deals:
+            self._add(deal)
+        self.vocabulary = sorted(self.postings)
+        self._rescore_all()
+        self._index_filters()
+
+    def sync(self, deals: Iterable[Dict]) -> Dict[str, int]:
+        """Incrementally update the index to match a new set of deals
+
+        Deals with an unchanged title only have their stored fields refreshed
+        (prices and scores change between crawls, titles rarely do). Only the
+        terms of added, removed, retitled or rescored deals are rescored.
+        """
+        incoming = {deal['id']: deal for deal in deals}
+        added = updated = removed = 0
+        touched: Dict[str, set] = {}    # Term -> slots whose entries in it are stale
+        changed_slots = []
+
+        def touch(slot: int):
+            for term in self.doc_terms[slot]:
+                touched.setdefault(term, set()).add(slot)
+
+        for deal_id in list(self.slots):
+            if deal_id not in incoming:
+                touch(self.slots[deal_id])
+                self._remove(deal_id)
+                removed += 1
+
+        new_terms = []
+        for deal_id, deal in incoming.items():
+            slot = self.slots.get(deal_id)
+            if slot is None:
+                new_terms.extend(self._add(deal))
+                added += 1
+            elif self.docs[slot].get('title') != deal.get('title'):
+                touch(slot)
+                self._remove(deal_id)
+                new_terms.extend(self._add(deal))
+                updated += 1
+            else:
+                self.docs[slot] = deal
+                if self._boost(deal) != self.boosts[slot]:
+                    changed_slots.append(slot)
+                continue
+            changed_slots.append(self.slots[deal_id])
+
+        if new_terms or removed or updated:
+            self.vocabulary = sorted(self.postings)
+
+        avg_length = self.total_length / len(self.slots) if self.slots else 1.0
+        if (abs(len(self.slots) - self.stats_docs) > self.STATS_DRIFT * self.stats_docs
+                or abs(avg_length - self.stats_avg_length) > self.STATS_DRIFT * self.stats_avg_length):
+            self._rescore_all()
+        else:
+            for slot in changed_slots:
+                self._score_slot(slot)
+                touch(slot)
+            for term, slots in touched.items():
+                postings = self.postings.get(term)
+                if not postings:
+                    self.weights.pop(term, None)
+                    self.term_df.pop(term, None)
+                    self.ranked.pop(term, None)
+                    continue
+                df = self.term_df.get(term)
+                if (df is None or abs(len(postings) - df) > self.STATS_DRIFT * df
+                        or len(slots) > len(postings) // 4):
+                    self._score_term(term)
+                else:
+                    self._patch_term(term, slots)
+        self._index_filters()
+
+        return {'added': added, 'updated': updated, 'removed': removed}
+
+    def search(self, query: str, limit: int = 20, category: Optional[str] = None,
+               min_discount: float = 0, min_rating: float = 0,
+               max_price: Optional[float] = None) -> List[Tuple[float, Dict]]:
+        """Ranked (relevance, deal) pairs for a free-text query
+
+        Every query term must match (the last one as a prefix), so results
+        narrow as the user types. Relevance is BM25 lifted by the deal's
+        DealScorer total. The rarest term's postings are walked best-first and
+        the walk stops once no remaining posting can enter the top `limit`;
+        when the filters leave fewer deals than that walk would visit, those
+        deals are scored directly instead.
+        """
+        terms = tokenize(query)
+        if not terms or not self.slots or limit <= 0:
+            return []
+
+        groups = [self._expand(term, prefix=(i == len(terms) - 1)) for i, term in enumerate(terms)]
+        if not all(groups):
+            return []
+        groups.sort(key=lambda group: sum(len(self.postings[term]) for term in group))
+        filters = (category, min_discount, min_rating, max_price)
+
+        filtered = self._filter_slots(*filters)
+        if filtered is not None:
+            if not filtered:
+                return []
+            driver_size = sum(len(self.postings[term]) for term in groups[0])
+            # A walk visits about limit / selectivity postings before the top fills up
+            expected_walk = min(driver_size, limit * len(self.slots) / len(filtered))
+            if len(filtered) < expected_walk:
+                return self._scan(filtered, groups, limit, filters)
+
+        return self._walk(groups, limit, filters)
+
+    def _walk(self, groups: List[List[str]], limit: int, filters: Tuple) -> List[Tuple[float, Dict]]:
+        """Top `limit` by walking the rarest group's contributions best-first"""
+        driver = [self.ranked[term] for term in groups[0]]
+        others = groups[1:]
+        # Best score any candidate can still gain from the non-driver terms
+        others_max = sum(max(self.ranked[term][0][0] for term in group) for group in others)
+
+        if len(driver) == 1:
+            candidates = zip(*driver[0])
+        else:
+            candidates = heapq.merge(*(zip(impacts, slots) for impacts, slots in driver), reverse=True)
+
+        docs = self.docs
+        top: List[Tuple[float, int]] = []
+        seen = set()
+        for impact, slot in candidates:
+            if len(top) == limit and impact + others_max <= top[0][0]:
+                break
+            if slot in seen:
+                continue
+            seen.add(slot)
+
+            relevance = impact
+            for group in others:
+                best = self._best_impact(group, slot)
+                if not best:
+                    break
+                relevance += best
+            else:
+                if not self._passes(docs[slot], *filters):
+                    continue
+                if len(top) < limit:
+                    heapq.heappush(top, (relevance, slot))
+                elif relevance > top[0][0]:
+                    heapq.heapreplace(top, (relevance, slot))
+
+        return [(round(relevance, 4), docs[slot]) for relevance, slot in sorted(top, reverse=True)]
+
+    def _scan(self, slots: Iterable[int], groups: List[List[str]], limit: int,
+              filters: Tuple) -> List[Tuple[float, Dict]]:
+        """Top `limit` among a (small) set of filtered deals, scoring each directly"""
+        docs = self.docs
+        top: List[Tuple[float, int]] = []
+        for slot in slots:
+            if not self._passes(docs[slot], *filters):
+                continue
+            relevance = 0.0
+            for group in groups:
+                best = self._best_impact(group, slot)
+                if not best:
+                    break
+                relevance += best
+            else:
+                if len(top) < limit:
+                    heapq.heappush(top, (relevance, slot))
+                elif relevance > top[0][0]:
+                    heapq.heapreplace(top, (relevance, slot))
+
+        return [(round(relevance, 4), docs[slot]) for relevance, slot in sorted(top, reverse=True)]
+
+    def _best_impact(self, terms: List[str], slot: int) -> float:
+        """A deal's largest contribution from any of `terms` (0 if it has none of them)"""
+        best = 0.0
+        for term in terms:
+            tf = self.postings[term].get(slot)
+            if tf:
+                impact = self.weights[term] * tf / (tf + self.norms[slot]) * self.boosts[slot]
+                if impact > best:
+                    best = impact
+        return best
+
+    @staticmethod
+    def _passes(deal: Dict, category: Optional[str], min_discount: float, min_rating: float,
+                max_price: Optional[float]) -> bool:
+        if category and deal.get('category') != category:
+            return False
+        if min_discount and deal.get('discount_pct', 0) < min_discount:
+            return False
+        if min_rating and deal.get('rating', 0) < min_rating:
+            return False
+        if max_price is not None and deal.get('price', 0) > max_price:
+            return False
+        return True
+
+    def _filter_slots(self, category: Optional[str], min_discount: float, min_rating: float,
+                      max_price: Optional[float]) -> Optional[array]:
+        """Slots passing the most selective filter (a superset of the matches), or None without filters"""
+        candidates = []
+        if category:
+            candidates.append(self.category_slots.get(category, array('i')))
+        if min_discount:
+            values, slots = self.field_slots['discount_pct']
+            candidates.append(slots[bisect_left(values, min_discount):])
+        if min_rating:
+            values, slots = self.field_slots['rating']
+            candidates.append(slots[bisect_left(values, min_rating):])
+        if max_price is not None:
+            values, slots = self.field_slots['price']
+            candidates.append(slots[:bisect_right(values, max_price)])
+        return min(candidates, key=len) if candidates else None
+
+    def _expand(self, term: str, prefix: bool) -> List[str]:
+        """Indexed terms matching a query term (exact, or by prefix)"""
+        if not prefix:
+            return [term] if self.postings.get(term) else []
+
+        matches = []
+        start = bisect_left(self.vocabulary, term)
+        for candidate in self.vocabulary[start:]:
+            if not candidate.startswith(term):
+                break
+            if self.postings.get(candidate):
+                matches.append(candidate)
+                if len(matches) >= MAX_PREFIX_TERMS:
+                    break
+        return matches
+
+    def _add(self, deal: Dict) -> List[str]:
+        terms = tuple(tokenize(deal.get('title', '')))
+        slot = self.free_slots.pop() if self.free_slots else len(self.docs)
+        if slot == len(self.docs):
+            self.docs.append(deal)
+            self.doc_terms.append(terms)
+            self.doc_lengths.append(len(terms))
+            self.norms.append(0.0)
+            self.boosts.append(1.0)
+        else:
+            self.docs[slot] = deal
+            self.doc_terms[slot] = terms
+            self.doc_lengths[slot] = len(terms)
+
+        self.slots[deal['id']] = slot
+        self.total_length += len(terms)
+
+        new_terms = []
+        for term in terms:
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                new_terms.append(term)
+            postings[slot] = postings.get(slot, 0) + 1
+        return new_terms
+
+    def _remove(self, deal_id: str):
+        slot = self.slots.pop(deal_id)
+        for term in set(self.doc_terms[slot]):
+            postings = self.postings[term]
+            postings.pop(slot, None)
+            if not postings:
+                del self.postings[term]
+
+        self.total_length -= self.doc_lengths[slot]
+        self.docs[slot] = None
+        self.doc_terms[slot] = ()
+        self.doc_lengths[slot] = 0
+        self.free_slots.append(slot)
+
+    def _boost(self, deal: Dict) -> float:
+        return 1 + self.SCORE_BOOST * (deal.get('scores') or {}).get('total', 0) / 100
+
+    def _score_slot(self, slot: int):
+        """Length normalisation and score boost for one deal, against the frozen statistics"""
+        self.norms[slot] = self.K1 * (1 - self.B + self.B * self.doc_lengths[slot] / self.stats_avg_length)
+        deal = self.docs[slot]
+        self.boosts[slot] = self._boost(deal) if deal is not None else 1.0
+
+    def _score_term(self, term: str):
+        """A term's BM25 weight and its per-deal contributions (weight x tf part x score boost), best first"""
+        postings = self.postings[term]
+        idf = math.log(1 + (self.stats_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+        weight = self.weights[term] = idf * (self.K1 + 1)
+        self.term_df[term] = len(postings)
+        norms, boosts = self.norms, self.boosts
+
+        slots = list(postings)
+        impacts = [weight * tf / (tf + norms[slot]) * boosts[slot] for slot, tf in postings.items()]
+        order = sorted(range(len(slots)), key=impacts.__getitem__, reverse=True)
+        self.ranked[term] = (array('d', [impacts[i] for i in order]), array('i', [slots[i] for i in order]))
+
+    def _patch_term(self, term: str, stale: set):
+        """Rescore a few deals' entries in a term's ranked list, keeping its weight"""
+        impacts, slots = self.ranked[term]
+        keep = [slot not in stale for slot in slots]
+        impacts, slots = array('d', compress(impacts, keep)), array('i', compress(slots, keep))
+
+        postings, weight = self.postings[term], self.weights[term]
+        for slot in stale:
+            tf = postings.get(slot)
+            if not tf:
+                continue
+            impact = weight * tf / (tf + self.norms[slot]) * self.boosts[slot]
+            lo, hi = 0, len(impacts)
+            while lo < hi:  # Insertion point in the descending impacts
+                mid = (lo + hi) // 2
+                if impacts[mid] >= impact:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            impacts.insert(lo, impact)
+            slots.insert(lo, slot)
+        self.ranked[term] = (impacts, slots)
+
+    def _rescore_all(self):
+        """Refresh the collection statistics and rescore every deal and term"""
+        self.stats_docs = len(self.slots)
+        self.stats_avg_length = (self.total_length / len(self.slots) if self.slots else 1.0) or 1.0
+        for slot in range(len(self.docs)):
+            self._score_slot(slot)
+        self.weights = {}
+        self.term_df = {}
+        self.ranked = {}
+        for term in self.postings:
+            self._score_term(term)
+
+    def _index_filters(self):
+        """Live slots per category and sorted by each filter field (prices and ratings change every sync)"""
+        live = [slot for slot, deal in enumerate(self.docs) if deal is not None]
+        categories: Dict[str, List[int]] = {}
+        for slot in live:
+            categories.setdefault(self.docs[slot].get('category'), []).append(slot)
+        self.category_slots = {category: array('i', slots) for category, slots in categories.items()}
+
+        for field in self.FILTER_FIELDS:
+            values = [self.docs[slot].get(field) or 0 for slot in live]
+            order = sorted(range(len(live)), key=values.__getitem__)
+            self.field_slots[field] = ([values[i] for i in order], array('i', [live[i] for i in order]))
@@ -0,0 +1,117 @@
+"""
+Price-drop watchlist: match every deal in a snapshot against stored rules
+
+Rules are indexed once per rule-set change instead of being checked one by
+one against each deal:
+
+- asin rules in a hash by ASIN (a deal looks up only its own product)
+- category rules per category, sorted by max_price (the rules a deal satisfies
+  are the suffix with max_price >= its price, found by bisection)
+- discount rules per category (None = any category), sorted by min_discount
+  (the prefix with min_discount <= its discount)
+
+so matching M deals against N rules is O(M log N) plus the matches produced.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from scrapers import urls as scraper_urls
+
+class SortedRules:
+    """Rules sorted by one threshold, for prefix/suffix lookups"""
+
+    def __init__(self, rules: List[Dict], field: str):
+        ordered = sorted(rules, key=lambda rule: (rule[field], rule['id']))
+        self.thresholds = [rule[field] for rule in ordered]
+        self.rules = ordered
+
+    def at_least(self, value: float) -> List[Dict]:
+        """Rules whose threshold is >= value"""
+        return self.rules[bisect_left(self.thresholds, value):]
+
+    def at_most(self, value: float) -> List[Dict]:
+        """Rules whose threshold is <= value"""
+        return self.rules[:bisect_right(self.thresholds, value)]
+
+class WatchlistIndex:
+    """Watchlist rules indexed for matching whole snapshots"""
+
+    def __init__(self, rules: Iterable[Dict] = ()):
+        self.by_asin: Dict[str, List[Dict]] = {}
+        self.rule_ids: List[int] = []
+        by_category: Dict[str, List[Dict]] = {}
+        by_discount: Dict[Optional[str], List[Dict]] = {}
+        self.size = 0
+
+        for rule in rules:
+            self.size += 1
+            self.rule_ids.append(rule['id'])
+            if rule['kind'] == 'asin':
+                self.by_asin.setdefault(rule['asin'], []).append(rule)
+            elif rule['kind'] == 'category':
+                by_category.setdefault(rule['category'], []).append(rule)
+            elif rule['kind'] == 'discount':
+                by_discount.setdefault(rule.get('category'), []).append(rule)
+
+        self.by_category = {category: SortedRules(rules, 'max_price')
+                            for category, rules in by_category.items()}
+        self.by_discount = {category: SortedRules(rules, 'min_discount')
+                            for category, rules in by_discount.items()}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def rules_for(self, deal: Dict) -> Iterator[Dict]:
+        """Every rule the deal satisfies (a rule at most once)"""
+        price = deal.get('price')
+        if price is None:
+            return
+        category = deal.get('category', 'Other')
+
+        asin = deal.get('asin') or scraper_urls.extract_asin(deal.get('url', ''))
+        for rule in self.by_asin.get(asin, ()) if asin else ():
+            if rule['max_price'] is None or price <= rule['max_price']:
+                yield rule
+
+        category_rules = self.by_category.get(category)
+        if category_rules is not None:
+            yield from category_rules.at_least(price)
+
+        discount = deal.get('discount_pct') or 0
+        for key in (None, category):
+            discount_rules = self.by_discount.get(key)
+            if discount_rules is not None:
+                yield from discount_rules.at_most(discount)
+
+    def match(self, deals: Iterable[Dict]) -> List[Dict]:
+        """One match per (rule, deal) pair; `deals` is consumed once, so it can be a stream"""
+        matches = []
+        if not self.size:
+            return matches
+
+        for deal in deals:
+            for rule in self.rules_for(deal):
+                matches.append(make_match(rule, deal))
+        return matches
+
+def make_match(rule: Dict, deal: Dict) -> Dict:
+    return {
+        'rule_id': rule['id'],
+        'kind': rule['kind'],
+        'label': rule.get('label'),
+        'deal_id': deal['id'],
+        'title': deal.get('title'),
+        'retailer': deal.get('retailer'),
+        'category': deal.get('category', 'Other'),
+        'price': deal['price'],
+        'original_price': deal.get('original_price'),
+        'discount_pct': deal.get('discount_pct'),
+        'url': deal.get('url')
+    }
+
+def group_by_rule(matches: Iterable[Dict]) -> List[Tuple[int, List[Dict]]]:
+    """(rule_id, matches) pairs, in rule id order"""
+    grouped: Dict[int, List[Dict]] = {}
+    for match in matches:
+        grouped.setdefault(match['rule_id'], []).append(match)
+    return sorted(grouped.items())
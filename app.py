@@ -1,13 +1,23 @@
-from flask import Flask, render_template, jsonify
-from flask_socketio import SocketIO, emit
+from flask import Flask, render_template, jsonify, request, Response, stream_with_context
+from flask_socketio import SocketIO, emit, join_room
 import json
 import os
 from datetime import datetime
 import asyncio
-import httpx
-import hmac
-import hashlib
-from scrapers.orchestrator import ScrapingOrchestrator
+import threading
+from analyzer.search import SearchDoc, SearchIndex
+from analyzer.downsample import METHODS as DOWNSAMPLERS
+from analyzer.watchlist import WatchlistIndex, group_by_rule
+from broadcast import DeltaBroadcaster
+from fragments import CardFragments
+from local_link import LocalLink
+from scrapers.distributed import verify_signature
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional
+from snapshot import DealSnapshot, ensure_snapshot, snapshot_path_for
+import database
+import metrics
+import profiling
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'blackfriday-secret-key'
@@ -20,26 +30,137 @@ LOCAL_WEBHOOK_URL = os.getenv('LOCAL_TAILSCALE_IP', 'http://localhost:5002')
 if not LOCAL_WEBHOOK_URL.startswith('http'):
     LOCAL_WEBHOOK_URL = f'http://{LOCAL_WEBHOOK_URL}:5002'
 WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', 'dev-secret-key-change-me')
+# Watchlist matches are also posted here (the local service logs them); empty disables it
+WATCH_WEBHOOK_URL = os.getenv('WATCH_WEBHOOK_URL', f'{LOCAL_WEBHOOK_URL}/webhook/watch')
+
+# Selected API routes can be profiled on demand (PROFILE=web, or a signed X-Profile-Signature header)
+profiled = profiling.route_profiler(WEBHOOK_SECRET)
+
+# Shared keep-alive client, heartbeat and background sends for LOCAL_WEBHOOK_URL
+local_link = LocalLink(LOCAL_WEBHOOK_URL, WEBHOOK_SECRET,
+                       spawn=lambda target, *args: socketio.start_background_task(target, *args),
+                       sleep=lambda seconds: socketio.sleep(seconds))
+
+# Clients join this room and receive batched progress / deal deltas
+DEALS_ROOM = 'deals'
+broadcaster = DeltaBroadcaster(lambda event, data: socketio.emit(event, data, to=DEALS_ROOM))
+_broadcaster_started = False
+
+def start_broadcaster():
+    """Start the background flush loop on first use (not at import)"""
+    global _broadcaster_started
+    if not _broadcaster_started:
+        _broadcaster_started = True
+        socketio.start_background_task(broadcaster.run, socketio.sleep)
 
 def progress_callback(data):
-    """Emit scraping progress via WebSocket"""
-    socketio.emit('scraping_progress', data)
+    """Queue scraping progress for the next batched WebSocket update"""
+    start_broadcaster()
+    broadcaster.publish_progress(data)
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+# Memory-mapped deals snapshot (see snapshot.py), remapped only when the cache changes on disk
+_deals_cache = {'mtime': None, 'snapshot': None}
+search_index = SearchIndex()
+
+def load_deals_cache() -> Optional[DealSnapshot]:
+    """The current deals snapshot, rebuilt (once across workers) and remapped when the cache changes"""
+    try:
+        mtime = os.path.getmtime(CACHE_FILE)
+    except OSError:
+        return None
+
+    if _deals_cache['mtime'] != mtime:
+        snapshot_path = snapshot_path_for(CACHE_FILE)
+        try:
+            ensure_snapshot(CACHE_FILE, snapshot_path)
+            snapshot = DealSnapshot(snapshot_path)
+        except (OSError, ValueError):
+            return _deals_cache['snapshot']
+
+        # Per-worker derived state is streamed from the mapping, not kept as a parsed copy
+        search_index.sync(SearchDoc(deal) for deal in snapshot.deals())
+        if _deals_cache['mtime'] is None:
+            broadcaster.prime(snapshot.deals())
+        else:
+            start_broadcaster()
+            broadcaster.publish_deals(snapshot.deals())
+        _deals_cache['mtime'] = snapshot.source_mtime
+        _deals_cache['snapshot'] = snapshot
+        check_watchlist(snapshot.deals())
+
+    return _deals_cache['snapshot']
+
+# Watchlist rules indexed for matching (see analyzer/watchlist.py), rebuilt when they change
+_watchlist = {'version': None, 'index': WatchlistIndex()}
+
+def get_watchlist_index() -> WatchlistIndex:
+    version = database.get_watchlist_version()
+    if _watchlist['version'] != version:
+        _watchlist['index'] = WatchlistIndex(database.list_watch_rules())
+        _watchlist['version'] = version
+    return _watchlist['index']
+
+def watch_room(rule_id: int) -> str:
+    return f'watch:{rule_id}'
+
+def check_watchlist(deals: Iterable[Dict]) -> List[Dict]:
+    """Match deals against the watchlist and deliver whatever hasn't been sent yet"""
+    try:
+        index = get_watchlist_index()
+        if not len(index):
+            return []
+        return deliver_watch_matches(index.match(deals), index.rule_ids)
+    except Exception as e:
+        print(f"[WATCHLIST] Matching failed: {e}")
+        return []
+
+def deliver_watch_matches(matches: List[Dict], rule_ids: List[int]) -> List[Dict]:
+    """Send the matches not already notified to their rule rooms and the watch webhook
+
+    `matches` is every current match for rule_ids, so deals that stopped matching are forgotten.
+    """
+    fresh = database.record_watch_matches(matches, rule_ids)
+    if fresh:
+        print(f"[WATCHLIST] {len(fresh)} new matches")
+        for rule_id, rule_matches in group_by_rule(fresh):
+            socketio.emit('watch_matches', {'rule_id': rule_id, 'matches': rule_matches},
+                          to=watch_room(rule_id))
+        if WATCH_WEBHOOK_URL:
+            local_link.post_signed(WATCH_WEBHOOK_URL, {'matches': fresh, 'timestamp': datetime.now().isoformat()})
+    return fresh
+
+def find_deal(deal_id: str) -> Optional[Dict]:
+    snapshot = load_deals_cache()
+    return snapshot.get(deal_id) if snapshot is not None else None
+
+# /api/deals is streamed from the mapped snapshot in chunks of this size
+BODY_CHUNK_BYTES = 256 * 1024
+
+def deals_document(body: memoryview, seq: int) -> Iterator[bytes]:
+    """The snapshot's document with "seq" added before its closing brace"""
+    end = len(body) - 1
+    for start in range(0, end, BODY_CHUNK_BYTES):
+        yield bytes(body[start:min(start + BODY_CHUNK_BYTES, end)])
+    yield b',"seq":%d}' % seq
+
 @app.route('/api/deals')
+@profiled
 def get_deals():
     # Try to load from local cache first
-    if os.path.exists(CACHE_FILE):
-        try:
-            with open(CACHE_FILE, 'r') as f:
-                return jsonify(json.load(f))
-        except:
-            pass
+    snapshot = load_deals_cache()
+    if snapshot is not None:
+        # seq tells the client which delta batch this snapshot corresponds to
+        body, seq = snapshot.body(), broadcaster.seq
+        return Response(deals_document(body, seq), mimetype='application/json',
+                        headers={'Content-Length': str(len(body) + len(',"seq":%d' % seq))})
 
     # Fallback to GitHub raw URL
+    import httpx
+
     try:
         response = httpx.get(GITHUB_RAW_URL, timeout=10.0)
         if response.status_code == 200:
@@ -49,87 +170,355 @@ def get_deals():
 
     return jsonify({'deals': [], 'categories': {}, 'category_stats': {}, 'last_updated': None})
 
-@app.route('/api/trigger-local-scrape', methods=['POST'])
-def trigger_local_scrape():
-    """Trigger scraping on local machine via Tailscale webhook"""
+@app.route('/api/deals/version')
+def get_deals_version():
+    """Identity of the current dataset, so clients fetch /api/deals only when it changes"""
+    snapshot = load_deals_cache()
+    return jsonify({
+        'version': snapshot.last_updated if snapshot is not None else None,
+        'deal_count': len(snapshot) if snapshot is not None else 0,
+        'seq': broadcaster.seq
+    })
+
+@app.route('/api/search')
+@profiled
+def search_deals():
+    """Full-text search over deal titles, ranked by relevance and deal score"""
+    query = request.args.get('q', '').strip()
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+
+    snapshot = load_deals_cache()
+    if snapshot is None:
+        return jsonify({'query': query, 'results': []})
+    results = search_index.search(
+        query,
+        limit=limit,
+        category=request.args.get('category') or None,
+        min_discount=request.args.get('min_discount', 0, type=float),
+        min_rating=request.args.get('min_rating', 0, type=float),
+        max_price=request.args.get('max_price', type=float)
+    )
+
+    return jsonify({
+        'query': query,
+        'results': [dict(snapshot.get(doc['id']), search_score=relevance) for relevance, doc in results]
+    })
+
+@app.route('/api/deals/top')
+@profiled
+def get_top_deals():
+    """Best deals by score, overall or in one category (selected once per crawl)"""
+    snapshot = load_deals_cache()
+    category = request.args.get('category')
+    if snapshot is None:
+        return jsonify({'category': category, 'deals': []})
+
+    top = snapshot.top
+    deal_ids = top['categories'].get(category, []) if category else top['overall']
+    limit = max(0, min(request.args.get('limit', len(deal_ids), type=int), len(deal_ids)))
+    deals = [snapshot.get(deal_id) for deal_id in deal_ids[:limit]]
+    return jsonify({'category': category, 'deals': [deal for deal in deals if deal is not None]})
+
+_card_fragments = {'fragments': None}
+
+def get_card_fragments(snapshot: DealSnapshot) -> CardFragments:
+    """Rendered cards for the current snapshot (a new snapshot starts a fresh set)"""
+    fragments = _card_fragments['fragments']
+    if fragments is None or fragments.snapshot is not snapshot:
+        fragments = CardFragments(snapshot, app.jinja_env.get_template('_deal_card.html'))
+        _card_fragments['fragments'] = fragments
+    return fragments
+
+@app.route('/api/deals/cards')
+@profiled
+def get_deal_cards():
+    """A page of pre-rendered deal cards for one category, best score first"""
+    snapshot = load_deals_cache()
+    if snapshot is None:
+        return Response('', mimetype='text/html', headers={'X-Total-Count': '0', 'X-Page-Count': '0'})
+
+    fragments = get_card_fragments(snapshot)
+    page = fragments.page(
+        request.args.get('category', ''),
+        page=max(request.args.get('page', 0, type=int), 0),
+        min_discount=request.args.get('min_discount', 0, type=float),
+        min_rating=request.args.get('min_rating', 0, type=float)
+    )
+
+    compressed = 'gzip' in request.accept_encodings
+    response = Response(page['gzip'] if compressed else page['html'], mimetype='text/html')
+    response.headers['X-Total-Count'] = str(page['total'])
+    response.headers['X-Page-Count'] = str(page['pages'])
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'no-cache'
+    if compressed:
+        response.headers['Content-Encoding'] = 'gzip'
+    # Same snapshot and query -> same bytes, so revalidation is a 304
+    response.set_etag(f"{fragments.version}-{request.query_string.decode()}{'-gz' if compressed else ''}")
+    return response.make_conditional(request)
+
+@app.route('/api/deals/<deal_id>/offers')
+def get_deal_offers(deal_id):
+    """Every retailer's listing of the same product, cheapest first"""
+    snapshot = load_deals_cache()
+    deal = snapshot.get(deal_id) if snapshot is not None else None
+    if deal is None:
+        return jsonify({'status': 'error', 'message': 'Unknown deal id'}), 404
+
+    group = snapshot.groups.get(deal.get('group_id'))
+    if group is None:
+        return jsonify({'group': None, 'best_deal_id': deal_id, 'offers': [deal]})
+
+    offers = [snapshot.get(offer_id) for offer_id in group['deal_ids']]
+    offers = [offer for offer in offers if offer is not None]
+    return jsonify({'group': group, 'best_deal_id': group['best_deal_id'], 'offers': offers})
+
+# Downsampled history responses, dropped whenever new price snapshots land
+HISTORY_CACHE_SIZE = 1024
+MAX_HISTORY_POINTS = 1000
+_history_cache = {'version': None, 'entries': OrderedDict()}
+
+def get_history_series(deal: Dict, days: int, points: int, method: str) -> Dict:
+    """Price series for one deal, downsampled server-side and cached per history version"""
+    version = database.get_history_version()
+    if _history_cache['version'] != version:
+        _history_cache['version'] = version
+        _history_cache['entries'].clear()
+
+    key = (deal['id'], days, points, method)
+    entries = _history_cache['entries']
+    if key in entries:
+        entries.move_to_end(key)
+        return entries[key]
+
+    asin = deal.get('asin') or database.extract_asin(deal.get('url', ''))
+    series = database.get_price_series(asin, deal.get('retailer', 'Unknown'), days) if asin else []
+    sampled = DOWNSAMPLERS[method](series, points)
+
+    result = {
+        'id': deal['id'],
+        'asin': asin,
+        'days': days,
+        'method': method,
+        'source_points': len(series),
+        'points': [[ts, price] for ts, price in sampled]
+    }
+
+    entries[key] = result
+    if len(entries) > HISTORY_CACHE_SIZE:
+        entries.popitem(last=False)
+    return result
+
+def parse_history_args():
+    """days / points / method query parameters, validated"""
+    days = max(1, min(request.args.get('days', 90, type=int), 365))
+    points = max(3, min(request.args.get('points', 200, type=int), MAX_HISTORY_POINTS))
+    method = request.args.get('method', 'lttb')
+    if method not in DOWNSAMPLERS:
+        method = 'lttb'
+    return days, points, method
+
+@app.route('/api/deals/<deal_id>/history')
+@profiled
+def get_deal_history(deal_id):
+    """Downsampled price history for one deal"""
+    deal = find_deal(deal_id)
+    if deal is None:
+        return jsonify({'status': 'error', 'message': 'Unknown deal id'}), 404
+
+    return jsonify(get_history_series(deal, *parse_history_args()))
+
+@app.route('/api/history')
+@profiled
+def get_bulk_history():
+    """Downsampled price history for several deals: /api/history?ids=a,b,c"""
+    snapshot = load_deals_cache()
+    ids = [deal_id for deal_id in request.args.get('ids', '').split(',') if deal_id][:50]
+    args = parse_history_args()
+
+    series = {}
+    missing = []
+    for deal_id in ids:
+        deal = snapshot.get(deal_id) if snapshot is not None else None
+        if deal is None:
+            missing.append(deal_id)
+        else:
+            series[deal_id] = get_history_series(deal, *args)
+
+    return jsonify({'series': series, 'missing': missing})
+
+@app.route('/api/watchlist', methods=['GET'])
+def get_watchlist():
+    return jsonify({'rules': database.list_watch_rules()})
+
+@app.route('/api/watchlist', methods=['POST'])
+def add_watchlist_rule():
+    """Add a rule; deals in the current snapshot that already match it are returned (and delivered)"""
+    data = request.get_json(silent=True) or {}
+    # Loaded first, so a fresh worker's own watchlist check doesn't already include the rule
+    snapshot = load_deals_cache()
     try:
-        # Create signature for webhook authentication
-        payload = json.dumps({'timestamp': datetime.now().isoformat()}).encode()
-        signature = hmac.new(
-            WEBHOOK_SECRET.encode(),
-            payload,
-            hashlib.sha256
-        ).hexdigest()
-
-        # Send webhook to local machine
-        local_url = f'{LOCAL_WEBHOOK_URL}/webhook/trigger'
-        response = httpx.post(
-            local_url,
-            content=payload,
-            headers={
-                'X-Webhook-Signature': signature,
-                'Content-Type': 'application/json'
-            },
-            timeout=5.0
+        rule = database.add_watch_rule(
+            data.get('kind', ''),
+            asin=data.get('asin'),
+            category=data.get('category'),
+            max_price=data.get('max_price'),
+            min_discount=data.get('min_discount'),
+            label=data.get('label')
         )
+    except (TypeError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
 
-        if response.status_code == 202:
-            return jsonify({
-                'status': 'success',
-                'message': 'Local scraper triggered',
-                'local_response': response.json()
-            }), 202
-        else:
-            return jsonify({
-                'status': 'error',
-                'message': f'Local machine returned {response.status_code}'
-            }), 500
+    matches = WatchlistIndex([rule]).match(snapshot.deals()) if snapshot is not None else []
+    deliver_watch_matches(matches, [rule['id']])
+    return jsonify({'rule': rule, 'matches': matches}), 201
 
-    except httpx.TimeoutException:
-        return jsonify({
-            'status': 'error',
-            'message': 'Local machine unreachable (timeout)'
-        }), 504
-    except Exception as e:
+@app.route('/api/watchlist/<int:rule_id>', methods=['DELETE'])
+def delete_watchlist_rule(rule_id):
+    if not database.delete_watch_rule(rule_id):
+        return jsonify({'status': 'error', 'message': 'Rule not found'}), 404
+    return jsonify({'deleted': rule_id})
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Scrape instrumentation in Prometheus text format"""
+    return Response(metrics.REGISTRY.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/trigger-local-scrape', methods=['POST'])
+def trigger_local_scrape():
+    """Trigger scraping on local machine via Tailscale webhook
+
+    Answers at once: the trigger is sent in the background and a failure to
+    deliver it shows up as a 'failed' job status (see /api/scrape-status).
+    """
+    health = local_link.health()
+    if health['status'] == 'offline':
         return jsonify({
             'status': 'error',
-            'message': str(e)
-        }), 500
+            'message': health.get('message', 'Local machine offline')
+        }), 503
+
+    def on_result(result, error):
+        if error:
+            publish_job_status({'job_id': None, 'stage': 'failed', 'error': error})
+
+    # {"profile": true} asks the local service to profile the run (saved under its data/profiles/)
+    profile = bool((request.get_json(silent=True) or {}).get('profile'))
+    local_link.post_signed('/webhook/trigger', {'timestamp': datetime.now().isoformat(), 'profile': profile},
+                           on_result)
+    return jsonify({
+        'status': 'success',
+        'message': 'Local scraper trigger sent'
+    }), 202
 
 @app.route('/api/check-local-status', methods=['GET'])
 def check_local_status():
-    """Check if local machine is online and reachable"""
-    try:
-        local_url = f'{LOCAL_WEBHOOK_URL}/webhook/status'
-        response = httpx.get(local_url, timeout=3.0)
+    """Whether the local machine is reachable, from the last heartbeat (never waits on the link)"""
+    health = local_link.health()
+    status_codes = {'online': 200, 'error': 500}
+    return jsonify(health), status_codes.get(health['status'], 503)
 
-        if response.status_code == 200:
-            return jsonify({
-                'status': 'online',
-                'local_data': response.json()
-            }), 200
-        else:
-            return jsonify({
-                'status': 'error',
-                'message': f'Local machine returned {response.status_code}'
-            }), 500
+# Latest job status pushed by the local scraper service (see progress.py)
+_job_status = {'version': 0, 'status': None}
+_job_status_changed = threading.Condition()
 
-    except httpx.TimeoutException:
-        return jsonify({
-            'status': 'offline',
-            'message': 'Local machine unreachable (timeout)'
-        }), 503
-    except Exception as e:
-        return jsonify({
-            'status': 'offline',
-            'message': str(e)
-        }), 503
+# How long a status long-poll / SSE wait blocks before answering anyway
+STATUS_WAIT_SECONDS = 25
+
+def wait_for_job_status(since: int, timeout: float) -> Dict:
+    """The job status once its version is past `since`, or as-is after `timeout`"""
+    with _job_status_changed:
+        _job_status_changed.wait_for(lambda: _job_status['version'] > since, timeout)
+        return dict(_job_status)
+
+def publish_job_status(status: Dict) -> int:
+    """Make `status` the current job status and wake its waiters; returns its version"""
+    with _job_status_changed:
+        _job_status['version'] += 1
+        _job_status['status'] = status
+        _job_status_changed.notify_all()
+        return _job_status['version']
+
+@app.route('/api/scrape-status', methods=['POST'])
+def report_scrape_status():
+    """Receive a job status from the local scraper service (signed like the webhook)"""
+    payload = request.get_data()
+    if not verify_signature(payload, request.headers.get('X-Webhook-Signature', ''), WEBHOOK_SECRET):
+        return jsonify({'status': 'error', 'message': 'Invalid webhook signature'}), 403
+
+    status = request.get_json(force=True, silent=True)
+    if not isinstance(status, dict):
+        return jsonify({'status': 'error', 'message': 'Job status must be a JSON object'}), 400
+    return jsonify({'accepted': True, 'version': publish_job_status(status)})
+
+@app.route('/api/scrape-status', methods=['GET'])
+def get_scrape_status():
+    """Current job status; with ?since=<version>, long-polls until there's a newer one"""
+    since = request.args.get('since', type=int)
+    if since is None:
+        return jsonify(dict(_job_status))
+    return jsonify(wait_for_job_status(since, STATUS_WAIT_SECONDS))
+
+@app.route('/api/scrape-status/stream')
+def stream_scrape_status():
+    """Server-sent events: each new job status as it arrives"""
+    since = request.headers.get('Last-Event-ID', request.args.get('since'))
+    since = int(since) if since and since.isdigit() else _job_status['version']
+    # A redeploy restarts the count; don't wait for a version that was before it
+    since = min(since, _job_status['version'])
+
+    def events():
+        seen = since
+        while True:
+            current = wait_for_job_status(seen, STATUS_WAIT_SECONDS)
+            if current['version'] > seen:
+                seen = current['version']
+                yield f"id: {seen}\ndata: {json.dumps(current['status'])}\n\n"
+            else:
+                yield ': keep-alive\n\n'
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@socketio.on('subscribe')
+def handle_subscribe(data=None):
+    """Join the deals room; with `since`, replay the batches the client missed"""
+    join_room(DEALS_ROOM)
+    since = data.get('since') if isinstance(data, dict) else None
+    if since is None:
+        return
+
+    # A malformed seq can't be resumed from: treat it like one that is too old
+    since = str(since)
+    missed = broadcaster.since(int(since)) if since.isdigit() else None
+    if missed is None:
+        # Too far behind for the retained batches: client reloads /api/deals
+        emit('deals_resume', {'seq': broadcaster.seq, 'reset': True})
+    else:
+        emit('deals_resume', missed)
+
+@socketio.on('watch')
+def handle_watch(data=None):
+    """Join the rooms of the given watchlist rules to receive their matches"""
+    requested = data.get('rule_ids') if isinstance(data, dict) else None
+    rule_ids = []
+    for rule_id in requested if isinstance(requested, list) else []:
+        try:
+            rule_ids.append(int(rule_id))
+        except (TypeError, ValueError):
+            continue  # Malformed ids are skipped, not fatal to the handler
+    for rule_id in rule_ids:
+        join_room(watch_room(rule_id))
+    emit('watching', {'rule_ids': rule_ids})
 
 @socketio.on('start_refresh')
 def handle_refresh():
     """Handle refresh request from client"""
     emit('scraping_started', {'message': 'Starting scrape...'})
 
+    # Deferred so web workers that never scrape don't import the scraper stack
+    from scrapers.orchestrator import ScrapingOrchestrator
+
     # Run async scraping in event loop
     orchestrator = ScrapingOrchestrator(progress_callback=progress_callback)
 
@@ -141,12 +530,21 @@ def handle_refresh():
 
         # Save to cache
         os.makedirs('data', exist_ok=True)
-        with open(CACHE_FILE, 'w') as f:
-            json.dump(result, f, indent=2)
+        with metrics.timed(metrics.CACHE_WRITE_SECONDS):
+            payload = json.dumps(result, indent=2)
+            with open(CACHE_FILE, 'w') as f:
+                f.write(payload)
+        metrics.CACHE_WRITE_BYTES.observe(len(payload))
+        metrics.REGISTRY.save_run_summary(CACHE_FILE)
+
+        # Publish the deal delta before announcing completion
+        load_deals_cache()
+        broadcaster.flush(force=True)
 
         emit('scraping_complete', {
             'deals_count': len(result['deals']),
-            'last_updated': result['last_updated']
+            'last_updated': result['last_updated'],
+            'seq': broadcaster.seq
         })
 
     except Exception as e:
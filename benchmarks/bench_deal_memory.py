@@ -0,0 +1,90 @@
+"""
+Benchmark: memory and scoring-loop cost of Deal records vs plain dicts
+
+Run from the repo root:
+    python benchmarks/bench_deal_memory.py [deal_count]
+"""
+
+from typing import Callable, List
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer.scorer import DealScorer
+from scrapers.deal import Deal
+
+def make_deal(i: int) -> Deal:
+    return Deal(
+        id=f'amazonau-{i:012x}',
+        title=f'Product {i} with a long Amazon style title, colour, size and model number',
+        price=50.0 + i % 500,
+        original_price=100.0 + i % 700,
+        discount_pct=float(i % 80),
+        url=f'https://www.amazon.com.au/dp/B0{i:08d}',
+        image=f'https://m.media-amazon.com/images/I/{i}.jpg',
+        rating=3.5 + (i % 15) / 10,
+        review_count=i % 5000,
+        category='Electronics',
+        retailer='Amazon AU',
+        scraped_at='2025-11-20T13:43:38Z',
+        asin=f'B0{i:08d}'
+    )
+
+def measure(build: Callable[[], List]) -> int:
+    """Bytes allocated by the container and its records (shared strings excluded)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return after - before
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    scorer = DealScorer()
+
+    # Build field values once so both layouts share the same strings
+    deals = [make_deal(i) for i in range(count)]
+    for deal in deals:
+        deal.scores = scorer.score(deal)
+    dicts = [deal.to_dict() for deal in deals]
+
+    def copy_records():
+        copies = []
+        for deal in deals:
+            copy = Deal(*(getattr(deal, name) for name in Deal.__slots__))
+            copy.scores = type(deal.scores)(*(getattr(deal.scores, name) for name in deal.scores.__slots__))
+            copies.append(copy)
+        return copies
+
+    def copy_dicts():
+        return [dict(d, scores=dict(d['scores'])) for d in dicts]
+
+    record_bytes = measure(copy_records)
+    dict_bytes = measure(copy_dicts)
+
+    # Best of three, so allocator and GC warm-up don't favour either layout
+    dict_seconds = record_seconds = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for deal in dicts:
+            deal['scores'] = scorer.score_deal(deal)
+        dict_seconds = min(dict_seconds, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for deal in deals:
+            deal.scores = scorer.score(deal)
+        record_seconds = min(record_seconds, time.perf_counter() - start)
+
+    print(f"Deals:                 {count:,}")
+    print(f"Memory, dicts:         {dict_bytes / 1e6:.1f} MB ({dict_bytes / count:.0f} B/deal)")
+    print(f"Memory, Deal records:  {record_bytes / 1e6:.1f} MB ({record_bytes / count:.0f} B/deal)")
+    print(f"Scoring, dicts:        {dict_seconds * 1e3:.0f} ms")
+    print(f"Scoring, Deal records: {record_seconds * 1e3:.0f} ms")
+
+if __name__ == '__main__':
+    main()
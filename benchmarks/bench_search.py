@@ -0,0 +1,90 @@
+"""
+Benchmark: title search latency over a synthetic 100k-deal index
+
+Run from the repo root:
+    python benchmarks/bench_search.py [deal_count]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer.search import SearchIndex
+
+BRANDS = ['samsung', 'sony', 'apple', 'logitech', 'anker', 'philips', 'dyson', 'lego',
+          'fifine', 'razer', 'corsair', 'ninja', 'breville', 'bosch', 'garmin', 'jbl']
+NOUNS = ['headphones', 'microphone', 'keyboard', 'mouse', 'monitor', 'charger', 'cable',
+         'speaker', 'vacuum', 'blender', 'kettle', 'watch', 'tablet', 'camera', 'drill',
+         'backpack', 'lamp', 'router', 'ssd', 'controller', 'toaster', 'airfryer']
+WORDS = ['wireless', 'bluetooth', 'usb', 'gaming', 'portable', 'rgb', 'noise', 'cancelling',
+         'black', 'white', 'pro', 'mini', 'max', 'fast', 'charging', 'smart', 'home', 'compact',
+         'stainless', 'steel', 'ergonomic', 'mechanical', 'hd', '4k', 'led', 'rechargeable']
+
+QUERIES = ['usb', 'wireless headphones', 'samsung tab', 'gaming keyboard rgb', 'sony noise',
+           'air', 'mechanical k', 'stainless steel kettle', 'fifine microphone', 'zzz']
+
+# (query, filters): selective, empty and broad filter combinations
+FILTERED = [('usb', {'min_discount': 80}), ('usb', {'category': 'Audio', 'min_rating': 4.9}),
+            ('usb', {'min_rating': 4.9}), ('usb', {'category': 'Gaming'}),
+            ('wireless', {'max_price': 12}), ('usb', {'min_discount': 69.5})]
+
+def make_deals(count: int):
+    rng = random.Random(42)
+    categories = ['Gaming', 'Electronics', 'Home & Kitchen', 'Computers', 'Smart Home']
+    deals = []
+    for i in range(count):
+        words = rng.sample(WORDS, 8) + [f'model{rng.randint(1, 5000)}']
+        title = f"{rng.choice(BRANDS)} {rng.choice(NOUNS)} {' '.join(words)}"
+        deals.append({
+            'id': f'amazonau-{i:012x}',
+            'title': title,
+            'category': rng.choice(categories),
+            'price': rng.uniform(10, 1000),
+            'discount_pct': rng.uniform(10, 70),
+            'rating': rng.uniform(3, 5),
+            'scores': {'total': rng.uniform(30, 95)}
+        })
+    return deals
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    deals = make_deals(count)
+    index = SearchIndex()
+
+    start = time.perf_counter()
+    index.build(deals)
+    print(f"Indexed {count:,} deals in {(time.perf_counter() - start) * 1e3:.0f} ms "
+          f"({len(index.postings):,} terms)")
+
+    changed = deals[:count // 100] + make_deals(count // 100 + 10)[-10:]
+    start = time.perf_counter()
+    index.sync(deals[count // 100:] + changed[-10:])
+    print(f"Synced 1% removal + 10 additions in {(time.perf_counter() - start) * 1e3:.0f} ms")
+
+    print(f"{'query':36} {'cold':>10} {'warm':>10}")
+    for query in QUERIES:
+        measure(index, query, query)
+
+    print(f"{'filtered query':36} {'cold':>10} {'warm':>10}")
+    for query, filters in FILTERED:
+        label = f"{query} " + ' '.join(f"{key}={value}" for key, value in filters.items())
+        measure(index, label, query, **filters)
+
+def measure(index: SearchIndex, label: str, query: str, **filters):
+    # Cold is the first search after a sync
+    start = time.perf_counter()
+    results = index.search(query, limit=20, **filters)
+    cold = time.perf_counter() - start
+
+    runs = 50
+    start = time.perf_counter()
+    for _ in range(runs):
+        results = index.search(query, limit=20, **filters)
+    warm = (time.perf_counter() - start) / runs
+    print(f"{label:36} {cold * 1e3:7.3f} ms {warm * 1e3:7.3f} ms  {len(results)} results")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark: per-deal cost of deal standardisation, before and after batching
+
+Run from the repo root:
+    python benchmarks/bench_standardize.py [deal_count]
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, List
+import hashlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers.base import BaseScraper
+
+class BenchScraper(BaseScraper):
+    async def scrape(self) -> List[Dict]:
+        return []
+
+def legacy_standardize_deal(retailer_name: str, raw_deal: Dict) -> Dict:
+    """The original per-deal implementation, kept here for comparison"""
+    discount_pct = 0
+    if raw_deal.get('original_price') and raw_deal.get('price'):
+        discount_pct = round(
+            ((raw_deal['original_price'] - raw_deal['price']) / raw_deal['original_price']) * 100,
+            1
+        )
+
+    product_id = hashlib.md5(
+        f"{retailer_name.lower()}-{raw_deal.get('url', '')}".encode()
+    ).hexdigest()[:12]
+
+    return {
+        'id': f"{retailer_name.lower().replace(' ', '')}-{product_id}",
+        'title': raw_deal.get('title', 'Unknown Product'),
+        'price': raw_deal.get('price', 0),
+        'original_price': raw_deal.get('original_price', raw_deal.get('price', 0)),
+        'discount_pct': discount_pct,
+        'url': raw_deal.get('url', ''),
+        'image': raw_deal.get('image', ''),
+        'rating': raw_deal.get('rating', 0),
+        'review_count': raw_deal.get('review_count', 0),
+        'category': raw_deal.get('category', 'Uncategorized'),
+        'retailer': retailer_name,
+        'scraped_at': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+    }
+
+def make_raw_deals(count: int) -> List[Dict]:
+    tracking = 'x' * 1200  # Typical aax-fe tracking URL payload
+    return [
+        {
+            'asin': f'B0{i:08d}',
+            'title': f'Product {i} with a long Amazon style title, colour, size and model number',
+            'price': 50.0 + i % 500,
+            'original_price': 100.0 + i % 700,
+            'url': f'https://aax-fe.amazon.com.au/x/c/{tracking}{i}',
+            'image': f'https://m.media-amazon.com/images/I/{i}.jpg',
+            'rating': 4.5,
+            'review_count': i % 5000,
+            'category': 'Electronics'
+        }
+        for i in range(count)
+    ]
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    page_size = 48  # Cards on an Amazon AU results page
+    raw_deals = make_raw_deals(count)
+    scraper = BenchScraper('Amazon AU')
+
+    start = time.perf_counter()
+    for raw_deal in raw_deals:
+        legacy_standardize_deal('Amazon AU', raw_deal)
+    legacy = (time.perf_counter() - start) / count
+
+    start = time.perf_counter()
+    for offset in range(0, count, page_size):
+        scraper.standardize_deals(raw_deals[offset:offset + page_size])
+    batched = (time.perf_counter() - start) / count
+
+    print(f"Deals:              {count:,} (pages of {page_size})")
+    print(f"Per-deal (legacy):  {legacy * 1e6:.2f} µs")
+    print(f"Per-deal (batched): {batched * 1e6:.2f} µs")
+    print(f"Speed-up:           {legacy / batched:.1f}x")
+
+if __name__ == '__main__':
+    main()
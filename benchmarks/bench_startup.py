@@ -0,0 +1,71 @@
+"""
+Benchmark: cold-start cost of the web app and the local scraper service
+
+Each module is imported in a fresh interpreter (what a gunicorn worker or a
+Render cold start pays) several times; the median wall time and the heaviest
+imports from `python -X importtime` are reported.
+
+Run from the repo root:
+    python benchmarks/bench_startup.py [runs]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ['app', 'local_scraper_service']
+
+TIMER = '''
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+'''
+
+def import_seconds(module: str, cwd: str) -> float:
+    output = subprocess.run(
+        [sys.executable, '-c', TIMER.format(module=module)],
+        cwd=cwd, env=dict(os.environ, PYTHONPATH=ROOT, PYTHONDONTWRITEBYTECODE='1'),
+        capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+def heaviest_imports(module: str, cwd: str, top: int = 8):
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=cwd, env=dict(os.environ, PYTHONPATH=ROOT),
+        capture_output=True, text=True, check=True
+    ).stderr
+
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, raw_name = line[len('import time:'):].split('|')
+        # Only the module itself and its direct imports
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        if depth <= 1:
+            entries.append((int(cumulative), raw_name.strip()))
+
+    return sorted(entries, reverse=True)[:top]
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    # Import from a scratch directory so a side effect like creating data/ shows up
+    with tempfile.TemporaryDirectory() as scratch:
+        for module in MODULES:
+            times = [import_seconds(module, scratch) for _ in range(runs)]
+            print(f"import {module}: median {statistics.median(times) * 1e3:.0f} ms "
+                  f"(min {min(times) * 1e3:.0f}, max {max(times) * 1e3:.0f}, {runs} runs)")
+            for cumulative, name in heaviest_imports(module, scratch):
+                print(f"    {cumulative / 1e3:8.1f} ms  {name}")
+
+        created = sorted(os.listdir(scratch))
+        print(f"Files created at import time: {created or 'none'}")
+
+if __name__ == '__main__':
+    main()
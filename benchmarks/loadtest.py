@@ -0,0 +1,498 @@
+"""
+Load test: the web tier as deployed (gunicorn + GeventWebSocketWorker)
+
+Starts app.py with the start command from render.yaml, in a scratch
+directory holding a synthetic deals cache, and points the local-scraper
+webhook at a stub. Virtual users then replay dashboard traffic for a fixed
+duration:
+
+  * HTTP users pick weighted requests: the page and its static assets,
+    /api/deals, search with filters, price history, offers, status checks
+    and "Refresh" clicks (trigger-local-scrape).
+  * Socket users hold Socket.IO connections (Engine.IO long-polling),
+    subscribe to deal deltas and count the batches they receive.
+  * Every --snapshot-interval seconds the deals cache is rewritten with a
+    few price changes, as a new crawl would, so deltas fan out to sockets.
+
+It reports throughput, p50/p95/p99 latency per request type, error rate and
+the server's peak RSS (all worker processes), and writes everything to
+benchmarks/results/loadtest-<commit>.json for comparison across commits:
+
+    python benchmarks/loadtest.py --users 50 --socket-users 20 --duration 30
+    python benchmarks/loadtest.py --compare benchmarks/results/loadtest-<old>.json
+
+Run from the repo root. Linux only for the memory figures (/proc).
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import asyncio
+import json
+import os
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+sys.path.insert(0, ROOT)
+
+from bench_search import QUERIES, make_deals
+
+# (request type, weight) for HTTP virtual users
+SCENARIOS = [
+    ('page', 6),
+    ('static', 8),
+    ('deals', 30),
+    ('search', 25),
+    ('history', 12),
+    ('bulk_history', 5),
+    ('offers', 5),
+    ('status', 6),
+    ('refresh', 3)
+]
+
+# --------------------------------------------------------------------- setup
+
+def make_cache(deal_count: int) -> dict:
+    """A deals cache shaped like the scraper's output"""
+    deals = make_deals(deal_count)
+    categories = {}
+    for index, deal in enumerate(deals):
+        asin = f'B{index:09d}'
+        deal.update({
+            'original_price': round(deal['price'] * 100 / (100 - deal['discount_pct']), 2),
+            'url': f'https://www.amazon.com.au/dp/{asin}',
+            'image': '',
+            'review_count': 100 + index % 900,
+            'retailer': 'Amazon AU',
+            'scraped_at': '2025-11-28T00:00:00Z',
+            'asin': asin
+        })
+        deal['scores'].update({'discount': 50, 'quality': 50, 'credibility': 50,
+                               'price_tier': 50, 'legitimacy': 50})
+        categories.setdefault(deal['category'], []).append(deal['id'])
+
+    return {
+        'last_updated': '2025-11-28T00:00:00+00:00',
+        'deals': deals,
+        'categories': categories,
+        'category_stats': {},
+        'product_groups': []
+    }
+
+def write_cache(workdir: str, cache: dict):
+    path = os.path.join(workdir, 'data', 'deals_cache.json')
+    with open(path + '.tmp', 'w') as f:
+        json.dump(cache, f)
+    os.replace(path + '.tmp', path)
+
+class WebhookStub(BaseHTTPRequestHandler):
+    """Stands in for the local scraper service: accepts every trigger"""
+
+    def do_GET(self):
+        self._reply(200, {'status': 'online', 'service': 'local-scraper'})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._reply(202, {'status': 'accepted'})
+
+    def _reply(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def server_command(server: str, port: int) -> list:
+    if server == 'dev':
+        return [sys.executable, '-c',
+                'import app; app.socketio.run(app.app, host="127.0.0.1", '
+                f'port={port}, allow_unsafe_werkzeug=True)']
+
+    # The exact production command, so results reflect the deployed worker class
+    with open(os.path.join(ROOT, 'render.yaml')) as f:
+        for line in f:
+            if line.strip().startswith('startCommand:'):
+                command = line.split(':', 1)[1].strip().replace('$PORT', str(port))
+                return shlex.split(command)
+    raise SystemExit('No startCommand in render.yaml')
+
+def start_server(server: str, workdir: str, port: int, webhook_url: str, log_file) -> subprocess.Popen:
+    env = dict(os.environ, PYTHONPATH=ROOT, LOCAL_TAILSCALE_IP=webhook_url)
+    return subprocess.Popen(server_command(server, port), cwd=workdir, env=env,
+                            stdout=log_file, stderr=subprocess.STDOUT)
+
+async def wait_ready(client, base_url: str, process: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit('Server exited during startup (see its log)')
+        try:
+            response = await client.get(f'{base_url}/api/deals')
+            if response.status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise SystemExit('Server did not become ready')
+
+# ------------------------------------------------------------------- memory
+
+def process_tree(root_pid: int) -> list:
+    """root_pid and all its descendants (gunicorn master + workers)"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    pids, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+    return pids
+
+def tree_rss_bytes(root_pid: int) -> int:
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    for pid in process_tree(root_pid):
+        try:
+            with open(f'/proc/{pid}/statm') as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, ValueError, IndexError):
+            pass
+    return total
+
+class MemorySampler(threading.Thread):
+    def __init__(self, pid: int, interval: float = 0.5):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        if not os.path.isdir('/proc'):
+            return
+        while not self.stopped.is_set():
+            self.samples.append(tree_rss_bytes(self.pid))
+            self.stopped.wait(self.interval)
+
+# -------------------------------------------------------------------- users
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, kind: str, seconds: float, ok: bool):
+        self.latencies.setdefault(kind, []).append(seconds)
+        if not ok:
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+
+async def timed_request(client, recorder: Recorder, kind: str, method: str, url: str, **kwargs):
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+        await response.aread()
+        ok = response.status_code < 400
+    except Exception:
+        ok = False
+    recorder.record(kind, time.perf_counter() - start, ok)
+
+async def http_user(client, base_url: str, deal_ids: list, recorder: Recorder,
+                    stop_at: float, think: float, rng: random.Random):
+    kinds = [kind for kind, _ in SCENARIOS]
+    weights = [weight for _, weight in SCENARIOS]
+
+    while time.monotonic() < stop_at:
+        kind = rng.choices(kinds, weights)[0]
+        deal_id = rng.choice(deal_ids)
+
+        if kind == 'page':
+            await timed_request(client, recorder, kind, 'GET', f'{base_url}/')
+        elif kind == 'static':
+            asset = rng.choice(['js/app.js', 'css/style.css'])
+            await timed_request(client, recorder, kind, 'GET', f'{base_url}/static/{asset}')
+        elif kind == 'deals':
+            await timed_request(client, recorder, kind, 'GET', f'{base_url}/api/deals')
+        elif kind == 'search':
+            params = {'q': rng.choice(QUERIES), 'limit': 100}
+            if rng.random() < 0.5:
+                params['min_discount'] = rng.choice([20, 30, 50])
+            if rng.random() < 0.3:
+                params['min_rating'] = rng.choice([4, 4.5])
+            await timed_request(client, recorder, kind, 'GET', f'{base_url}/api/search', params=params)
+        elif kind == 'history':
+            await timed_request(client, recorder, kind, 'GET', f'{base_url}/api/deals/{deal_id}/history')
+        elif kind == 'bulk_history':
+            ids = ','.join(rng.sample(deal_ids, 20))
+            await timed_request(client, recorder, kind, 'GET', f'{base_url}/api/history', params={'ids': ids})
+        elif kind == 'offers':
+            await timed_request(client, recorder, kind, 'GET', f'{base_url}/api/deals/{deal_id}/offers')
+        elif kind == 'status':
+            await timed_request(client, recorder, kind, 'GET', f'{base_url}/api/check-local-status')
+        elif kind == 'refresh':
+            await timed_request(client, recorder, kind, 'POST', f'{base_url}/api/trigger-local-scrape')
+
+        if think:
+            await asyncio.sleep(rng.uniform(0, think * 2))
+
+def engineio_packets(body: str) -> list:
+    """Split an Engine.IO v4 polling payload into packets"""
+    return [packet for packet in body.split('\x1e') if packet]
+
+async def socket_user(client, base_url: str, recorder: Recorder, stop_at: float, received: dict):
+    """One Socket.IO client over Engine.IO long-polling: connect, subscribe, listen"""
+    url = f'{base_url}/socket.io/'
+    start = time.perf_counter()
+    try:
+        response = await client.get(url, params={'EIO': 4, 'transport': 'polling'})
+        sid = json.loads(response.text[1:])['sid']
+        params = {'EIO': 4, 'transport': 'polling', 'sid': sid}
+        await client.post(url, params=params, content='40')
+        await client.get(url, params=params)  # Namespace connect ack
+        await client.post(url, params=params, content='42' + json.dumps(['subscribe', {'since': None}]))
+        recorder.record('socket_connect', time.perf_counter() - start, True)
+    except Exception:
+        recorder.record('socket_connect', time.perf_counter() - start, False)
+        return
+
+    while time.monotonic() < stop_at:
+        try:
+            timeout = max(0.1, min(35.0, stop_at - time.monotonic()))
+            response = await client.get(url, params=params, timeout=timeout)
+        except Exception:
+            continue
+        for packet in engineio_packets(response.text):
+            if packet == '2':
+                await client.post(url, params=params, content='3')  # Pong
+            elif packet.startswith('42'):
+                event = json.loads(packet[2:])[0]
+                received[event] = received.get(event, 0) + 1
+            elif packet.startswith('1'):
+                return  # Server closed the session
+
+async def snapshot_updates(workdir: str, cache: dict, interval: float, stop_at: float, rng: random.Random) -> int:
+    """Rewrite the cache with a few price changes, like a new crawl landing"""
+    updates = 0
+    while time.monotonic() + interval < stop_at:
+        await asyncio.sleep(interval)
+        for deal in rng.sample(cache['deals'], min(25, len(cache['deals']))):
+            deal['price'] = round(deal['price'] * rng.uniform(0.9, 1.1), 2)
+        write_cache(workdir, cache)
+        updates += 1
+    return updates
+
+# ------------------------------------------------------------------ results
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def summarize(recorder: Recorder, duration: float) -> dict:
+    endpoints = {}
+    total = errors = 0
+    all_latencies = []
+    for kind, latencies in sorted(recorder.latencies.items()):
+        latencies = sorted(latencies)
+        failed = recorder.errors.get(kind, 0)
+        endpoints[kind] = {
+            'requests': len(latencies),
+            'errors': failed,
+            'p50_ms': round(percentile(latencies, 0.50) * 1e3, 2),
+            'p95_ms': round(percentile(latencies, 0.95) * 1e3, 2),
+            'p99_ms': round(percentile(latencies, 0.99) * 1e3, 2)
+        }
+        total += len(latencies)
+        errors += failed
+        if kind != 'socket_connect':
+            all_latencies.extend(latencies)
+
+    all_latencies.sort()
+    return {
+        'requests': total,
+        'throughput_rps': round(total / duration, 1),
+        'error_rate': round(errors / total, 4) if total else 0,
+        'p50_ms': round(percentile(all_latencies, 0.50) * 1e3, 2),
+        'p95_ms': round(percentile(all_latencies, 0.95) * 1e3, 2),
+        'p99_ms': round(percentile(all_latencies, 0.99) * 1e3, 2),
+        'endpoints': endpoints
+    }
+
+def git_revision() -> str:
+    try:
+        sha = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'diff', '--quiet', 'HEAD'], cwd=ROOT).returncode != 0
+        return sha + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def print_report(result: dict):
+    summary = result['summary']
+    print(f"\n{result['commit']}: {result['config']['users']} HTTP users, "
+          f"{result['config']['socket_users']} socket users, {result['config']['duration']}s "
+          f"({result['config']['server']})")
+    print(f"{'request':16} {'count':>8} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for kind, stats in summary['endpoints'].items():
+        print(f"{kind:16} {stats['requests']:>8} {stats['errors']:>7} "
+              f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}")
+    print(f"\nThroughput {summary['throughput_rps']} req/s, error rate {summary['error_rate']:.2%}, "
+          f"p50/p95/p99 {summary['p50_ms']}/{summary['p95_ms']}/{summary['p99_ms']} ms")
+    memory = result['memory']
+    if memory['peak_rss_mb'] is not None:
+        print(f"Server RSS: start {memory['start_rss_mb']} MB, peak {memory['peak_rss_mb']} MB")
+    print(f"Snapshots published: {result['snapshots']}, socket events received: {result['socket_events']}")
+
+def print_comparison(previous: dict, current: dict):
+    print(f"\n{'':16} {previous['commit']:>14} {current['commit']:>14} {'change':>9}")
+
+    def row(label, before, after):
+        change = f'{(after - before) / before:+.0%}' if before else ''
+        print(f"{label:16} {before:>14} {after:>14} {change:>9}")
+
+    row('throughput rps', previous['summary']['throughput_rps'], current['summary']['throughput_rps'])
+    row('p95 ms', previous['summary']['p95_ms'], current['summary']['p95_ms'])
+    row('p99 ms', previous['summary']['p99_ms'], current['summary']['p99_ms'])
+    row('error rate', previous['summary']['error_rate'], current['summary']['error_rate'])
+    if previous['memory']['peak_rss_mb'] and current['memory']['peak_rss_mb']:
+        row('peak rss MB', previous['memory']['peak_rss_mb'], current['memory']['peak_rss_mb'])
+    for kind, stats in current['summary']['endpoints'].items():
+        before = previous['summary']['endpoints'].get(kind)
+        if before:
+            row(f'{kind} p95', before['p95_ms'], stats['p95_ms'])
+
+# --------------------------------------------------------------------- main
+
+async def run(args) -> dict:
+    import httpx
+
+    rng = random.Random(args.seed)
+    cache = make_cache(args.deals)
+    deal_ids = [deal['id'] for deal in cache['deals']]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.makedirs(os.path.join(workdir, 'data'))
+        write_cache(workdir, cache)
+
+        stub = ThreadingHTTPServer(('127.0.0.1', 0), WebhookStub)
+        threading.Thread(target=stub.serve_forever, daemon=True).start()
+
+        port = free_port()
+        base_url = f'http://127.0.0.1:{port}'
+        log_path = os.path.join(workdir, 'server.log')
+        limits = httpx.Limits(max_connections=args.users + args.socket_users + 10)
+
+        with open(log_path, 'w') as log_file:
+            process = start_server(args.server, workdir, port,
+                                   f'http://127.0.0.1:{stub.server_address[1]}', log_file)
+            sampler = MemorySampler(process.pid)
+            try:
+                async with httpx.AsyncClient(timeout=30.0, limits=limits) as client:
+                    await wait_ready(client, base_url, process)
+                    start_rss = tree_rss_bytes(process.pid) if os.path.isdir('/proc') else None
+                    sampler.start()
+
+                    recorder = Recorder()
+                    received = {}
+                    started = time.monotonic()
+                    stop_at = started + args.duration
+                    tasks = [
+                        http_user(client, base_url, deal_ids, recorder, stop_at, args.think,
+                                  random.Random(args.seed + index))
+                        for index in range(args.users)
+                    ]
+                    tasks += [socket_user(client, base_url, recorder, stop_at, received)
+                              for _ in range(args.socket_users)]
+                    snapshots = asyncio.ensure_future(
+                        snapshot_updates(workdir, cache, args.snapshot_interval, stop_at, rng))
+                    await asyncio.gather(*tasks)
+                    elapsed = time.monotonic() - started
+                    snapshot_count = await snapshots
+            finally:
+                sampler.stopped.set()
+                process.terminate()
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                stub.shutdown()
+
+    samples = sampler.samples
+    return {
+        'commit': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'config': {
+            'server': args.server,
+            'users': args.users,
+            'socket_users': args.socket_users,
+            'duration': args.duration,
+            'think': args.think,
+            'deals': args.deals,
+            'snapshot_interval': args.snapshot_interval,
+            'seed': args.seed
+        },
+        'summary': summarize(recorder, elapsed),
+        'memory': {
+            'start_rss_mb': round(start_rss / 2**20, 1) if start_rss else None,
+            'peak_rss_mb': round(max(samples) / 2**20, 1) if samples else None
+        },
+        'snapshots': snapshot_count,
+        'socket_events': received
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the web tier')
+    parser.add_argument('--users', type=int, default=50, help='Concurrent HTTP users')
+    parser.add_argument('--socket-users', type=int, default=20, help='Concurrent Socket.IO connections')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds of traffic')
+    parser.add_argument('--think', type=float, default=0.2, help='Mean think time between requests (s)')
+    parser.add_argument('--deals', type=int, default=2000, help='Deals in the synthetic cache')
+    parser.add_argument('--snapshot-interval', type=float, default=10, help='Seconds between cache updates')
+    parser.add_argument('--server', choices=['gunicorn', 'dev'], default='gunicorn',
+                        help='gunicorn = render.yaml start command; dev = socketio.run')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--compare', help='Previous results JSON to compare against')
+    parser.add_argument('--no-save', action='store_true', help="Don't write results JSON")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print_report(result)
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"loadtest-{result['commit']}.json")
+        with open(path, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"Saved {os.path.relpath(path, ROOT)}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(json.load(f), result)
+
+if __name__ == '__main__':
+    main()
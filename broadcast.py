@@ -0,0 +1,148 @@
+"""
+Batched, rate-limited Socket.IO updates for scrape progress and deal changes
+
+Progress callbacks and new deal sets are merged into one pending batch and
+flushed at most once per `interval` (a publish flushes immediately when the
+interval has passed; a background loop flushes whatever is left). Each batch
+carries a sequence number, and recent batches are kept so a reconnecting
+client can ask for everything after the last seq it applied instead of
+downloading the full deals cache again.
+"""
+
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+import threading
+import time
+
+# Deal fields compared between crawls; scraped_at changes every run and is ignored
+FINGERPRINT_FIELDS = ('title', 'price', 'original_price', 'discount_pct', 'url', 'image',
+                      'rating', 'review_count', 'category', 'group_id')
+
+def deal_fingerprint(deal: Dict) -> tuple:
+    """The parts of a deal a client would re-render for"""
+    scores = deal.get('scores') or {}
+    return tuple(deal.get(name) for name in FINGERPRINT_FIELDS) + (scores.get('total'),)
+
+def merge_batches(batches: Iterable[Dict]) -> Dict:
+    """Collapse consecutive batches into one (later values win)"""
+    progress: Dict[str, Dict] = {}
+    upserts: Dict[str, Dict] = {}
+    removed = set()
+    seq = 0
+
+    for batch in batches:
+        seq = batch['seq']
+        for item in batch['progress']:
+            progress[item.get('retailer', '')] = item
+        for deal_id in batch['removed']:
+            upserts.pop(deal_id, None)
+            removed.add(deal_id)
+        for deal in batch['upserts']:
+            removed.discard(deal['id'])
+            upserts[deal['id']] = deal
+
+    return {
+        'seq': seq,
+        'progress': list(progress.values()),
+        'upserts': list(upserts.values()),
+        'removed': sorted(removed)
+    }
+
+class DeltaBroadcaster:
+    """Coalesces progress and deal deltas into sequenced batches for one room"""
+
+    def __init__(self, emit: Callable[[str, Dict], None], interval: float = 0.25,
+                 backlog: int = 256, clock: Callable[[], float] = time.monotonic):
+        self.emit = emit
+        self.interval = interval
+        self.clock = clock
+        self.seq = 0
+        self.batches = deque(maxlen=backlog)        # Recent batches, for resume
+        self.fingerprints: Dict[str, int] = {}      # Deal id -> hash of last published fingerprint
+        self._progress: Dict[str, Dict] = {}        # Latest progress per retailer
+        self._upserts: Dict[str, Dict] = {}
+        self._removed = set()
+        self._last_flush = float('-inf')
+        self._lock = threading.Lock()
+
+    def prime(self, deals: Iterable[Dict]):
+        """Record the deals clients already have, without broadcasting them"""
+        with self._lock:
+            self.fingerprints = {deal['id']: hash(deal_fingerprint(deal)) for deal in deals}
+
+    def publish_progress(self, data: Dict):
+        """Queue a progress update (only the latest per retailer is sent)"""
+        with self._lock:
+            self._progress[data.get('retailer', '')] = data
+        self.flush()
+
+    def publish_deals(self, deals: Iterable[Dict]) -> Dict[str, int]:
+        """Queue the difference between the last published deal set and `deals`
+
+        `deals` is consumed once, so it can be a stream: only changed deals are kept.
+        """
+        seen = set()
+        changed = 0
+
+        with self._lock:
+            for deal in deals:
+                deal_id = deal['id']
+                seen.add(deal_id)
+                fingerprint = hash(deal_fingerprint(deal))
+                if self.fingerprints.get(deal_id) != fingerprint:
+                    self.fingerprints[deal_id] = fingerprint
+                    self._removed.discard(deal_id)
+                    self._upserts[deal_id] = deal
+                    changed += 1
+
+            for deal_id in [deal_id for deal_id in self.fingerprints if deal_id not in seen]:
+                del self.fingerprints[deal_id]
+                self._upserts.pop(deal_id, None)
+                self._removed.add(deal_id)
+
+            removed = len(self._removed)
+
+        self.flush()
+        return {'changed': changed, 'removed': removed}
+
+    def flush(self, force: bool = False) -> Optional[Dict]:
+        """Emit the pending batch if there is one and the interval has passed"""
+        with self._lock:
+            if not (self._progress or self._upserts or self._removed):
+                return None
+            now = self.clock()
+            if not force and now - self._last_flush < self.interval:
+                return None
+
+            self.seq += 1
+            batch = {
+                'seq': self.seq,
+                'progress': list(self._progress.values()),
+                'upserts': list(self._upserts.values()),
+                'removed': sorted(self._removed)
+            }
+            self._progress = {}
+            self._upserts = {}
+            self._removed = set()
+            self._last_flush = now
+            self.batches.append(batch)
+
+            # Emitted under the lock so clients always see batches in seq order
+            self.emit('deals_delta', batch)
+        return batch
+
+    def since(self, seq: int) -> Optional[Dict]:
+        """Everything after `seq` as one batch, or None if it is no longer retained"""
+        with self._lock:
+            if seq >= self.seq:
+                return {'seq': self.seq, 'progress': [], 'upserts': [], 'removed': []}
+            if seq < 0 or not self.batches or self.batches[0]['seq'] > seq + 1:
+                return None
+            missed: List[Dict] = [batch for batch in self.batches if batch['seq'] > seq]
+        return merge_batches(missed)
+
+    def run(self, sleep: Callable[[float], None]):
+        """Flush loop for a background task (pass socketio.sleep under gevent)"""
+        while True:
+            sleep(self.interval)
+            self.flush()
@@ -1,84 +1,319 @@
 import sqlite3
-from datetime import datetime
-from typing import List, Dict, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
 import os
+import queue
+import threading
+from scrapers import urls as scraper_urls
 
 DB_PATH = 'data/price_history.db'
 
+# Raw price points older than this are compacted away (daily rollups are kept)
+RAW_RETENTION_DAYS = int(os.getenv('PRICE_RAW_RETENTION_DAYS', '14'))
+# History windows up to this many days are served from raw points, longer ones from
+# rollups (shared by get_price_history and get_price_series, so both switch together)
+RAW_QUERY_MAX_DAYS = 2
+
 def init_database():
     """Initialize the price history database"""
-    os.makedirs('data', exist_ok=True)
+    os.makedirs(os.path.dirname(DB_PATH) or '.', exist_ok=True)
 
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
 
-    # Create price_history table
+    # Products dimension: one row per (asin, retailer), title/url stored once
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS price_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY,
             asin TEXT NOT NULL,
             retailer TEXT NOT NULL,
-            price REAL NOT NULL,
-            original_price REAL NOT NULL,
             title TEXT NOT NULL,
             url TEXT NOT NULL,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(asin, retailer, timestamp)
+            first_seen INTEGER NOT NULL,
+            last_seen INTEGER NOT NULL,
+            UNIQUE(asin, retailer)
         )
     ''')
 
-    # Create index for faster lookups
+    # Narrow fact table: raw price points (epoch seconds), kept for RAW_RETENTION_DAYS
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS price_points (
+            product_id INTEGER NOT NULL,
+            ts INTEGER NOT NULL,
+            price REAL NOT NULL,
+            original_price REAL NOT NULL,
+            PRIMARY KEY (product_id, ts)
+        ) WITHOUT ROWID
+    ''')
+
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_price_points_ts
+        ON price_points(ts)
+    ''')
+
+    # Daily rollups, maintained on insert and kept after raw points are compacted
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS price_daily (
+            product_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            min_price REAL NOT NULL,
+            max_price REAL NOT NULL,
+            sum_price REAL NOT NULL,
+            samples INTEGER NOT NULL,
+            last_price REAL NOT NULL,
+            last_original_price REAL NOT NULL,
+            last_ts INTEGER NOT NULL,
+            PRIMARY KEY (product_id, day)
+        ) WITHOUT ROWID
+    ''')
+
+    # Create crawl_yield table (discounted deals found per search results page)
     cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_asin_retailer
-        ON price_history(asin, retailer)
+        CREATE TABLE IF NOT EXISTS crawl_yield (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            retailer TEXT NOT NULL,
+            category TEXT NOT NULL,
+            page INTEGER NOT NULL,
+            cards_found INTEGER NOT NULL,
+            deals_found INTEGER NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
     ''')
 
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_crawl_yield_category
+        ON crawl_yield(retailer, category, page)
+    ''')
+
+    # Small key/value table; history_version is bumped whenever snapshots land
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+    ''')
+
+    # Watchlist rules: keyed by an asin, a category with max_price, or a min_discount
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS watch_rules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            asin TEXT,
+            category TEXT,
+            max_price REAL,
+            min_discount REAL,
+            label TEXT,
+            created_at INTEGER NOT NULL
+        )
+    ''')
+
+    # Price each rule last saw per matching deal, so a match is sent once per drop:
+    # lowered when a cheaper match is notified, raised silently when the price rebounds,
+    # and dropped once the deal stops matching
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS watch_matches (
+            rule_id INTEGER NOT NULL,
+            deal_id TEXT NOT NULL,
+            price REAL NOT NULL,
+            matched_at INTEGER NOT NULL,
+            PRIMARY KEY (rule_id, deal_id)
+        ) WITHOUT ROWID
+    ''')
+
+    # Per-product verdicts from the batch price analysis (analyzer/price_flags.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS price_flags (
+            product_id INTEGER PRIMARY KEY,
+            computed_at INTEGER NOT NULL,
+            baseline_price REAL,
+            peak_price REAL,
+            current_price REAL,
+            inflation_ratio REAL,
+            real_discount_pct REAL,
+            change_points INTEGER NOT NULL,
+            flags TEXT NOT NULL
+        )
+    ''')
+
+    _migrate_legacy_price_history(cursor)
+
     conn.commit()
     conn.close()
 
+_initialized_path: Optional[str] = None
+_init_lock = threading.Lock()
+
+def ensure_database():
+    """Create/migrate the schema on first use rather than at import time"""
+    global _initialized_path
+    if _initialized_path == DB_PATH:
+        return
+    with _init_lock:
+        if _initialized_path != DB_PATH:
+            init_database()
+            _initialized_path = DB_PATH
+
+def get_connection() -> sqlite3.Connection:
+    """Read/write connection to the price history database"""
+    ensure_database()
+    return sqlite3.connect(DB_PATH)
+
+def _migrate_legacy_price_history(cursor):
+    """Move rows from the old one-wide-row-per-snapshot price_history table"""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'price_history'")
+    if not cursor.fetchone():
+        return
+
+    cursor.execute('''
+        SELECT asin, retailer, price, original_price, title, url, timestamp
+        FROM price_history
+        ORDER BY timestamp
+    ''')
+    rows = cursor.fetchall()
+
+    for asin, retailer, price, original_price, title, url, timestamp in rows:
+        try:
+            ts = int(datetime.fromisoformat(timestamp).timestamp())
+        except (TypeError, ValueError):
+            continue
+        _insert_snapshot(cursor, asin, retailer, price, original_price, title, url, ts)
+
+    cursor.execute('DROP TABLE price_history')
+    print(f"[Database] Migrated {len(rows)} legacy price_history rows")
+
+def _insert_snapshot(cursor, asin: str, retailer: str, price: float, original_price: float,
+                     title: str, url: str, ts: int):
+    """Upsert the product, add the raw point and fold it into the daily rollup"""
+    cursor.execute('''
+        INSERT INTO products (asin, retailer, title, url, first_seen, last_seen)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(asin, retailer) DO UPDATE SET
+            title = excluded.title,
+            url = excluded.url,
+            last_seen = MAX(last_seen, excluded.last_seen)
+    ''', (asin, retailer, title, url, ts, ts))
+
+    cursor.execute('SELECT id FROM products WHERE asin = ? AND retailer = ?', (asin, retailer))
+    product_id = cursor.fetchone()[0]
+
+    cursor.execute('''
+        INSERT OR IGNORE INTO price_points (product_id, ts, price, original_price)
+        VALUES (?, ?, ?, ?)
+    ''', (product_id, ts, price, original_price))
+    if cursor.rowcount == 0:
+        return  # Already recorded, don't count it twice in the rollup
+
+    day = datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%d')
+    cursor.execute('''
+        INSERT INTO price_daily
+        (product_id, day, min_price, max_price, sum_price, samples,
+         last_price, last_original_price, last_ts)
+        VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?)
+        ON CONFLICT(product_id, day) DO UPDATE SET
+            min_price = MIN(min_price, excluded.min_price),
+            max_price = MAX(max_price, excluded.max_price),
+            sum_price = sum_price + excluded.sum_price,
+            samples = samples + 1,
+            last_price = CASE WHEN excluded.last_ts >= last_ts THEN excluded.last_price ELSE last_price END,
+            last_original_price = CASE WHEN excluded.last_ts >= last_ts
+                THEN excluded.last_original_price ELSE last_original_price END,
+            last_ts = MAX(last_ts, excluded.last_ts)
+    ''', (product_id, day, price, price, price, price, original_price, ts))
+
 def save_price_snapshot(deal: Dict):
     """Save a price snapshot for a deal"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    save_price_snapshots([deal])
 
-    try:
-        # Extract ASIN from URL if available
-        asin = extract_asin(deal.get('url', ''))
-        if not asin:
-            return  # Skip if no ASIN
+def save_price_snapshots(deals: List[Dict], timestamp: Optional[datetime] = None) -> int:
+    """Save price snapshots for a batch of deals in one transaction
 
-        cursor.execute('''
-            INSERT OR IGNORE INTO price_history
-            (asin, retailer, price, original_price, title, url, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            asin,
-            deal.get('retailer', 'Unknown'),
-            deal.get('price', 0),
-            deal.get('original_price', 0),
-            deal.get('title', ''),
-            deal.get('url', ''),
-            datetime.now().isoformat()
-        ))
+    Returns the number of deals recorded (deals without an ASIN are skipped).
+    """
+    ts = int((timestamp or datetime.now(timezone.utc)).timestamp())
+    conn = get_connection()
+    cursor = conn.cursor()
+    saved = 0
 
+    try:
+        for deal in deals:
+            # Extract ASIN from URL if available
+            asin = deal.get('asin') or extract_asin(deal.get('url', ''))
+            if not asin:
+                continue  # Skip if no ASIN
+
+            _insert_snapshot(
+                cursor,
+                asin,
+                deal.get('retailer', 'Unknown'),
+                deal.get('price', 0),
+                deal.get('original_price', 0),
+                deal.get('title', ''),
+                deal.get('url', ''),
+                ts
+            )
+            saved += 1
+
+        if saved:
+            cursor.execute('''
+                INSERT INTO meta (key, value) VALUES ('history_version', 1)
+                ON CONFLICT(key) DO UPDATE SET value = value + 1
+            ''')
         conn.commit()
     except Exception as e:
-        print(f"[Database] Error saving price snapshot: {e}")
+        conn.rollback()
+        saved = 0
+        print(f"[Database] Error saving price snapshots: {e}")
     finally:
         conn.close()
 
+    return saved
+
 def get_price_history(asin: str, retailer: str, days: int = 30) -> List[Dict]:
-    """Get price history for a product over the last N days"""
-    conn = sqlite3.connect(DB_PATH)
+    """Get price history for a product over the last N days (newest first)
+
+    Windows up to RAW_QUERY_MAX_DAYS read raw points; longer windows read the
+    daily rollups, one entry per day with the day's last price plus its
+    min/max/avg.
+    """
+    conn = get_connection()
     cursor = conn.cursor()
 
+    cursor.execute('SELECT id FROM products WHERE asin = ? AND retailer = ?', (asin, retailer))
+    product = cursor.fetchone()
+    if not product:
+        conn.close()
+        return []
+
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+
+    if days <= RAW_QUERY_MAX_DAYS:
+        cursor.execute('''
+            SELECT price, original_price, ts
+            FROM price_points
+            WHERE product_id = ? AND ts >= ?
+            ORDER BY ts DESC
+        ''', (product[0], int(since.timestamp())))
+
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [
+            {
+                'price': row[0],
+                'original_price': row[1],
+                'timestamp': _iso_timestamp(row[2])
+            }
+            for row in rows
+        ]
+
     cursor.execute('''
-        SELECT price, original_price, timestamp
-        FROM price_history
-        WHERE asin = ? AND retailer = ?
-        AND timestamp >= datetime('now', '-' || ? || ' days')
-        ORDER BY timestamp DESC
-    ''', (asin, retailer, days))
+        SELECT last_price, last_original_price, last_ts,
+               min_price, max_price, sum_price / samples, day
+        FROM price_daily
+        WHERE product_id = ? AND day >= ?
+        ORDER BY day DESC
+    ''', (product[0], since.strftime('%Y-%m-%d')))
 
     rows = cursor.fetchall()
     conn.close()
@@ -87,17 +322,189 @@ def get_price_history(asin: str, retailer: str, days: int = 30) -> List[Dict]:
         {
             'price': row[0],
             'original_price': row[1],
-            'timestamp': row[2]
+            'timestamp': _iso_timestamp(row[2]),
+            'min_price': row[3],
+            'max_price': row[4],
+            'avg_price': round(row[5], 2),
+            'day': row[6]
         }
         for row in rows
     ]
 
+def compact_price_history(raw_days: int = None, vacuum: bool = False) -> int:
+    """Retention job: drop raw points older than raw_days
+
+    Their daily rollups stay, so old history is effectively downsampled to one
+    row per product per day. Returns the number of raw points removed.
+    """
+    raw_days = RAW_RETENTION_DAYS if raw_days is None else raw_days
+    cutoff = int((datetime.now(timezone.utc) - timedelta(days=raw_days)).timestamp())
+
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute('DELETE FROM price_points WHERE ts < ?', (cutoff,))
+        removed = cursor.rowcount
+        conn.commit()
+
+        if vacuum and removed:
+            cursor.execute('VACUUM')
+    finally:
+        conn.close()
+
+    return removed
+
+class ReadConnectionPool:
+    """Small pool of shared read-only SQLite connections for request handlers
+
+    Connections are opened with mode=ro (so a handler can never write) and
+    reused across requests instead of reconnecting on every call.
+    """
+
+    def __init__(self, db_path: str, size: int = 4):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._opened < self.size
+                if can_open:
+                    self._opened += 1
+            if can_open:
+                try:
+                    conn = sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True,
+                                           check_same_thread=False)
+                except sqlite3.Error:
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+            else:
+                conn = self._idle.get()
+
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+_read_pool: Optional[ReadConnectionPool] = None
+
+def get_read_pool() -> ReadConnectionPool:
+    """Shared read-only pool for DB_PATH (recreated if DB_PATH changes)"""
+    global _read_pool
+    if _read_pool is None or _read_pool.db_path != DB_PATH:
+        ensure_database()  # A read-only connection can't create the file
+        _read_pool = ReadConnectionPool(DB_PATH)
+    return _read_pool
+
+def get_history_version() -> int:
+    """Counter that changes whenever new price snapshots are saved"""
+    with get_read_pool().connection() as conn:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'history_version'").fetchone()
+    return row[0] if row else 0
+
+def get_price_series(asin: str, retailer: str, days: int = 90) -> List[Tuple[int, float]]:
+    """(epoch seconds, price) points for charting, oldest first
+
+    Windows up to RAW_QUERY_MAX_DAYS use every raw point (as get_price_history
+    does); longer windows use the last price of each day from the rollups.
+    """
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+
+    with get_read_pool().connection() as conn:
+        product = conn.execute(
+            'SELECT id FROM products WHERE asin = ? AND retailer = ?', (asin, retailer)
+        ).fetchone()
+        if not product:
+            return []
+
+        if days <= RAW_QUERY_MAX_DAYS:
+            rows = conn.execute('''
+                SELECT ts, price FROM price_points
+                WHERE product_id = ? AND ts >= ?
+                ORDER BY ts
+            ''', (product[0], int(since.timestamp()))).fetchall()
+        else:
+            rows = conn.execute('''
+                SELECT last_ts, last_price FROM price_daily
+                WHERE product_id = ? AND day >= ?
+                ORDER BY day
+            ''', (product[0], since.strftime('%Y-%m-%d'))).fetchall()
+
+    return rows
+
+def iter_daily_prices(first_day: str, last_day: str) -> Iterator[Tuple[int, int, float, float]]:
+    """(product_id, epoch day, last price, last original price) for each rollup between two days
+
+    Days are 'YYYY-MM-DD' (inclusive). Streamed in table order, for loading
+    straight into arrays.
+    """
+    conn = get_connection()
+    try:
+        # Rollup days are the UTC day of last_ts, so the epoch day is plain integer division
+        yield from conn.execute('''
+            SELECT product_id, last_ts / 86400, last_price, last_original_price
+            FROM price_daily
+            WHERE day >= ? AND day <= ?
+        ''', (first_day, last_day))
+    finally:
+        conn.close()
+
+PRICE_FLAG_COLUMNS = ('product_id', 'computed_at', 'baseline_price', 'peak_price', 'current_price',
+                      'inflation_ratio', 'real_discount_pct', 'change_points', 'flags')
+
+def save_price_flags(rows: Iterable[Tuple]) -> int:
+    """Replace the stored price flags with `rows` (tuples in PRICE_FLAG_COLUMNS order)"""
+    conn = get_connection()
+    try:
+        conn.execute('DELETE FROM price_flags')
+        cursor = conn.executemany(
+            f"INSERT INTO price_flags ({', '.join(PRICE_FLAG_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(PRICE_FLAG_COLUMNS))})",
+            rows
+        )
+        saved = cursor.rowcount
+        conn.commit()
+    finally:
+        conn.close()
+    return saved
+
+def get_price_flags(keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict]:
+    """Stored price flags by (asin, retailer), for the keys that have them"""
+    wanted = set(keys)
+    if not wanted:
+        return {}
+
+    with get_read_pool().connection() as conn:
+        rows = conn.execute(f'''
+            SELECT products.asin, products.retailer, {', '.join(f'price_flags.{name}' for name in PRICE_FLAG_COLUMNS[1:])}
+            FROM price_flags JOIN products ON products.id = price_flags.product_id
+        ''').fetchall()
+
+    flags = {}
+    for asin, retailer, *values in rows:
+        if (asin, retailer) in wanted:
+            entry = dict(zip(PRICE_FLAG_COLUMNS[1:], values))
+            entry['flags'] = entry['flags'].split(',') if entry['flags'] else []
+            flags[(asin, retailer)] = entry
+    return flags
+
+def _iso_timestamp(ts: int) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
 def analyze_deal_legitimacy(deal: Dict) -> Dict:
     """
     Analyze if a deal is legitimate based on price history
     Returns dict with legitimacy score and reasoning
     """
-    asin = extract_asin(deal.get('url', ''))
+    asin = deal.get('asin') or extract_asin(deal.get('url', ''))
     if not asin:
         return {'legitimate': True, 'confidence': 'unknown', 'reason': 'No price history available'}
 
@@ -120,7 +527,7 @@ def analyze_deal_legitimacy(deal: Dict) -> Dict:
     max_historical_price = max(historical_prices)
 
     # Check if "original price" was ever the actual price
-    original_was_real = any(h['price'] >= original_price * 0.95 for h in history)
+    original_was_real = any(h.get('max_price', h['price']) >= original_price * 0.95 for h in history)
 
     # Check if current price is actually lower than historical average
     is_real_discount = current_price < avg_historical_price * 0.90
@@ -161,45 +568,209 @@ def analyze_deal_legitimacy(deal: Dict) -> Dict:
 
 def extract_asin(url: str) -> Optional[str]:
     """Extract ASIN from Amazon URL"""
-    import re
-
-    # Amazon ASIN pattern: /dp/ASIN or /product/ASIN or data-asin
-    patterns = [
-        r'/dp/([A-Z0-9]{10})',
-        r'/product/([A-Z0-9]{10})',
-        r'data-asin="([A-Z0-9]{10})"',
-        r'/([A-Z0-9]{10})/'
-    ]
+    return scraper_urls.extract_asin(url)
+
+def save_page_yield(retailer: str, category: str, page: int,
+                    cards_found: int, deals_found: int):
+    """Record how many discounted deals a search results page produced"""
+    conn = get_connection()
+    cursor = conn.cursor()
 
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
+    try:
+        cursor.execute('''
+            INSERT INTO crawl_yield
+            (retailer, category, page, cards_found, deals_found, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (retailer, category, page, cards_found, deals_found, datetime.now().isoformat()))
 
-    return None
+        conn.commit()
+    except Exception as e:
+        print(f"[Database] Error saving page yield: {e}")
+    finally:
+        conn.close()
+
+def get_page_yields(retailer: str, category: str, runs: int = 5) -> Dict[int, List[int]]:
+    """Get deals found per page number over the last N crawls of a category (newest first)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    # Only the newest `runs` rows per page are read, however much history has built up
+    cursor.execute('''
+        SELECT page, deals_found FROM (
+            SELECT page, deals_found, timestamp, id,
+                   ROW_NUMBER() OVER (PARTITION BY page ORDER BY timestamp DESC, id DESC) AS run
+            FROM crawl_yield
+            WHERE retailer = ? AND category = ?
+        )
+        WHERE run <= ?
+        ORDER BY page, timestamp DESC, id DESC
+    ''', (retailer, category, runs))
+
+    rows = cursor.fetchall()
+    conn.close()
+
+    yields: Dict[int, List[int]] = {}
+    for page, deals_found in rows:
+        yields.setdefault(page, []).append(deals_found)
+
+    return yields
 
 def get_database_stats() -> Dict:
     """Get statistics about the price history database"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_connection()
     cursor = conn.cursor()
 
-    cursor.execute('SELECT COUNT(*) FROM price_history')
-    total_records = cursor.fetchone()[0]
+    cursor.execute('SELECT COUNT(*), MIN(ts), MAX(ts) FROM price_points')
+    total_records, oldest_raw, newest_raw = cursor.fetchone()
 
-    cursor.execute('SELECT COUNT(DISTINCT asin) FROM price_history')
-    unique_products = cursor.fetchone()[0]
+    cursor.execute('SELECT COUNT(*), MIN(day) FROM price_daily')
+    rollup_records, oldest_day = cursor.fetchone()
 
-    cursor.execute('SELECT MIN(timestamp), MAX(timestamp) FROM price_history')
-    date_range = cursor.fetchone()
+    cursor.execute('SELECT COUNT(*) FROM products')
+    unique_products = cursor.fetchone()[0]
 
     conn.close()
 
     return {
         'total_records': total_records,
+        'rollup_records': rollup_records,
         'unique_products': unique_products,
-        'oldest_record': date_range[0],
-        'newest_record': date_range[1]
+        'oldest_record': oldest_day,
+        'oldest_raw_record': _iso_timestamp(oldest_raw) if oldest_raw else None,
+        'newest_record': _iso_timestamp(newest_raw) if newest_raw else None
     }
 
-# Initialize database on module load
-init_database()
+WATCH_RULE_KINDS = ('asin', 'category', 'discount')
+WATCH_RULE_COLUMNS = ('id', 'kind', 'asin', 'category', 'max_price', 'min_discount',
+                      'label', 'created_at')
+
+def add_watch_rule(kind: str, asin: Optional[str] = None, category: Optional[str] = None,
+                   max_price: Optional[float] = None, min_discount: Optional[float] = None,
+                   label: Optional[str] = None) -> Dict:
+    """Store a watchlist rule and return it
+
+    'asin' rules match that product (below max_price, if given), 'category' rules
+    match any deal in the category at or below max_price, and 'discount' rules
+    match deals at or above min_discount (optionally within one category).
+    Raises ValueError for an unknown kind or a rule missing its key.
+    """
+    if kind not in WATCH_RULE_KINDS:
+        raise ValueError(f"Unknown watch rule kind '{kind}' (expected one of {', '.join(WATCH_RULE_KINDS)})")
+    if kind == 'asin' and not asin:
+        raise ValueError('An asin rule needs an asin')
+    if kind == 'category' and (not category or max_price is None):
+        raise ValueError('A category rule needs a category and max_price')
+    if kind == 'discount' and min_discount is None:
+        raise ValueError('A discount rule needs min_discount')
+
+    rule = {
+        'kind': kind,
+        'asin': asin if kind == 'asin' else None,
+        'category': category if kind != 'asin' else None,
+        'max_price': float(max_price) if max_price is not None and kind != 'discount' else None,
+        'min_discount': float(min_discount) if kind == 'discount' else None,
+        'label': label,
+        'created_at': int(datetime.now(timezone.utc).timestamp())
+    }
+    columns = WATCH_RULE_COLUMNS[1:]
+
+    conn = get_connection()
+    try:
+        cursor = conn.execute(
+            f"INSERT INTO watch_rules ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            tuple(rule[name] for name in columns)
+        )
+        rule['id'] = cursor.lastrowid
+        _bump_watchlist_version(cursor)
+        conn.commit()
+    finally:
+        conn.close()
+    return rule
+
+def list_watch_rules() -> List[Dict]:
+    """Every watchlist rule, oldest first"""
+    with get_read_pool().connection() as conn:
+        rows = conn.execute(
+            f"SELECT {', '.join(WATCH_RULE_COLUMNS)} FROM watch_rules ORDER BY id"
+        ).fetchall()
+    return [dict(zip(WATCH_RULE_COLUMNS, row)) for row in rows]
+
+def delete_watch_rule(rule_id: int) -> bool:
+    """Remove a rule and its match history; returns whether it existed"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM watch_rules WHERE id = ?', (rule_id,))
+        deleted = cursor.rowcount > 0
+        cursor.execute('DELETE FROM watch_matches WHERE rule_id = ?', (rule_id,))
+        if deleted:
+            _bump_watchlist_version(cursor)
+        conn.commit()
+    finally:
+        conn.close()
+    return deleted
+
+def _bump_watchlist_version(cursor):
+    cursor.execute('''
+        INSERT INTO meta (key, value) VALUES ('watchlist_version', 1)
+        ON CONFLICT(key) DO UPDATE SET value = value + 1
+    ''')
+
+def get_watchlist_version() -> int:
+    """Counter that changes whenever watchlist rules are added or removed"""
+    with get_read_pool().connection() as conn:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'watchlist_version'").fetchone()
+    return row[0] if row else 0
+
+def record_watch_matches(matches: List[Dict], rule_ids: Optional[Iterable[int]] = None) -> List[Dict]:
+    """Keep the matches that are new or cheaper than last seen, and remember them
+
+    With rule_ids, `matches` is every current match for those rules: deals
+    that no longer match are forgotten, so matching again later is a new drop.
+    A price that rebounds but still matches is remembered too, so falling back
+    is notified again.
+
+    One write transaction: when several workers match the same snapshot, only
+    the first to record a match gets it back (and delivers it).
+    """
+    now = int(datetime.now(timezone.utc).timestamp())
+    conn = get_connection()
+    cursor = conn.cursor()
+    fresh = []
+
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        for match in matches:
+            key = (match['rule_id'], match['deal_id'])
+            cursor.execute('''
+                INSERT INTO watch_matches (rule_id, deal_id, price, matched_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(rule_id, deal_id) DO UPDATE SET
+                    price = excluded.price,
+                    matched_at = excluded.matched_at
+                WHERE excluded.price < watch_matches.price
+            ''', (*key, match['price'], now))
+            if cursor.rowcount > 0:
+                fresh.append(match)
+            else:
+                cursor.execute(
+                    'UPDATE watch_matches SET price = ? WHERE rule_id = ? AND deal_id = ? AND price < ?',
+                    (match['price'], *key, match['price'])
+                )
+
+        if rule_ids is not None:
+            current = {(match['rule_id'], match['deal_id']) for match in matches}
+            for rule_id in set(rule_ids):
+                cursor.execute('SELECT deal_id FROM watch_matches WHERE rule_id = ?', (rule_id,))
+                stale = [(rule_id, deal_id) for (deal_id,) in cursor.fetchall()
+                         if (rule_id, deal_id) not in current]
+                cursor.executemany('DELETE FROM watch_matches WHERE rule_id = ? AND deal_id = ?', stale)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        fresh = []
+        print(f"[Database] Error recording watch matches: {e}")
+    finally:
+        conn.close()
+
+    return fresh
@@ -0,0 +1,79 @@
+"""
+Pre-rendered deal card HTML, per snapshot version
+
+The dashboard's category view is a list of cards sorted by score, paged and
+filtered by the sidebar sliders. Each card is rendered with Jinja at most once
+per snapshot (on first use, so untouched categories cost nothing), and each
+assembled page is gzipped once and kept in a small LRU. A new snapshot gets
+a new CardFragments, which drops everything.
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+import gzip
+import threading
+
+PAGE_SIZE = 48
+PAGE_CACHE_SIZE = 512
+
+class CardFragments:
+    """Cards for one DealSnapshot, by category, best score first"""
+
+    def __init__(self, snapshot, template, page_size: int = PAGE_SIZE, cache_size: int = PAGE_CACHE_SIZE):
+        self.snapshot = snapshot
+        self.template = template
+        self.page_size = page_size
+        self.cache_size = cache_size
+        self.version = repr(snapshot.source_mtime)
+        self._cards: Dict[int, str] = {}
+        # Category -> [(ordinal, discount_pct, rating)], best score first
+        self._rankings: Dict[str, List[Tuple[int, float, float]]] = {}
+        self._pages: 'OrderedDict[tuple, Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def page(self, category: str, page: int = 0, min_discount: float = 0, min_rating: float = 0) -> Dict:
+        """One page of card HTML (plain and gzipped), with the filtered total"""
+        key = (category, page, min_discount, min_rating)
+        with self._lock:
+            cached = self._pages.get(key)
+            if cached is not None:
+                self._pages.move_to_end(key)
+                return cached
+
+        matches = [ordinal for ordinal, discount, rating in self._ranking(category)
+                   if discount >= min_discount and rating >= min_rating]
+        start = page * self.page_size
+        html = ''.join(self._card(ordinal) for ordinal in matches[start:start + self.page_size])
+        body = html.encode()
+
+        result = {
+            'html': body,
+            'gzip': gzip.compress(body, compresslevel=6),
+            'total': len(matches),
+            'pages': -(-len(matches) // self.page_size)
+        }
+        with self._lock:
+            self._pages[key] = result
+            if len(self._pages) > self.cache_size:
+                self._pages.popitem(last=False)
+        return result
+
+    def _ranking(self, category: str) -> List[Tuple[int, float, float]]:
+        ranking = self._rankings.get(category)
+        if ranking is None:
+            ordinals = self.snapshot.category_ordinals(category)
+            scored = []
+            for ordinal in ordinals:
+                deal = self.snapshot.deal(ordinal)
+                total = (deal.get('scores') or {}).get('total', 0)
+                scored.append((-total, ordinal, deal.get('discount_pct', 0), deal.get('rating', 0)))
+            scored.sort(key=lambda item: item[:2])
+            ranking = self._rankings[category] = [(ordinal, discount, rating)
+                                                  for _, ordinal, discount, rating in scored]
+        return ranking
+
+    def _card(self, ordinal: int) -> str:
+        card = self._cards.get(ordinal)
+        if card is None:
+            card = self._cards[ordinal] = self.template.render(deal=self.snapshot.deal(ordinal))
+        return card
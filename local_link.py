@@ -0,0 +1,158 @@
+"""
+The web app's channel to the local scraper service (LOCAL_WEBHOOK_URL)
+
+One keep-alive HTTP client is shared by every request in a worker, so calls
+over Tailscale reuse a connection instead of paying a new handshake each time.
+Reachability comes from a background heartbeat and is served from a short TTL
+cache: status checks never wait on the link. Signed posts (the scrape trigger,
+watchlist matches) are handed to a background task and report back through a
+callback, so a slow or dead link can't hold a web worker for its timeout.
+"""
+
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+import json
+import threading
+import time
+from scrapers.distributed import sign_payload
+
+HEARTBEAT_SECONDS = 15.0
+# A heartbeat result older than this is no longer trusted
+HEALTH_TTL_SECONDS = 45.0
+REQUEST_TIMEOUT_SECONDS = 5.0
+
+def _spawn_thread(target, *args):
+    threading.Thread(target=target, args=args, daemon=True).start()
+
+class LocalLink:
+    """Pooled client, cached health and background sends for the local service"""
+
+    def __init__(self, base_url: str, secret: str, heartbeat_seconds: float = HEARTBEAT_SECONDS,
+                 ttl_seconds: float = HEALTH_TTL_SECONDS, timeout: float = REQUEST_TIMEOUT_SECONDS,
+                 spawn: Callable = _spawn_thread, sleep: Callable[[float], None] = time.sleep,
+                 clock: Callable[[], float] = time.monotonic, client=None):
+        self.base_url = base_url.rstrip('/')
+        self.secret = secret
+        self.heartbeat_seconds = heartbeat_seconds
+        self.ttl_seconds = ttl_seconds
+        self.timeout = timeout
+        self.spawn = spawn
+        self.sleep = sleep
+        self.clock = clock
+        self._client = client
+        self._health: Optional[Dict] = None
+        self._checked = float('-inf')
+        self._checking = False
+        self._heartbeat_started = False
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        """The shared keep-alive client, created on first use"""
+        if self._client is None:
+            import httpx  # Deferred: only workers that talk to the local service pay for it
+
+            self._client = httpx.Client(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=4,
+                                    keepalive_expiry=2 * self.heartbeat_seconds)
+            )
+        return self._client
+
+    def url(self, path: str) -> str:
+        return path if path.startswith('http') else f'{self.base_url}{path}'
+
+    def start_heartbeat(self):
+        """Start the background heartbeat on first use (not at import)"""
+        with self._lock:
+            if self._heartbeat_started:
+                return
+            self._heartbeat_started = True
+            self._checking = True  # The heartbeat checks straight away
+        self.spawn(self._heartbeat)
+
+    def _heartbeat(self):
+        while True:
+            self.check()
+            self.sleep(self.heartbeat_seconds)
+
+    def check(self) -> Dict:
+        """Ask the local service for its status now, and cache the answer"""
+        started = self.clock()
+        try:
+            response = self.client.get(self.url('/webhook/status'))
+            if response.status_code == 200:
+                health = {'status': 'online', 'local_data': response.json()}
+            else:
+                health = {'status': 'error', 'message': f'Local machine returned {response.status_code}'}
+        except Exception as e:
+            health = {'status': 'offline', 'message': self._describe(e)}
+
+        health['latency_ms'] = round((self.clock() - started) * 1000, 1)
+        health['checked_at'] = datetime.now(timezone.utc).isoformat()
+        self._store(health)
+        return health
+
+    def health(self) -> Dict:
+        """Last heartbeat result with its age; 'unknown' if there's none within the TTL
+
+        Never blocks: a missing or stale result starts a check in the background.
+        """
+        self.start_heartbeat()
+        with self._lock:
+            health, age = self._health, self.clock() - self._checked
+            stale = health is None or age > self.ttl_seconds
+            start_check = stale and not self._checking
+            if start_check:
+                self._checking = True
+        if stale:
+            if start_check:
+                self.spawn(self.check)
+            return {'status': 'unknown', 'message': 'No recent heartbeat from the local machine',
+                    'last': health}
+        return {**health, 'age_seconds': round(age, 1)}
+
+    def post_signed(self, path: str, body: Dict,
+                    on_result: Optional[Callable[[Optional[Dict], Optional[str]], None]] = None):
+        """Sign and send `body` in the background; on_result(response JSON, error) when done"""
+        payload = json.dumps(body).encode()
+        self.spawn(self._send, path, payload, on_result)
+
+    def _send(self, path: str, payload: bytes, on_result):
+        result, error = None, None
+        try:
+            response = self.client.post(
+                self.url(path),
+                content=payload,
+                headers={
+                    'X-Webhook-Signature': sign_payload(payload, self.secret),
+                    'Content-Type': 'application/json'
+                }
+            )
+            if response.status_code >= 300:
+                error = f'Local machine returned {response.status_code}'
+            else:
+                result = response.json()
+        except Exception as e:
+            error = self._describe(e)
+            # A failed send is as good as a failed heartbeat for the link's health
+            if not path.startswith('http'):
+                self._store({'status': 'offline', 'message': error,
+                             'checked_at': datetime.now(timezone.utc).isoformat()})
+
+        if error:
+            print(f"[LOCAL LINK] {self.url(path)}: {error}")
+        if on_result:
+            on_result(result, error)
+
+    def _store(self, health: Dict):
+        with self._lock:
+            self._health = health
+            self._checked = self.clock()
+            self._checking = False
+
+    @staticmethod
+    def _describe(error: Exception) -> str:
+        if 'Timeout' in type(error).__name__:  # httpx.TimeoutException and subclasses
+            return 'Local machine unreachable (timeout)'
+        return str(error) or type(error).__name__
@@ -12,19 +12,26 @@ Setup:
 2. Set environment variables:
    - GITHUB_TOKEN=your_github_personal_access_token
    - WEBHOOK_SECRET=same_secret_as_in_render
+   - WEB_APP_URL=https://your-app.onrender.com (optional: live progress on the dashboard)
 3. Run: python local_scraper_service.py
+
+Distributed mode (several local machines, see scrapers/distributed.py):
+   SCRAPER_MODE=coordinator python local_scraper_service.py
+   python local_scraper_service.py --mode worker --coordinator http://<coordinator>:5002
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 import asyncio
 import json
 import os
-import hmac
-import hashlib
 from datetime import datetime
+import argparse
 import subprocess
 import threading
-from scrapers.orchestrator import ScrapingOrchestrator
+import metrics
+import profiling
+from progress import JobProgress, ProgressReporter
+from scrapers.distributed import CrawlCoordinator, verify_signature
 
 app = Flask(__name__)
 
@@ -33,15 +40,43 @@ WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', 'dev-secret-key-change-me')
 GITHUB_REPO = 'Biggles10-claude/blackfriday-deals'
 GITHUB_TOKEN = os.getenv('GITHUB_TOKEN', '')
 DATA_FILE = 'data/deals_cache.json'
+# single: scrape here; coordinator: hand work units to workers (see --mode worker)
+SCRAPER_MODE = os.getenv('SCRAPER_MODE', 'single')
+WORK_TIMEOUT_SECONDS = float(os.getenv('WORK_TIMEOUT_SECONDS', '1800'))
+# The web app to push live job status to (empty: don't report)
+WEB_APP_URL = os.getenv('WEB_APP_URL', '').rstrip('/')
+# Watchlist matches posted by the web app are appended here (one JSON object per line)
+WATCH_ALERTS_FILE = 'data/watch_alerts.jsonl'
+
+_coordinator = None
+_reporter = None
+_current_job = None
+
+def get_coordinator() -> CrawlCoordinator:
+    """The coordinator for distributed crawls, created on first use"""
+    global _coordinator
+    if _coordinator is None:
+        from scrapers.registry import discover_scrapers
+        _coordinator = CrawlCoordinator(lambda: [cls.create() for cls in discover_scrapers()])
+    return _coordinator
+
+def get_reporter():
+    """The status reporter for WEB_APP_URL, or None when not configured"""
+    global _reporter
+    if _reporter is None and WEB_APP_URL:
+        _reporter = ProgressReporter(f'{WEB_APP_URL}/api/scrape-status', WEBHOOK_SECRET)
+    return _reporter
 
 def verify_webhook_signature(payload: bytes, signature: str) -> bool:
     """Verify the webhook request is authentic"""
-    expected_signature = hmac.new(
-        WEBHOOK_SECRET.encode(),
-        payload,
-        hashlib.sha256
-    ).hexdigest()
-    return hmac.compare_digest(signature, expected_signature)
+    return verify_signature(payload, signature, WEBHOOK_SECRET)
+
+def read_signed_json():
+    """The request's JSON body if its signature is valid, else None"""
+    payload = request.get_data()
+    if not verify_webhook_signature(payload, request.headers.get('X-Webhook-Signature', '')):
+        return None
+    return json.loads(payload or b'{}')
 
 @app.route('/webhook/status', methods=['GET'])
 def status():
@@ -49,9 +84,17 @@ def status():
     return jsonify({
         'status': 'online',
         'service': 'local-scraper',
+        'mode': SCRAPER_MODE,
+        'coordinator': get_coordinator().status() if SCRAPER_MODE == 'coordinator' else None,
+        'job': _current_job.snapshot() if _current_job else None,
         'timestamp': datetime.now().isoformat()
     }), 200
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Scrape instrumentation in Prometheus text format"""
+    return Response(metrics.REGISTRY.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/webhook/trigger', methods=['POST'])
 def trigger_scrape():
     """Receive webhook trigger from Render and start scraping"""
@@ -66,12 +109,21 @@ def trigger_scrape():
             'message': 'Invalid webhook signature'
         }), 403
 
+    if SCRAPER_MODE == 'coordinator' and get_coordinator().active:
+        return jsonify({
+            'status': 'error',
+            'message': 'A distributed crawl is already running'
+        }), 409
+
+    # {"profile": true} in the signed body profiles this run (see profiling.py)
+    profile = bool(json.loads(payload or b'{}').get('profile'))
+
     print(f"\n{'='*60}")
-    print(f"[LOCAL SCRAPER] Webhook received at {datetime.now()}")
+    print(f"[LOCAL SCRAPER] Webhook received at {datetime.now()}{' (profiling)' if profile else ''}")
     print(f"{'='*60}\n")
 
     # Start scraping in background (don't block webhook response)
-    thread = threading.Thread(target=lambda: asyncio.run(run_scraping_workflow()))
+    thread = threading.Thread(target=lambda: asyncio.run(run_scraping_workflow(profile)))
     thread.daemon = True
     thread.start()
 
@@ -80,26 +132,132 @@ def trigger_scrape():
         'message': 'Scraping started on local machine'
     }), 202
 
-async def run_scraping_workflow():
+@app.route('/webhook/watch', methods=['POST'])
+def watch_alerts():
+    """Receive watchlist matches from the web app: print them and append them to a log"""
+    body = read_signed_json()
+    if body is None:
+        return jsonify({'status': 'error', 'message': 'Invalid webhook signature'}), 403
+
+    matches = body.get('matches', [])
+    os.makedirs(os.path.dirname(WATCH_ALERTS_FILE), exist_ok=True)
+    with open(WATCH_ALERTS_FILE, 'a') as f:
+        for match in matches:
+            print(f"[WATCHLIST] Rule {match['rule_id']}: {match.get('title')} now ${match['price']}")
+            f.write(json.dumps(match) + '\n')
+    return jsonify({'accepted': len(matches)})
+
+@app.route('/work/register', methods=['POST'])
+def register_worker():
+    """Worker announces itself to the coordinator"""
+    body = read_signed_json()
+    if body is None:
+        return jsonify({'status': 'error', 'message': 'Invalid webhook signature'}), 403
+    if SCRAPER_MODE != 'coordinator':
+        return jsonify({'status': 'error', 'message': 'Not running as coordinator'}), 409
+
+    print(f"[COORDINATOR] Worker {body['worker_id']} registered")
+    return jsonify(get_coordinator().register(body['worker_id'], {'remote_addr': request.remote_addr}))
+
+@app.route('/work/lease', methods=['POST'])
+def lease_work():
+    """Worker asks for work units"""
+    body = read_signed_json()
+    if body is None:
+        return jsonify({'status': 'error', 'message': 'Invalid webhook signature'}), 403
+    if SCRAPER_MODE != 'coordinator':
+        return jsonify({'status': 'error', 'message': 'Not running as coordinator'}), 409
+
+    return jsonify(get_coordinator().lease(body['worker_id'], min(int(body.get('max_units', 1)), 10)))
+
+@app.route('/work/complete', methods=['POST'])
+def complete_work():
+    """Worker posts the raw deals parsed from one work unit"""
+    body = read_signed_json()
+    if body is None:
+        return jsonify({'status': 'error', 'message': 'Invalid webhook signature'}), 403
+    if SCRAPER_MODE != 'coordinator':
+        return jsonify({'status': 'error', 'message': 'Not running as coordinator'}), 409
+
+    accepted = get_coordinator().complete(body['worker_id'], body['unit_id'],
+                                          body.get('cards_found', 0), body.get('raw_deals', []))
+    return jsonify({'accepted': accepted})
+
+@app.route('/work/fail', methods=['POST'])
+def fail_work():
+    """Worker gives a unit back after failing to fetch it"""
+    body = read_signed_json()
+    if body is None:
+        return jsonify({'status': 'error', 'message': 'Invalid webhook signature'}), 403
+    if SCRAPER_MODE != 'coordinator':
+        return jsonify({'status': 'error', 'message': 'Not running as coordinator'}), 409
+
+    print(f"[COORDINATOR] {body['worker_id']} failed {body['unit_id']}: {body.get('error', '')}")
+    get_coordinator().fail(body['worker_id'], body['unit_id'], body.get('error', ''))
+    return jsonify({'accepted': True})
+
+async def run_distributed_crawl(orchestrator, job: JobProgress) -> dict:
+    """Plan work units, wait for the workers, and merge their results"""
+    coordinator = get_coordinator()
+    metrics.REGISTRY.start_run()
+
+    units = coordinator.start_crawl()
+    print(f"[COORDINATOR] {units} work units queued for {len(coordinator.workers)} registered workers")
+
+    def report_queue(status):
+        finished = status['completed'] + status['failed'] + status['cancelled']
+        job.set_pages(finished, status['units'])
+
+    job.set_stage('scraping')
+    if not await coordinator.wait(WORK_TIMEOUT_SECONDS, on_poll=report_queue):
+        print(f"[COORDINATOR] ⚠️ Timed out, merging partial results: {coordinator.queue.status()}")
+
+    deals = coordinator.merge()
+    print(f"[COORDINATOR] ✅ Merged {len(deals)} deals: {coordinator.queue.status()}")
+    return orchestrator.build_result(deals)
+
+async def run_scraping_workflow(profile: bool = False):
     """Run the complete scraping workflow and push to GitHub"""
+    global _current_job
+    reporter = get_reporter()
+    job = JobProgress(datetime.now().strftime('%Y%m%d-%H%M%S'), on_change=reporter.report if reporter else None)
+    _current_job = job
+
     try:
         print("[LOCAL SCRAPER] Starting scraping workflow...")
+        job.set_stage('starting')
+        from scrapers.orchestrator import ScrapingOrchestrator
 
-        # 1. Run scraping
-        orchestrator = ScrapingOrchestrator()
-        result = await orchestrator.scrape_all()
+        # 1. Run scraping (here, or spread over the registered workers)
+        orchestrator = ScrapingOrchestrator(progress_callback=job.update)
+        if SCRAPER_MODE == 'coordinator':
+            if profile or profiling.enabled('scrape'):
+                async with profiling.ProfileSession('distributed-crawl'):
+                    result = await run_distributed_crawl(orchestrator, job)
+            else:
+                result = await run_distributed_crawl(orchestrator, job)
+        else:
+            budgets = [scraper.page_budget for scraper in orchestrator.scrapers]
+            job.set_pages(0, sum(budgets) if all(budgets) else None)
+            result = await orchestrator.scrape_all(profile=profile or None)
 
         print(f"[LOCAL SCRAPER] ✅ Scraped {len(result['deals'])} deals")
 
         # 2. Save to file
+        job.set_stage('saving', deals_total=len(result['deals']))
         os.makedirs('data', exist_ok=True)
-        with open(DATA_FILE, 'w') as f:
-            json.dump(result, f, indent=2)
+        with metrics.timed(metrics.CACHE_WRITE_SECONDS):
+            payload = json.dumps(result, indent=2)
+            with open(DATA_FILE, 'w') as f:
+                f.write(payload)
+        metrics.CACHE_WRITE_BYTES.observe(len(payload))
+        summary_file = metrics.REGISTRY.save_run_summary(DATA_FILE)
 
-        print(f"[LOCAL SCRAPER] ✅ Saved to {DATA_FILE}")
+        print(f"[LOCAL SCRAPER] ✅ Saved to {DATA_FILE} (metrics: {summary_file})")
 
         # 3. Commit and push to GitHub
         if GITHUB_TOKEN:
+            job.set_stage('publishing')
             commit_message = f"Update deals: {len(result['deals'])} deals at {datetime.now().strftime('%Y-%m-%d %H:%M')}"
 
             # Configure git
@@ -120,22 +278,49 @@ async def run_scraping_workflow():
         else:
             print(f"[LOCAL SCRAPER] ⚠️ No GITHUB_TOKEN - skipping git push")
 
+        # The web app watches /api/deals/version for this value
+        job.set_stage('complete', version=result['last_updated'])
+
         print(f"\n{'='*60}")
         print(f"[LOCAL SCRAPER] Workflow complete!")
         print(f"{'='*60}\n")
 
     except Exception as e:
         print(f"[LOCAL SCRAPER] ❌ Error: {str(e)}")
+        job.set_stage('failed', error=str(e))
         import traceback
         traceback.print_exc()
 
+def run_worker(coordinator_url: str, batch_size: int, exit_when_idle: bool):
+    """Worker mode: take work units from a coordinator instead of serving webhooks"""
+    from scrapers.distributed import ScrapeWorker
+
+    worker = ScrapeWorker(coordinator_url, WEBHOOK_SECRET, batch_size=batch_size)
+    asyncio.run(worker.run(exit_when_idle=exit_when_idle))
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local scraper service')
+    parser.add_argument('--mode', choices=['single', 'coordinator', 'worker'], default=SCRAPER_MODE)
+    parser.add_argument('--coordinator', default=os.getenv('COORDINATOR_URL', 'http://localhost:5002'),
+                        help='Coordinator URL (worker mode)')
+    parser.add_argument('--batch-size', type=int, default=1, help='Work units leased at a time (worker mode)')
+    parser.add_argument('--exit-when-idle', action='store_true',
+                        help='Exit once the coordinator has no crawl running (worker mode)')
+    args = parser.parse_args()
+
+    if args.mode == 'worker':
+        run_worker(args.coordinator, args.batch_size, args.exit_when_idle)
+        raise SystemExit(0)
+    SCRAPER_MODE = args.mode
+
     PORT = int(os.getenv('PORT', '5002'))
     print("\n" + "="*60)
     print("LOCAL SCRAPER SERVICE")
     print("="*60)
     print(f"Webhook secret configured: {'✅' if WEBHOOK_SECRET != 'dev-secret-key-change-me' else '⚠️ Using default'}")
     print(f"GitHub token configured: {'✅' if GITHUB_TOKEN else '❌ Not configured'}")
+    print(f"Progress reported to: {WEB_APP_URL or '❌ Not configured (set WEB_APP_URL)'}")
+    print(f"Mode: {SCRAPER_MODE}")
     print(f"Listening on: http://0.0.0.0:{PORT}")
     print("="*60 + "\n")
 
@@ -0,0 +1,235 @@
+"""
+Lightweight scrape instrumentation exposed in Prometheus text format
+
+Counters and histograms are kept in-process (no prometheus_client dependency)
+and shared by the scrapers, analyzer and both Flask services. Each service
+serves `REGISTRY.render_prometheus()` on /metrics, and a per-run summary is
+written next to the deals cache after every scrape.
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import bisect
+import json
+import os
+import threading
+import time
+
+# Buckets in seconds, tuned for HTTP fetches down to per-card parsing
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BYTES_BUCKETS = (1_000, 10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000)
+RATE_BUCKETS = (10, 50, 100, 250, 500, 1_000, 2_500, 5_000, 10_000)
+
+class Counter:
+    """Monotonic counter with optional label values"""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **label_values):
+        key = tuple(str(label_values.get(label, '')) for label in self.labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {','.join(key) or 'total': value for key, value in self.values.items()}
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = sorted(self.values.items())
+        for key, value in items:
+            lines.append(f'{self.name}{_format_labels(self.labels, key)} {_format_value(value)}')
+        return lines
+
+class Histogram:
+    """Cumulative histogram with fixed bucket upper bounds"""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {'count': self.count, 'sum': self.sum, 'counts': list(self.counts)}
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        snap = self.snapshot()
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, snap['counts']):
+            cumulative += bucket_count
+            lines.append(f'{self.name}_bucket{{le="{_format_value(bound)}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {snap["count"]}')
+        lines.append(f'{self.name}_sum {_format_value(snap["sum"])}')
+        lines.append(f'{self.name}_count {snap["count"]}')
+        return lines
+
+class MetricsRegistry:
+    """Holds all metrics and produces Prometheus output and run summaries"""
+
+    def __init__(self):
+        self.metrics: Dict[str, object] = {}
+        self._run_baseline: Optional[Dict] = None
+        self._run_started: Optional[float] = None
+
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Counter:
+        if name not in self.metrics:
+            self.metrics[name] = Counter(name, help_text, labels)
+        return self.metrics[name]
+
+    def histogram(self, name: str, help_text: str,
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        if name not in self.metrics:
+            self.metrics[name] = Histogram(name, help_text, buckets)
+        return self.metrics[name]
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for name in sorted(self.metrics):
+            lines.extend(self.metrics[name].render())
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> Dict:
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def start_run(self):
+        """Remember current values so run_summary() only covers this run"""
+        self._run_baseline = self.snapshot()
+        self._run_started = time.perf_counter()
+
+    def run_summary(self) -> Dict:
+        """Per-metric totals accumulated since start_run()"""
+        baseline = self._run_baseline or {}
+        summary = {}
+
+        for name, metric in self.metrics.items():
+            current = metric.snapshot()
+            before = baseline.get(name)
+
+            if isinstance(metric, Histogram):
+                counts = current['counts']
+                if before:
+                    counts = [now - then for now, then in zip(counts, before['counts'])]
+                count = current['count'] - (before['count'] if before else 0)
+                total = current['sum'] - (before['sum'] if before else 0)
+                if count == 0:
+                    continue
+                summary[name] = {
+                    'count': count,
+                    'sum': round(total, 6),
+                    'avg': round(total / count, 6),
+                    'p50': _bucket_quantile(metric.buckets, counts, 0.50),
+                    'p95': _bucket_quantile(metric.buckets, counts, 0.95),
+                    'p99': _bucket_quantile(metric.buckets, counts, 0.99)
+                }
+            else:
+                values = {key: value - (before or {}).get(key, 0) for key, value in current.items()}
+                values = {key: value for key, value in values.items() if value}
+                if values:
+                    summary[name] = values
+
+        if self._run_started is not None:
+            summary['run_seconds'] = round(time.perf_counter() - self._run_started, 3)
+
+        return summary
+
+    def save_run_summary(self, cache_file: str) -> str:
+        """Write the run summary next to the deals cache and return its path"""
+        path = os.path.join(os.path.dirname(cache_file) or '.', 'scrape_metrics.json')
+        summary = {
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+            'metrics': self.run_summary()
+        }
+        with open(path, 'w') as f:
+            json.dump(summary, f, indent=2)
+        return path
+
+class timed:
+    """Observe the wall time of a block in seconds
+
+    A plain class rather than @contextmanager: it wraps per-deal hot paths,
+    where generator-based context managers cost several times more.
+    """
+
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+def _bucket_quantile(buckets: Tuple[float, ...], counts: List[int], quantile: float) -> Optional[float]:
+    """Upper bound of the bucket containing the quantile (Prometheus-style estimate)
+
+    Returns None when the quantile falls in the +Inf bucket.
+    """
+    total = sum(counts)
+    target = quantile * total
+    cumulative = 0
+    for bound, bucket_count in zip(buckets, counts):
+        cumulative += bucket_count
+        if cumulative >= target:
+            return bound
+    return None
+
+def _format_labels(labels: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not labels:
+        return ''
+    pairs = ','.join(f'{label}="{value}"' for label, value in zip(labels, values))
+    return '{' + pairs + '}'
+
+def _format_value(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+REGISTRY = MetricsRegistry()
+
+# Fetch layer
+FETCH_SECONDS = REGISTRY.histogram('scrape_fetch_seconds', 'Page fetch latency in seconds')
+FETCH_BYTES = REGISTRY.histogram('scrape_fetch_bytes', 'Response body size in bytes', BYTES_BUCKETS)
+FETCH_RESPONSES = REGISTRY.counter('scrape_fetch_responses_total', 'Fetch outcomes by HTTP status', ('status',))
+FETCH_RETRIES = REGISTRY.counter('scrape_fetch_retries_total', 'Fetch retries after an error')
+FETCH_THROTTLE_SECONDS = REGISTRY.histogram('scrape_fetch_throttle_seconds', 'Time waiting for a per-host fetch slot')
+FETCH_BACKOFFS = REGISTRY.counter('scrape_fetch_backoffs_total', 'Times a host was slowed down after a throttling signal', ('host',))
+PAGE_VERDICTS = REGISTRY.counter('scrape_page_verdicts_total', 'Fetched pages by byte-level verdict (see scrapers/page_check.py)', ('host', 'verdict'))
+EGRESS_REQUESTS = REGISTRY.counter('scrape_egress_requests_total', 'Fetches by egress and outcome (status or error)', ('egress', 'outcome'))
+EGRESS_QUARANTINES = REGISTRY.counter('scrape_egress_quarantines_total', 'Times an egress was quarantined', ('egress',))
+
+# Parsing and standardisation
+PARSE_PAGE_SECONDS = REGISTRY.histogram('scrape_parse_page_seconds', 'Time to parse one results page')
+PARSE_CARDS_PER_SECOND = REGISTRY.histogram('scrape_parse_cards_per_second', 'Product cards parsed per second, per page', RATE_BUCKETS)
+PARSE_CARD_SECONDS = REGISTRY.histogram('scrape_parse_card_seconds', 'Time to parse one product card')
+PARSE_FAILURES = REGISTRY.counter('scrape_parse_failures_total', 'Product cards skipped, by reason', ('retailer', 'reason'))
+STANDARDIZE_SECONDS = REGISTRY.histogram('scrape_standardize_seconds', 'Time to standardise one page of deals')
+
+# Analysis and output
+SCORE_SECONDS = REGISTRY.histogram('analyzer_score_seconds', 'Time to score one deal')
+PRICE_FLAGS_SECONDS = REGISTRY.histogram('analyzer_price_flags_seconds', 'Time to recompute fake-discount flags for all products')
+ORGANIZE_SECONDS = REGISTRY.histogram('analyzer_organize_seconds', 'Time to group deals and compute category stats')
+CACHE_WRITE_SECONDS = REGISTRY.histogram('cache_write_seconds', 'Time to write the deals cache')
+CACHE_WRITE_BYTES = REGISTRY.histogram('cache_write_bytes', 'Size of the written deals cache', BYTES_BUCKETS + (5_000_000, 10_000_000, 50_000_000))
@@ -0,0 +1,358 @@
+"""
+Opt-in profiling for scrape runs and web requests
+
+Off by default; when off, the hooks cost one boolean check. Turned on with
+PROFILE (comma separated: 'scrape', 'web' or 'all'), per scrape with the
+signed trigger's {"profile": true}, or per web request with signed
+X-Profile-Timestamp / X-Profile-Signature headers (see profile_headers).
+
+A profiled run gets:
+
+- a sampling profiler: a real OS thread (even under gevent) that records the
+  profiled thread's stack every PROFILE_INTERVAL_MS
+- for async runs, an asyncio task tracer: per task, the time spent actually
+  running on the loop versus waiting, and any step long enough to stall it
+
+and writes to data/profiles/<time>-<name>/:
+
+    stacks.folded   collapsed stacks (flamegraph.pl, speedscope, inferno)
+    hot.txt         top functions by self and total samples
+    tasks.json      task timings and loop-blocking steps (async runs)
+    summary.json    wall time, sample count, interval
+
+Only the newest PROFILE_KEEP runs are kept.
+"""
+
+from collections import Counter
+from collections.abc import Coroutine
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+import asyncio
+import functools
+import json
+import os
+import shutil
+import sys
+import time
+import _thread
+
+PROFILES_DIR = 'data/profiles'
+PROFILE_MODES = {mode.strip() for mode in os.getenv('PROFILE', '').split(',') if mode.strip()}
+SAMPLE_INTERVAL_SECONDS = float(os.getenv('PROFILE_INTERVAL_MS', '5')) / 1000
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', '20'))
+TOP_FUNCTIONS = 40
+MAX_STACK_DEPTH = 128
+# A task step (one run between awaits) this long holds up everything else on the loop
+SLOW_STEP_SECONDS = 0.05
+# A signed profiling request is honoured for this long after its timestamp, so a leaked
+# signature can't be replayed indefinitely
+PROFILE_SIGNATURE_MAX_AGE_SECONDS = 300
+
+def enabled(kind: str) -> bool:
+    """Whether PROFILE turns on profiling for `kind` ('scrape' or 'web')"""
+    return kind in PROFILE_MODES or 'all' in PROFILE_MODES
+
+def _os_thread_api():
+    """(start_new_thread, sleep, get_ident) that bypass gevent's monkey-patching
+
+    The sampler must be a real thread so it runs while the profiled code holds
+    the CPU, and targets are OS thread ids (what sys._current_frames uses),
+    not greenlet ids.
+    """
+    if 'gevent' in sys.modules:
+        from gevent import monkey
+        if monkey.is_module_patched('threading'):
+            return (monkey.get_original('_thread', 'start_new_thread'),
+                    monkey.get_original('time', 'sleep'),
+                    monkey.get_original('_thread', 'get_ident'))
+    return _thread.start_new_thread, time.sleep, _thread.get_ident
+
+def _frame_label(code, labels: Dict) -> str:
+    label = labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        if filename.startswith(os.getcwd() + os.sep):
+            filename = os.path.relpath(filename)
+        else:
+            filename = os.path.join(*filename.split(os.sep)[-2:]) if os.sep in filename else filename
+        name = getattr(code, 'co_qualname', code.co_name)  # co_qualname is 3.11+
+        label = labels[code] = f'{name} ({filename}:{code.co_firstlineno})'
+    return label
+
+class SamplingProfiler:
+    """Counts the collapsed stacks of one thread, sampled from a background OS thread"""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL_SECONDS, thread_id: Optional[int] = None):
+        start_thread, self._sleep, get_ident = _os_thread_api()
+        self._start_thread = start_thread
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else get_ident()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._labels: Dict = {}
+        self._running = False
+        self._done = True
+
+    def start(self):
+        self._running = True
+        self._done = False
+        self._start_thread(self._run, ())
+
+    def stop(self):
+        self._running = False
+        # Wait (briefly) for the sampler to finish its last sample
+        deadline = time.perf_counter() + 10 * self.interval + 0.1
+        while not self._done and time.perf_counter() < deadline:
+            self._sleep(self.interval / 2)
+
+    def _run(self):
+        try:
+            while self._running:
+                self._sleep(self.interval)
+                frame = sys._current_frames().get(self.thread_id)
+                if frame is not None:
+                    self.stacks[self._collapse(frame)] += 1
+                    self.samples += 1
+                del frame
+        finally:
+            self._done = True
+
+    def _collapse(self, frame) -> str:
+        labels = []
+        while frame is not None and len(labels) < MAX_STACK_DEPTH:
+            labels.append(_frame_label(frame.f_code, self._labels))
+            frame = frame.f_back
+        return ';'.join(reversed(labels))
+
+    def folded(self) -> str:
+        """Collapsed-stack text: 'root;...;leaf count' per line"""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+    def hot_functions(self, limit: int = TOP_FUNCTIONS) -> List[Dict]:
+        """Functions by self samples (the leaf of the stack), with their total (anywhere in the stack)"""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            own[frames[-1]] += count
+            for label in set(frames):
+                total[label] += count
+        samples = self.samples or 1
+        return [{'function': label, 'self': count, 'self_pct': round(100 * count / samples, 1),
+                 'total': total[label], 'total_pct': round(100 * total[label] / samples, 1)}
+                for label, count in own.most_common(limit)]
+
+class TaskRecord:
+    """Timing for one asyncio task: time running on the loop and its longest step"""
+
+    __slots__ = ('name', 'created', 'finished', 'busy', 'steps', 'longest_step')
+
+    def __init__(self, name: str, created: float):
+        self.name = name
+        self.created = created
+        self.finished: Optional[float] = None
+        self.busy = 0.0
+        self.steps = 0
+        self.longest_step = 0.0
+
+class _TimedCoroutine(Coroutine):
+    """Wraps a task's coroutine to time each step (each run between two awaits)"""
+
+    def __init__(self, coro, record: TaskRecord, tracer: 'TaskTracer'):
+        self._coro = coro
+        self._record = record
+        self._tracer = tracer
+        self.__qualname__ = getattr(coro, '__qualname__', type(coro).__name__)
+        self.__name__ = getattr(coro, '__name__', self.__qualname__)
+
+    def _step(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        except BaseException:
+            self._record.finished = time.perf_counter()
+            raise
+        finally:
+            self._tracer.step(self._record, time.perf_counter() - start)
+
+    def send(self, value):
+        return self._step(self._coro.send, value)
+
+    def throw(self, *args):
+        return self._step(self._coro.throw, *args)
+
+    def close(self):
+        return self._coro.close()
+
+    def __await__(self):
+        return self
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self.send(None)
+
+class TaskTracer:
+    """Times every task created on a loop while installed (via the loop's task factory)"""
+
+    def __init__(self, slow_step: float = SLOW_STEP_SECONDS):
+        self.slow_step = slow_step
+        self.records: List[TaskRecord] = []
+        self.slow_steps: List[Dict] = []
+        self.started = time.perf_counter()
+        self._loop = None
+        self._previous_factory = None
+
+    def install(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._previous_factory = loop.get_task_factory()
+        loop.set_task_factory(self._task_factory)
+
+    def uninstall(self):
+        if self._loop is not None:
+            self._loop.set_task_factory(self._previous_factory)
+            self._loop = None
+
+    def _task_factory(self, loop, coro, **kwargs):
+        record = TaskRecord(getattr(coro, '__qualname__', type(coro).__name__), time.perf_counter())
+        self.records.append(record)
+        wrapped = _TimedCoroutine(coro, record, self)
+        if self._previous_factory is not None:
+            return self._previous_factory(loop, wrapped, **kwargs)
+        return asyncio.Task(wrapped, loop=loop, **kwargs)
+
+    def step(self, record: TaskRecord, seconds: float):
+        record.busy += seconds
+        record.steps += 1
+        record.longest_step = max(record.longest_step, seconds)
+        if seconds >= self.slow_step:
+            self.slow_steps.append({'task': record.name, 'seconds': round(seconds, 4),
+                                    'at': round(time.perf_counter() - self.started, 3)})
+
+    def report(self, limit: int = TOP_FUNCTIONS) -> Dict:
+        """Tasks grouped by coroutine, most loop time first, plus the steps that stalled the loop"""
+        now = time.perf_counter()
+        groups: Dict[str, Dict] = {}
+        for record in self.records:
+            group = groups.setdefault(record.name, {'task': record.name, 'count': 0, 'busy_seconds': 0.0,
+                                                    'wall_seconds': 0.0, 'steps': 0, 'longest_step': 0.0,
+                                                    'unfinished': 0})
+            group['count'] += 1
+            group['busy_seconds'] += record.busy
+            group['wall_seconds'] += (record.finished or now) - record.created
+            group['steps'] += record.steps
+            group['longest_step'] = max(group['longest_step'], record.longest_step)
+            group['unfinished'] += record.finished is None
+
+        tasks = sorted(groups.values(), key=lambda group: -group['busy_seconds'])[:limit]
+        for group in tasks:
+            for key in ('busy_seconds', 'wall_seconds', 'longest_step'):
+                group[key] = round(group[key], 4)
+        return {
+            'tasks_created': len(self.records),
+            'tasks': tasks,
+            'slow_steps': sorted(self.slow_steps, key=lambda step: -step['seconds'])[:limit]
+        }
+
+class ProfileSession:
+    """Profiles a block of code and saves the results; use `with` (or `async with` to trace tasks)"""
+
+    def __init__(self, name: str, directory: Optional[str] = None, interval: float = SAMPLE_INTERVAL_SECONDS):
+        self.name = name
+        self.directory = directory or PROFILES_DIR
+        self.profiler = SamplingProfiler(interval)
+        self.tracer: Optional[TaskTracer] = None
+        self.started_at = datetime.now(timezone.utc)
+        self.path: Optional[str] = None
+        self._start = 0.0
+
+    def __enter__(self) -> 'ProfileSession':
+        self._start = time.perf_counter()
+        self.profiler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.stop()
+        if self.tracer is not None:
+            self.tracer.uninstall()
+        try:
+            self.path = self.save(time.perf_counter() - self._start)
+            print(f"[PROFILE] {self.name}: {self.profiler.samples} samples saved to {self.path}")
+        except OSError as e:
+            print(f"[PROFILE] Could not save {self.name} profile: {e}")
+
+    async def __aenter__(self) -> 'ProfileSession':
+        self.tracer = TaskTracer()
+        self.tracer.install(asyncio.get_running_loop())
+        return self.__enter__()
+
+    async def __aexit__(self, *exc_info):
+        self.__exit__(*exc_info)
+
+    def save(self, wall_seconds: float) -> str:
+        stamp = self.started_at.strftime('%Y%m%d-%H%M%S-%f')
+        path = os.path.join(self.directory, f'{stamp}-{self.name}')
+        os.makedirs(path, exist_ok=True)
+
+        with open(os.path.join(path, 'stacks.folded'), 'w') as f:
+            f.write(self.profiler.folded())
+        with open(os.path.join(path, 'hot.txt'), 'w') as f:
+            f.write(f'{self.name}: {wall_seconds:.3f}s wall, {self.profiler.samples} samples '
+                    f'every {self.profiler.interval * 1000:g}ms\n\n')
+            f.write(f"{'self%':>7} {'total%':>7}  function\n")
+            for entry in self.profiler.hot_functions():
+                f.write(f"{entry['self_pct']:>7.1f} {entry['total_pct']:>7.1f}  {entry['function']}\n")
+        if self.tracer is not None:
+            with open(os.path.join(path, 'tasks.json'), 'w') as f:
+                json.dump(self.tracer.report(), f, indent=2)
+        with open(os.path.join(path, 'summary.json'), 'w') as f:
+            json.dump({
+                'name': self.name,
+                'started_at': self.started_at.isoformat(),
+                'wall_seconds': round(wall_seconds, 4),
+                'samples': self.profiler.samples,
+                'interval_seconds': self.profiler.interval
+            }, f, indent=2)
+
+        prune_profiles(self.directory)
+        return path
+
+def prune_profiles(directory: str = PROFILES_DIR, keep: int = PROFILE_KEEP):
+    """Delete all but the newest `keep` profile runs"""
+    runs = sorted(entry for entry in os.listdir(directory) if os.path.isdir(os.path.join(directory, entry)))
+    for old in runs[:-keep] if keep > 0 else runs:
+        shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+
+def profile_headers(path: str, secret: str, timestamp: Optional[float] = None) -> Dict[str, str]:
+    """Headers asking for a request to `path` to be profiled: the path and a timestamp, signed"""
+    from scrapers.distributed import sign_payload
+
+    stamp = str(int(time.time() if timestamp is None else timestamp))
+    return {'X-Profile-Timestamp': stamp,
+            'X-Profile-Signature': sign_payload(f'{path}\n{stamp}'.encode(), secret)}
+
+def _signed_for_profiling(path: str, headers, secret: str) -> bool:
+    """Whether the headers carry a fresh profile_headers() signature for `path`"""
+    from scrapers.distributed import verify_signature
+
+    signature = headers.get('X-Profile-Signature')
+    stamp = headers.get('X-Profile-Timestamp', '')
+    if not signature or not stamp.isdigit() or abs(time.time() - int(stamp)) > PROFILE_SIGNATURE_MAX_AGE_SECONDS:
+        return False
+    return verify_signature(f'{path}\n{stamp}'.encode(), signature, secret)
+
+def route_profiler(secret: str) -> Callable:
+    """Decorator for Flask views: profile the request if PROFILE has 'web' or it carries profile_headers()"""
+
+    def decorate(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            from flask import request
+
+            if not (enabled('web') or _signed_for_profiling(request.path, request.headers, secret)):
+                return view(*args, **kwargs)
+            with ProfileSession(f"web-{view.__name__}"):
+                return view(*args, **kwargs)
+        return wrapper
+    return decorate
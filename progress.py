@@ -0,0 +1,152 @@
+"""
+Live status of a local scrape job, pushed to the web app while it runs
+
+JobProgress folds the orchestrator's progress events (or the coordinator's
+queue counts) into one status document with pages done, deals found and an
+ETA. ProgressReporter posts the latest document to the web app's
+/api/scrape-status, signed like the webhooks, from a background thread: bursts
+are coalesced to one post per interval and scraping never waits on the network.
+"""
+
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+import json
+import threading
+import time
+from scrapers.distributed import sign_payload
+
+TERMINAL_STAGES = ('complete', 'failed')
+
+class JobProgress:
+    """Status of one scrape job: stage, page and deal counts, ETA"""
+
+    def __init__(self, job_id: str, on_change: Optional[Callable[[Dict], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.job_id = job_id
+        self.on_change = on_change
+        self.clock = clock
+        self.stage = 'starting'
+        self.pages_done = 0
+        self.pages_total: Optional[int] = None
+        self.retailers: Dict[str, Dict] = {}
+        self.details: Dict = {}
+        self.started = clock()
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self._lock = threading.Lock()
+
+    def update(self, event: Dict):
+        """Orchestrator progress_callback: one event per page, one per finished retailer"""
+        with self._lock:
+            retailer = self.retailers.setdefault(event.get('retailer', ''),
+                                                 {'pages': 0, 'deals_found': 0, 'status': 'running'})
+            if event.get('page'):
+                retailer['pages'] += 1
+                self.pages_done += 1
+            retailer['deals_found'] = event.get('deals_found', retailer['deals_found'])
+            retailer['status'] = event.get('status', retailer['status'])
+            if self.stage == 'starting':
+                self.stage = 'scraping'
+        self._changed()
+
+    def set_pages(self, done: int, total: Optional[int]):
+        """Page counts from elsewhere (the coordinator's work queue)"""
+        with self._lock:
+            self.pages_done, self.pages_total = done, total
+        self._changed()
+
+    def set_stage(self, stage: str, **details):
+        with self._lock:
+            self.stage = stage
+            self.details.update(details)
+        self._changed()
+
+    def eta_seconds(self) -> Optional[int]:
+        """Remaining time at the average page rate so far (pages_total is a budget, so an upper bound)"""
+        if self.stage != 'scraping' or not self.pages_total or not self.pages_done:
+            return None
+        per_page = (self.clock() - self.started) / self.pages_done
+        return round(per_page * max(self.pages_total - self.pages_done, 0))
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'job_id': self.job_id,
+                'stage': self.stage,
+                'pages_done': self.pages_done,
+                'pages_total': self.pages_total,
+                'deals_found': sum(retailer['deals_found'] for retailer in self.retailers.values()),
+                'eta_seconds': self.eta_seconds(),
+                'elapsed_seconds': round(self.clock() - self.started, 1),
+                'started_at': self.started_at,
+                'retailers': {name: dict(retailer) for name, retailer in self.retailers.items()},
+                **self.details
+            }
+
+    def _changed(self):
+        if self.on_change:
+            self.on_change(self.snapshot())
+
+class ProgressReporter:
+    """Posts the latest job status to the web app, at most once per interval"""
+
+    def __init__(self, url: str, secret: str, min_interval: float = 1.0,
+                 post: Optional[Callable[[Dict], None]] = None):
+        self.url = url
+        self.secret = secret
+        self.min_interval = min_interval
+        self.post = post or self._post
+        self._latest: Optional[Dict] = None
+        self._sending = False
+        self._last_sent = float('-inf')
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def report(self, status: Dict):
+        """Replace the pending status (only the latest is ever sent)"""
+        with self._condition:
+            self._latest = status
+            self._condition.notify_all()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until the pending status has been sent"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._latest is None and not self._sending, timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._latest is not None)
+                delay = self._last_sent + self.min_interval - time.monotonic()
+                # Terminal stages go out at once; anything else waits out the interval
+                if delay > 0 and self._latest['stage'] not in TERMINAL_STAGES:
+                    self._condition.wait(delay)
+                    continue
+                status, self._latest = self._latest, None
+                self._sending = True
+
+            try:
+                self.post(status)
+            except Exception as e:
+                print(f"[PROGRESS] Could not report status to {self.url}: {e}")
+
+            with self._condition:
+                self._sending = False
+                self._last_sent = time.monotonic()
+                self._condition.notify_all()
+
+    def _post(self, status: Dict):
+        import httpx
+
+        payload = json.dumps(status).encode()
+        httpx.post(
+            self.url,
+            content=payload,
+            headers={
+                'X-Webhook-Signature': sign_payload(payload, self.secret),
+                'Content-Type': 'application/json'
+            },
+            timeout=5.0
+        )
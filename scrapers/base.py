@@ -1,70 +1,203 @@
 from abc import ABC, abstractmethod
 from datetime import datetime, timezone
-from typing import List, Dict, Optional
-import hashlib
-import httpx
-from bs4 import BeautifulSoup
+from contextlib import nullcontext
+from typing import Callable, List, Dict, Optional
+import zlib
 import asyncio
 import time
+import metrics
+from scrapers.deal import Deal
+from scrapers.egress import EgressPool
+from scrapers.page_check import EMPTY_VERDICTS, PAGE_BLOCKED, PAGE_OK, RETRY_VERDICTS, PageClassifier
+
+# Statuses that mean the host is rate limiting us, not that the page is bad
+THROTTLE_STATUSES = frozenset({429, 503})
 
 class BaseScraper(ABC):
-    """Base class for all retailer scrapers"""
+    """Base class for all retailer scrapers
+
+    Subclasses declare their host limits as class attributes and register
+    with @register_scraper (scrapers/registry.py); the orchestrator passes
+    the limits to a shared FetchScheduler.
+    """
+
+    host: str = ''
+    max_concurrency: int = 1
+    requests_per_second: float = 1.0
+    page_budget: Optional[int] = None  # Pages per refresh (None = unlimited)
+    page_classifier: Optional[PageClassifier] = None  # Block/empty page markers, checked before parsing
+    supports_distributed: bool = False  # Implements search_url and parse_results_page (scrapers/distributed.py)
+
+    @classmethod
+    def create(cls) -> 'BaseScraper':
+        """Build the scraper the orchestrator runs (override to inject dependencies)"""
+        return cls()
 
     def __init__(self, retailer_name: str):
         self.retailer_name = retailer_name
-        self.deals: List[Dict] = []
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
+        self.deals: List[Deal] = []
+        self.headers: Dict[str, str] = {}  # Extra request headers; the browser identity comes from the egress
         self.retry_delays = [10, 30, 60]  # Exponential backoff
+        self.progress_callback: Optional[Callable] = None
+        self.scheduler = None  # FetchScheduler, set by the orchestrator
+        self.egress: Optional[EgressPool] = None  # Shared by the orchestrator; from the env otherwise
 
-    def standardize_deal(self, raw_deal: Dict) -> Dict:
+    def report_progress(self, **data):
+        """Pass in-flight progress (e.g. per page) to the progress callback, if any"""
+        if self.progress_callback:
+            self.progress_callback({'retailer': self.retailer_name, **data})
+
+    def standardize_deal(self, raw_deal: Dict) -> Deal:
         """Convert raw deal data to standardized format"""
-        # Calculate discount percentage
-        discount_pct = 0
-        if raw_deal.get('original_price') and raw_deal.get('price'):
-            discount_pct = round(
-                ((raw_deal['original_price'] - raw_deal['price']) / raw_deal['original_price']) * 100,
-                1
-            )
-
-        # Generate unique ID
-        product_id = hashlib.md5(
-            f"{self.retailer_name.lower()}-{raw_deal.get('url', '')}".encode()
-        ).hexdigest()[:12]
-
-        return {
-            'id': f"{self.retailer_name.lower().replace(' ', '')}-{product_id}",
-            'title': raw_deal.get('title', 'Unknown Product'),
-            'price': raw_deal.get('price', 0),
-            'original_price': raw_deal.get('original_price', raw_deal.get('price', 0)),
-            'discount_pct': discount_pct,
-            'url': raw_deal.get('url', ''),
-            'image': raw_deal.get('image', ''),
-            'rating': raw_deal.get('rating', 0),
-            'review_count': raw_deal.get('review_count', 0),
-            'category': raw_deal.get('category', 'Uncategorized'),
-            'retailer': self.retailer_name,
-            'scraped_at': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
-        }
+        return self.standardize_deals([raw_deal])[0]
+
+    def standardize_deals(self, raw_deals: List[Dict], scraped_at: Optional[str] = None) -> List[Deal]:
+        """Convert a page of raw deals to standardized format in one pass
+
+        The retailer prefix and timestamp are computed once per batch, and ids
+        come from the ASIN (or the URL when there is none) via a CRC32 hash.
+        """
+        with metrics.timed(metrics.STANDARDIZE_SECONDS):
+            retailer = self.retailer_name
+            key_prefix = f"{retailer.lower()}-"
+            id_prefix = f"{retailer.lower().replace(' ', '')}-"
+            if scraped_at is None:
+                scraped_at = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+            deals = []
+            for raw_deal in raw_deals:
+                price = raw_deal.get('price', 0)
+                original_price = raw_deal.get('original_price') or price
+
+                # Calculate discount percentage
+                discount_pct = 0
+                if original_price and price:
+                    discount_pct = round(((original_price - price) / original_price) * 100, 1)
+
+                url = raw_deal.get('url', '')
+                asin = raw_deal.get('asin', '')
+
+                deal = Deal(
+                    id=id_prefix + _stable_hash(key_prefix + (asin or url)),
+                    title=raw_deal.get('title', 'Unknown Product'),
+                    price=price,
+                    original_price=original_price,
+                    discount_pct=discount_pct,
+                    url=url,
+                    image=raw_deal.get('image', ''),
+                    rating=raw_deal.get('rating', 0),
+                    review_count=raw_deal.get('review_count', 0),
+                    category=raw_deal.get('category', 'Uncategorized'),
+                    retailer=retailer,
+                    scraped_at=scraped_at,
+                    asin=asin,
+                    raw_url=raw_deal.get('raw_url')
+                )
+                deals.append(deal)
+
+        return deals
+
+    def select_deals(self, raw_deals: List[Dict]) -> List[Deal]:
+        """Standardise a page of raw deals and keep the ones worth listing"""
+        return self.standardize_deals(raw_deals)
+
+    def search_url(self, search_term: str, page_num: int) -> str:
+        """Results page URL (implemented by scrapers with supports_distributed)"""
+        raise NotImplementedError(f'{type(self).__name__} does not support distributed crawling')
+
+    def parse_results_page(self, html: str, category_name: str, skip_asins=frozenset()):
+        """(cards found, raw deals) for one results page (implemented by scrapers with supports_distributed)"""
+        raise NotImplementedError(f'{type(self).__name__} does not support distributed crawling')
+
+    def classify_page(self, body: bytes) -> str:
+        """Byte-level verdict for a fetched page (PAGE_OK without a page_classifier)"""
+        if self.page_classifier is None:
+            return PAGE_OK
+        verdict = self.page_classifier.classify(body)
+        metrics.PAGE_VERDICTS.inc(host=self.host, verdict=verdict)
+        return verdict
 
     async def fetch_page(self, url: str, retry_count: int = 0) -> Optional[str]:
-        """Fetch page with retry logic and error handling"""
+        """Fetch page with retry logic and error handling
+
+        Returns the HTML, '' for a page with nothing to parse (no results, see
+        scrapers/page_check.py), or None if the page could not be fetched.
+        """
+        import httpx  # Deferred: only scraping processes pay for httpx
+
+        if retry_count == 0 and self.scheduler and not self.scheduler.charge_page(self.host):
+            metrics.FETCH_RESPONSES.inc(status='budget_exhausted')
+            print(f"[{self.retailer_name}] Page budget for {self.host} spent, skipping {url}")
+            return None
+
+        if self.egress is None:
+            self.egress = EgressPool.from_env()
+
+        # The slot is released before any retry sleep below
+        slot = self.scheduler.request(self.host) if self.scheduler else nullcontext()
+        start = None
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url, headers=self.headers)
+            async with slot:
+                start = time.perf_counter()
+                # Retries go through the pool again, so they leave a failing egress behind
+                egress = self.egress.choose()
+                response = await self.egress.send(egress, url, headers=self.headers)
+                metrics.FETCH_SECONDS.observe(time.perf_counter() - start)
+                metrics.FETCH_RESPONSES.inc(status=response.status_code)
+                metrics.FETCH_BYTES.observe(len(response.content))
+
+                # Judge the bytes before anyone parses them: a robot check is a 200 too
+                verdict = self.classify_page(response.content) if response.status_code == 200 else None
+                self.egress.record_response(egress, response, verdict if verdict in RETRY_VERDICTS else None)
                 response.raise_for_status()
-                return response.text
         except (httpx.HTTPError, httpx.TimeoutException) as e:
-            if retry_count < len(self.retry_delays):
-                delay = self.retry_delays[retry_count]
-                print(f"[{self.retailer_name}] Retry in {delay}s due to: {str(e)}")
-                await asyncio.sleep(delay)
-                return await self.fetch_page(url, retry_count + 1)
-            print(f"[{self.retailer_name}] Failed after {retry_count} retries: {str(e)}")
+            if not isinstance(e, httpx.HTTPStatusError) and start is not None:
+                metrics.FETCH_SECONDS.observe(time.perf_counter() - start)
+                metrics.FETCH_RESPONSES.inc(status=type(e).__name__)
+            throttled = isinstance(e, httpx.HTTPStatusError) and e.response.status_code in THROTTLE_STATUSES
+            return await self._retry(url, retry_count, str(e), throttled)
+
+        if verdict in RETRY_VERDICTS:
+            return await self._retry(url, retry_count, f'{verdict} page', throttled=verdict == PAGE_BLOCKED)
+        if verdict in EMPTY_VERDICTS:
+            print(f"[{self.retailer_name}] Nothing to parse ({verdict}) at {url}")
+            return ''
+
+        if self.scheduler:
+            self.scheduler.recover(self.host)
+        return response.text
+
+    async def _retry(self, url: str, retry_count: int, reason: str, throttled: bool = False) -> Optional[str]:
+        """Fetch again after the next retry delay, or give up once the delays are used
+
+        When the host is throttling us, the delay goes to the scheduler, which
+        slows every request to the host rather than just this one.
+        """
+        delay = self.retry_delays[min(retry_count, len(self.retry_delays) - 1)] if self.retry_delays else 0
+        if throttled and self.scheduler:
+            # Even when giving up on this page, the rest of the crawl should slow down
+            self.scheduler.back_off(self.host, delay)
+
+        if retry_count >= len(self.retry_delays):
+            print(f"[{self.retailer_name}] Failed after {retry_count} retries: {reason}")
             return None
 
+        metrics.FETCH_RETRIES.inc()
+        print(f"[{self.retailer_name}] Retry in {delay}s due to: {reason}")
+        if not (throttled and self.scheduler):
+            await asyncio.sleep(delay)
+        return await self.fetch_page(url, retry_count + 1)
+
     @abstractmethod
-    async def scrape(self) -> List[Dict]:
+    async def scrape(self) -> List[Deal]:
         """Scrape deals from retailer - must be implemented by subclasses"""
         pass
+
+def _stable_hash(key: str) -> str:
+    """12 hex digit id hash, stable across processes (unlike hash())
+
+    Two CRC32 passes (forward and reversed key) give 48 bits, enough to keep
+    collisions negligible at 100k+ deals while costing far less than MD5.
+    """
+    data = key.encode()
+    return f"{zlib.crc32(data):08x}{zlib.crc32(data[::-1]) & 0xffff:04x}"
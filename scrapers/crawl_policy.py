@@ -0,0 +1,98 @@
+from typing import Dict, List, Optional, Set
+import os
+import database
+
+# Maximum result pages fetched across all categories in one refresh
+DEFAULT_PAGE_BUDGET = int(os.getenv('CRAWL_PAGE_BUDGET', '60'))
+
+class AdaptiveCrawlPolicy:
+    """Decides how deep to paginate each category from its past deal yield
+
+    A page "yields" when it produces discounted deals that made it into the
+    results. Categories whose deeper pages kept yielding in previous crawls are
+    planned deeper, and any category stops as soon as a page comes back thin.
+    A global page budget caps the whole refresh, while reserving enough pages
+    for every category that has not been crawled yet.
+    """
+
+    def __init__(self, page_budget: int = DEFAULT_PAGE_BUDGET, min_pages: int = 1,
+                 max_pages: int = 8, min_yield: int = 3, history_runs: int = 5):
+        self.page_budget = page_budget
+        self.min_pages = min_pages
+        self.max_pages = max_pages
+        self.min_yield = min_yield
+        self.history_runs = history_runs
+
+        self.retailer = ''
+        self.default_pages = min_pages
+        self.pages_used = 0
+        self.planned: Dict[str, int] = {}
+        self.pending: Set[str] = set()
+
+    def start_run(self, retailer: str, categories: List[str], default_pages: int = 3):
+        """Reset the budget and plan page depth for each category"""
+        self.retailer = retailer
+        self.default_pages = default_pages
+        self.pages_used = 0
+        self.pending = set(categories)
+        self.planned = {category: self.plan_pages(category) for category in categories}
+
+    def plan_pages(self, category: str) -> int:
+        """Number of pages to aim for, based on yield history"""
+        yields = database.get_page_yields(self.retailer, category, self.history_runs)
+        if not yields:
+            return self._clamp(self.default_pages)
+
+        # Deepest page reached before the average yield drops off
+        depth = 0
+        for page in sorted(yields):
+            if page != depth + 1:
+                break
+            page_yields = yields[page]
+            if sum(page_yields) / len(page_yields) < self.min_yield:
+                break
+            depth = page
+
+        # The deepest page we have history for was still yielding: look one further
+        if depth == max(yields):
+            depth += 1
+
+        return self._clamp(depth)
+
+    def should_fetch(self, category: str, page_num: int,
+                     last_page_deals: Optional[int] = None) -> bool:
+        """Whether page `page_num` of `category` is worth fetching"""
+        if page_num > self.max_pages or self.pages_used >= self.page_budget:
+            return False
+
+        if page_num <= self.min_pages:
+            return True
+
+        # Leave the minimum for categories that have not been crawled yet
+        others = len(self.pending - {category})
+        if self.page_budget - self.pages_used <= others * self.min_pages:
+            return False
+
+        if last_page_deals is not None and last_page_deals < self.min_yield:
+            return False
+
+        if page_num <= self.planned.get(category, self.default_pages):
+            return True
+
+        # Beyond the plan, only keep going while pages are strongly yielding
+        return last_page_deals is not None and last_page_deals >= self.min_yield * 2
+
+    def record_page(self, category: str, page_num: int, cards_found: int,
+                    deals_found: int, fetched: bool = True):
+        """Charge a fetch against the budget and remember what it yielded"""
+        self.pages_used += 1
+        if fetched:
+            database.save_page_yield(self.retailer, category, page_num,
+                                     cards_found, deals_found)
+
+    def finish_category(self, category: str):
+        """Mark a category as done so its reserved pages are released"""
+        self.pending.discard(category)
+
+    def _clamp(self, pages: int) -> int:
+        return max(self.min_pages, min(pages, self.max_pages))
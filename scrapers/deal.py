@@ -0,0 +1,101 @@
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Optional
+
+class _RecordAccess:
+    """Dict-style access for slotted records, so dict consumers keep working"""
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__ and getattr(self, key) is not None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+@dataclass(slots=True)
+class DealScores(_RecordAccess):
+    """Value scores for one deal (each 0-100)"""
+
+    discount: float
+    quality: float
+    credibility: float
+    price_tier: float
+    legitimacy: float
+    total: float = 0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            'discount': self.discount,
+            'quality': self.quality,
+            'credibility': self.credibility,
+            'price_tier': self.price_tier,
+            'legitimacy': self.legitimacy,
+            'total': self.total
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'DealScores':
+        return cls(**{name: data.get(name, 0) for name in _SCORE_FIELDS})
+
+@dataclass(slots=True)
+class Deal(_RecordAccess):
+    """A standardized deal, from standardize_deals through scrape_all
+
+    Slotted so 100k-deal crawls don't pay for a dict per deal; converted to
+    plain dicts only at the JSON boundary (to_dict / from_dict).
+    """
+
+    id: str
+    title: str
+    price: float
+    original_price: float
+    discount_pct: float
+    url: str
+    image: str
+    rating: float
+    review_count: int
+    category: str
+    retailer: str
+    scraped_at: str
+    asin: str = ''
+    raw_url: Optional[str] = None
+    group_id: Optional[str] = None  # Cross-retailer product group (ProductMatcher)
+    scores: Optional[DealScores] = None
+
+    def to_dict(self) -> Dict:
+        """JSON-ready dict in the deals cache format"""
+        data = {name: getattr(self, name) for name in _REQUIRED_FIELDS}
+        data['asin'] = self.asin
+        if self.raw_url is not None:
+            data['raw_url'] = self.raw_url
+        if self.group_id is not None:
+            data['group_id'] = self.group_id
+        if self.scores is not None:
+            data['scores'] = self.scores.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Deal':
+        """Build a Deal from a cached deal dict (unknown keys are ignored)"""
+        deal = cls(**{name: data[name] for name in _REQUIRED_FIELDS})
+        deal.asin = data.get('asin', '')
+        deal.raw_url = data.get('raw_url')
+        deal.group_id = data.get('group_id')
+        if data.get('scores'):
+            deal.scores = DealScores.from_dict(data['scores'])
+        return deal
+
+_SCORE_FIELDS = tuple(f.name for f in fields(DealScores))
+_REQUIRED_FIELDS = tuple(f.name for f in fields(Deal) if f.name not in ('asin', 'raw_url', 'group_id', 'scores'))
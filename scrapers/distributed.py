@@ -0,0 +1,452 @@
+"""
+Coordinator / worker crawling across several local machines
+
+The coordinator splits a refresh into (retailer, category, page) work units
+and leases them to workers that poll it over HMAC-signed HTTP (the same
+WEBHOOK_SECRET signing as the Render -> local webhook). Workers fetch and
+parse their pages and post back raw deals; the coordinator merges them in
+plan order into one snapshot, exactly as a single-machine crawl would.
+
+A lease expires if its worker goes quiet, and the unit goes back on the
+queue for another worker. Thin pages cancel the deeper pages still queued
+for that category, mirroring the single-machine early stop.
+"""
+
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from scrapers.parse_errors import PARSE_ERRORS
+
+DEFAULT_LEASE_SECONDS = float(os.getenv('WORK_LEASE_SECONDS', '180'))
+MAX_UNIT_ATTEMPTS = 3
+# Longest a worker waits between attempts to reach a coordinator that is down
+MAX_RECONNECT_SECONDS = 60.0
+
+def sign_payload(payload: bytes, secret: str) -> str:
+    """HMAC-SHA256 signature for the X-Webhook-Signature header"""
+    return hmac.new(secret.encode(), payload, hashlib.sha256).hexdigest()
+
+def verify_signature(payload: bytes, signature: str, secret: str) -> bool:
+    return bool(signature) and hmac.compare_digest(signature, sign_payload(payload, secret))
+
+class WorkQueue:
+    """Leases work units to workers and collects their results for one crawl"""
+
+    def __init__(self, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = MAX_UNIT_ATTEMPTS, clock: Callable[[], float] = time.monotonic):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self.units: Dict[str, Dict] = {}
+        self.order: List[str] = []                 # Plan order, used when merging
+        self.pending = deque()
+        self.leases: Dict[str, Tuple[str, float]] = {}  # Unit id -> (worker id, expiry)
+        self.results: Dict[str, Dict] = {}
+        self.failed: Dict[str, str] = {}
+        self.cancelled = set()
+        self._lock = threading.Lock()
+
+    def add(self, unit: Dict):
+        with self._lock:
+            self.units[unit['id']] = dict(unit, attempts=0)
+            self.order.append(unit['id'])
+            self.pending.append(unit['id'])
+
+    @property
+    def done(self) -> bool:
+        with self._lock:
+            self._expire_leases()
+            return not self.pending and not self.leases
+
+    def lease(self, worker_id: str, max_units: int = 1) -> List[Dict]:
+        """Hand out up to max_units pending units (expired leases are requeued first)"""
+        with self._lock:
+            self._expire_leases()
+            leased = []
+            expires_at = self.clock() + self.lease_seconds
+            while self.pending and len(leased) < max_units:
+                unit_id = self.pending.popleft()
+                if unit_id in self.cancelled or unit_id in self.results:
+                    continue
+                unit = self.units[unit_id]
+                unit['attempts'] += 1
+                self.leases[unit_id] = (worker_id, expires_at)
+                leased.append({key: value for key, value in unit.items() if key != 'attempts'})
+            return leased
+
+    def complete(self, worker_id: str, unit_id: str, cards_found: int, raw_deals: List[Dict]) -> bool:
+        """Store a unit's result; the first result wins, even from an expired lease"""
+        with self._lock:
+            if unit_id not in self.units or unit_id in self.results:
+                return False
+            self.leases.pop(unit_id, None)
+            self.failed.pop(unit_id, None)
+            self.results[unit_id] = {'worker': worker_id, 'cards_found': cards_found, 'raw_deals': raw_deals}
+            return True
+
+    def fail(self, worker_id: str, unit_id: str, error: str = ''):
+        """Requeue a unit a worker could not fetch, until it runs out of attempts"""
+        with self._lock:
+            holder = self.leases.get(unit_id)
+            if holder is None or holder[0] != worker_id:
+                return
+            del self.leases[unit_id]
+            self.pending.extendleft(self._retry_or_fail(unit_id, error or f'failed on {worker_id}'))
+
+    def prioritize(self, key: Callable[[Dict], object]):
+        """Reorder the pending queue (the merge keeps plan order regardless)"""
+        with self._lock:
+            self.pending = deque(sorted(self.pending, key=lambda unit_id: key(self.units[unit_id])))
+
+    def cancel(self, predicate: Callable[[Dict], bool]) -> int:
+        """Drop pending units matching predicate (leased ones are left to finish)"""
+        with self._lock:
+            dropped = [unit_id for unit_id in self.pending if predicate(self.units[unit_id])]
+            self.cancelled.update(dropped)
+            self.pending = deque(unit_id for unit_id in self.pending if unit_id not in self.cancelled)
+            return len(dropped)
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {
+                'units': len(self.units),
+                'pending': len(self.pending),
+                'leased': len(self.leases),
+                'completed': len(self.results),
+                'failed': len(self.failed),
+                'cancelled': len(self.cancelled)
+            }
+
+    def _expire_leases(self):
+        now = self.clock()
+        retry = []
+        for unit_id, (worker_id, expires_at) in list(self.leases.items()):
+            if expires_at <= now:
+                print(f"[coordinator] Lease on {unit_id} held by {worker_id} expired")
+                del self.leases[unit_id]
+                retry.extend(self._retry_or_fail(unit_id, f'lease expired on {worker_id}'))
+        # Front of the queue (in their original order): abandoned units hold up the crawl
+        self.pending.extendleft(reversed(retry))
+
+    def _retry_or_fail(self, unit_id: str, error: str) -> List[str]:
+        """[unit_id] if it should be retried, else [] after marking it failed"""
+        if self.units[unit_id]['attempts'] >= self.max_attempts:
+            self.failed[unit_id] = error
+            return []
+        return [unit_id]
+
+class CrawlCoordinator:
+    """Plans distributed crawls, tracks workers and merges their results"""
+
+    def __init__(self, scraper_factory: Callable[[], List], pages_per_category: int = 3,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.scraper_factory = scraper_factory
+        self.pages_per_category = pages_per_category
+        self.lease_seconds = lease_seconds
+        self.clock = clock
+        self.workers: Dict[str, Dict] = {}
+        self.queue: Optional[WorkQueue] = None
+        self.crawl_id: Optional[str] = None  # Sent with every lease, so workers can tell crawls apart
+        self.scrapers: Dict[str, object] = {}
+
+    @property
+    def active(self) -> bool:
+        return self.queue is not None and not self.queue.done
+
+    def register(self, worker_id: str, info: Optional[Dict] = None) -> Dict:
+        self.workers[worker_id] = dict(info or {}, last_seen=self.clock(), completed=0)
+        return {'worker_id': worker_id, 'lease_seconds': self.lease_seconds}
+
+    def start_crawl(self) -> int:
+        """Plan work units for every scraper that supports distributed crawling"""
+        queue = WorkQueue(self.lease_seconds, clock=self.clock)
+        self.crawl_id = uuid.uuid4().hex[:12]
+        self.scrapers = {}
+
+        for scraper in self.scraper_factory():
+            if not scraper.supports_distributed:
+                print(f"[coordinator] {scraper.retailer_name} does not support distributed crawling, skipping")
+                continue
+            categories = getattr(scraper, 'deals_categories', None)
+            if not categories:
+                print(f"[coordinator] {scraper.retailer_name} has no categories to distribute, skipping")
+                continue
+            self.scrapers[scraper.retailer_name] = scraper
+            policy = getattr(scraper, 'crawl_policy', None)
+            if policy:
+                policy.start_run(scraper.retailer_name, [name for _, name in categories],
+                                 default_pages=self.pages_per_category)
+
+            units = []
+            for search_term, category_name in categories:
+                pages = policy.planned[category_name] if policy else self.pages_per_category
+                for page_num in range(1, pages + 1):
+                    units.append({
+                        'id': f'{scraper.retailer_name}|{category_name}|{page_num}',
+                        'scraper': type(scraper).__name__,
+                        'retailer': scraper.retailer_name,
+                        'category': category_name,
+                        'page': page_num,
+                        'url': scraper.search_url(search_term, page_num)
+                    })
+
+            # Over budget: drop the deepest pages first
+            if scraper.page_budget is not None and len(units) > scraper.page_budget:
+                kept = sorted(units, key=lambda unit: unit['page'])[:scraper.page_budget]
+                units = [unit for unit in units if unit in kept]
+            for unit in units:
+                queue.add(unit)
+
+        # Breadth-first: page 1 of every category before any page 2, so thin
+        # categories are cut short before their deeper pages are handed out
+        queue.prioritize(lambda unit: unit['page'])
+        self.queue = queue
+        return len(queue.units)
+
+    def lease(self, worker_id: str, max_units: int = 1) -> Dict:
+        self._touch(worker_id)
+        units = self.queue.lease(worker_id, max_units) if self.queue else []
+        return {'units': units, 'active': self.active, 'crawl': self.crawl_id}
+
+    def complete(self, worker_id: str, unit_id: str, cards_found: int, raw_deals: List[Dict]) -> bool:
+        worker = self._touch(worker_id)
+        if not self.queue or not self.queue.complete(worker_id, unit_id, cards_found, raw_deals):
+            return False
+        worker['completed'] += 1
+
+        unit = self.queue.units[unit_id]
+        scraper = self.scrapers.get(unit['retailer'])
+        policy = getattr(scraper, 'crawl_policy', None)
+        min_yield = policy.min_yield if policy else 1
+        if scraper and len(scraper.select_deals(raw_deals)) < min_yield:
+            cancelled = self.queue.cancel(lambda other: other['retailer'] == unit['retailer']
+                                          and other['category'] == unit['category']
+                                          and other['page'] > unit['page'])
+            if cancelled:
+                print(f"[coordinator] {unit['category']} page {unit['page']} was thin, "
+                      f"cancelled {cancelled} deeper pages")
+        return True
+
+    def fail(self, worker_id: str, unit_id: str, error: str = ''):
+        self._touch(worker_id)
+        if self.queue:
+            self.queue.fail(worker_id, unit_id, error)
+
+    def status(self) -> Dict:
+        now = self.clock()
+        return {
+            'active': self.active,
+            'queue': self.queue.status() if self.queue else None,
+            'workers': {
+                worker_id: {'completed': worker['completed'], 'idle_seconds': round(now - worker['last_seen'], 1)}
+                for worker_id, worker in self.workers.items()
+            }
+        }
+
+    async def wait(self, timeout: float, poll_seconds: float = 1.0,
+                   on_poll: Optional[Callable[[Dict], None]] = None) -> bool:
+        """Wait until every unit has a result, failed or was cancelled"""
+        deadline = self.clock() + timeout
+        while not self.queue.done:
+            if on_poll:
+                on_poll(self.queue.status())
+            if self.clock() >= deadline:
+                return False
+            await asyncio.sleep(poll_seconds)
+        return True
+
+    def merge(self) -> List:
+        """Standardised deals from all results, in plan order, deduplicated by ASIN"""
+        queue = self.queue
+        all_deals = []
+        seen: Dict[str, set] = {}
+
+        for unit_id in queue.order:
+            result = queue.results.get(unit_id)
+            if result is None:
+                continue
+            unit = queue.units[unit_id]
+            scraper = self.scrapers[unit['retailer']]
+            seen_asins = seen.setdefault(unit['retailer'], set())
+
+            raw_deals = [raw for raw in result['raw_deals'] if raw.get('asin') not in seen_asins]
+            page_deals = scraper.select_deals(raw_deals)
+            for deal in page_deals:
+                seen_asins.add(deal.asin)
+            all_deals.extend(page_deals)
+
+            policy = getattr(scraper, 'crawl_policy', None)
+            if policy:
+                # Yield history feeds the next crawl's plan, as in a local crawl
+                policy.record_page(unit['category'], unit['page'], result['cards_found'], len(page_deals))
+
+        for scraper in self.scrapers.values():
+            policy = getattr(scraper, 'crawl_policy', None)
+            if policy:
+                for _, category_name in scraper.deals_categories:
+                    policy.finish_category(category_name)
+
+        return all_deals
+
+    def _touch(self, worker_id: str) -> Dict:
+        worker = self.workers.get(worker_id)
+        if worker is None:
+            worker = self.workers[worker_id] = {'last_seen': 0, 'completed': 0}
+        worker['last_seen'] = self.clock()
+        return worker
+
+class ScrapeWorker:
+    """Polls a coordinator for work units, fetches and parses them, posts raw deals back"""
+
+    def __init__(self, coordinator_url: str, secret: str, worker_id: Optional[str] = None,
+                 batch_size: int = 1, idle_seconds: float = 2.0):
+        self.coordinator_url = coordinator_url.rstrip('/')
+        self.secret = secret
+        self.worker_id = worker_id or f'{socket.gethostname()}-{uuid.uuid4().hex[:6]}'
+        self.batch_size = batch_size
+        self.idle_seconds = idle_seconds
+        self.scrapers: Dict[str, object] = {}
+        self.completed = 0
+        self.crawl_id: Optional[str] = None
+        self.scheduler = None
+        self.egress = None
+
+    async def run(self, exit_when_idle: bool = False):
+        """Work until stopped (or, with exit_when_idle, until no crawl is active)"""
+        import httpx
+        from scrapers.registry import discover_scrapers
+        from scrapers.egress import EgressPool
+        from scrapers.scheduler import FetchScheduler
+
+        # Each worker has its own IP, so it enforces host rate limits on its own. Page
+        # budgets are left to the coordinator, which plans no more units than they allow
+        self.scheduler = scheduler = FetchScheduler()
+        self.egress = egress = EgressPool.from_env()
+        for scraper_class in discover_scrapers():
+            if not scraper_class.supports_distributed:
+                continue
+            scraper = scraper_class.create()
+            scraper.scheduler = scheduler
+            scraper.egress = egress
+            scheduler.configure(scraper.host, scraper.max_concurrency, scraper.requests_per_second)
+            self.scrapers[scraper_class.__name__] = scraper
+
+        try:
+            async with httpx.AsyncClient(timeout=30.0) as client:
+                registered = False
+                reconnect_delay = self.idle_seconds
+                while True:
+                    # A coordinator restart or outage is waited out (leases cover our units meanwhile)
+                    try:
+                        if not registered:
+                            await self._post(client, '/work/register', {'worker_id': self.worker_id})
+                            registered = True
+                            print(f"[worker {self.worker_id}] Registered with {self.coordinator_url}")
+                        response = await self._post(client, '/work/lease',
+                                                    {'worker_id': self.worker_id, 'max_units': self.batch_size})
+                    except (httpx.HTTPError, ValueError) as e:
+                        print(f"[worker {self.worker_id}] Coordinator unavailable ({type(e).__name__}: {e}), "
+                              f"retrying in {reconnect_delay:.1f}s")
+                        registered = False
+                        await asyncio.sleep(reconnect_delay)
+                        reconnect_delay = min(reconnect_delay * 2, MAX_RECONNECT_SECONDS)
+                        continue
+                    reconnect_delay = self.idle_seconds
+
+                    units = response.get('units', [])
+                    if units and response.get('crawl') != self.crawl_id:
+                        await self.start_crawl(response.get('crawl'))
+                    if not units:
+                        if exit_when_idle and not response.get('active'):
+                            print(f"[worker {self.worker_id}] No active crawl, exiting after {self.completed} units")
+                            self.finish_crawl()
+                            return
+                        await asyncio.sleep(self.idle_seconds)
+                        continue
+
+                    await asyncio.gather(*(self.process(client, unit) for unit in units))
+        finally:
+            await egress.close()
+
+    async def start_crawl(self, crawl_id: Optional[str]):
+        """Reset per-crawl state (pacing, backoff, egress clients, parse errors) when the coordinator starts a new crawl"""
+        if self.crawl_id is not None:
+            self.finish_crawl()
+        self.crawl_id = crawl_id
+        PARSE_ERRORS.start_run()
+        self.scheduler.start_run()
+        await self.egress.close()
+        self.egress.start_run()
+
+    def finish_crawl(self):
+        """Report and save the parse errors of the crawl just served"""
+        PARSE_ERRORS.print_summary()
+        try:
+            PARSE_ERRORS.save()
+        except OSError as e:
+            print(f"[worker {self.worker_id}] Could not save parse error exemplars: {e}")
+
+    async def process(self, client, unit: Dict):
+        """Fetch and parse one unit, then report the result (or the failure)"""
+        scraper = self.scrapers.get(unit['scraper'])
+        if scraper is None:
+            await self._report(client, '/work/fail', {
+                'worker_id': self.worker_id, 'unit_id': unit['id'],
+                'error': f"unknown scraper {unit['scraper']}"
+            })
+            return
+
+        html = await scraper.fetch_page(unit['url'])
+        if html is None:
+            await self._report(client, '/work/fail', {
+                'worker_id': self.worker_id, 'unit_id': unit['id'], 'error': 'fetch failed'
+            })
+            return
+
+        # '' is a page the byte-level check found nothing on (see scrapers/page_check.py)
+        cards_found, raw_deals = scraper.parse_results_page(html, unit['category']) if html else (0, [])
+        reported = await self._report(client, '/work/complete', {
+            'worker_id': self.worker_id,
+            'unit_id': unit['id'],
+            'cards_found': cards_found,
+            'raw_deals': raw_deals
+        })
+        if reported:
+            self.completed += 1
+            print(f"[worker {self.worker_id}] {unit['id']}: {len(raw_deals)} raw deals")
+
+    async def _report(self, client, path: str, body: Dict) -> bool:
+        """Post one unit's outcome; a failure is logged, not raised, so the batch's other units carry on
+
+        An unreported unit's lease expires and the coordinator hands it out again.
+        """
+        import httpx
+
+        try:
+            await self._post(client, path, body)
+            return True
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"[worker {self.worker_id}] Could not report {body['unit_id']} to {path}: "
+                  f"{type(e).__name__}: {e}")
+            return False
+
+    async def _post(self, client, path: str, body: Dict) -> Dict:
+        payload = json.dumps(body).encode()
+        response = await client.post(
+            f'{self.coordinator_url}{path}',
+            content=payload,
+            headers={
+                'X-Webhook-Signature': sign_payload(payload, self.secret),
+                'Content-Type': 'application/json'
+            }
+        )
+        response.raise_for_status()
+        return response.json()
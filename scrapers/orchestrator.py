@@ -1,24 +1,43 @@
 import asyncio
-from typing import List, Dict, Callable
-from scrapers.amazon_au import AmazonAUScraper
+from typing import List, Dict, Callable, Optional
+from scrapers.deal import Deal
+from scrapers.parse_errors import PARSE_ERRORS
+from scrapers.registry import discover_scrapers
+from scrapers.egress import EgressPool
+from scrapers.scheduler import FetchScheduler
 from analyzer.scorer import DealScorer
 from analyzer.categories import CategoryOrganizer
+from analyzer.matching import ProductMatcher
+from analyzer.ranking import TopDeals
 import json
+import metrics
+import database
+import profiling
 from datetime import datetime, timezone
 
 class ScrapingOrchestrator:
     """Orchestrates parallel scraping from all retailers"""
 
     def __init__(self, progress_callback: Callable = None):
-        self.scrapers = [
-            AmazonAUScraper(),
-            # Add more scrapers here: JBHiFiScraper(), etc.
-        ]
+        # Every @register_scraper class in scrapers/ (or a plugin entry point)
+        self.scrapers = [scraper_class.create() for scraper_class in discover_scrapers()]
+
+        # One scheduler for all scrapers, so hosts' limits hold across retailers
+        self.scheduler = FetchScheduler()
+        # ...and one egress pool, so a throttled exit is routed around by every retailer
+        self.egress = EgressPool.from_env()
+        for scraper in self.scrapers:
+            self.scheduler.configure(scraper.host, scraper.max_concurrency,
+                                     scraper.requests_per_second, scraper.page_budget)
+            scraper.scheduler = self.scheduler
+            scraper.egress = self.egress
+            scraper.progress_callback = progress_callback
+
         self.scorer = DealScorer()
         self.category_organizer = CategoryOrganizer()
         self.progress_callback = progress_callback
 
-    async def scrape_retailer(self, scraper) -> List[Dict]:
+    async def scrape_retailer(self, scraper) -> List[Deal]:
         """Scrape a single retailer and emit progress"""
         try:
             deals = await scraper.scrape()
@@ -44,24 +63,83 @@ class ScrapingOrchestrator:
 
             return []
 
-    async def scrape_all(self) -> Dict:
-        """Scrape all retailers in parallel"""
-        print("Starting parallel scraping...")
+    async def scrape_all(self, profile: Optional[bool] = None) -> Dict:
+        """Scrape all retailers in parallel
 
-        # Scrape all retailers concurrently
-        tasks = [self.scrape_retailer(scraper) for scraper in self.scrapers]
-        results = await asyncio.gather(*tasks)
+        Profiled (see profiling.py) when profile is True, or when it is None and PROFILE includes 'scrape'.
+        """
+        if profile or (profile is None and profiling.enabled('scrape')):
+            async with profiling.ProfileSession('scrape'):
+                return await self._scrape_all()
+        return await self._scrape_all()
 
-        # Flatten all deals
+    async def _scrape_all(self) -> Dict:
+        print("Starting parallel scraping...")
+        metrics.REGISTRY.start_run()
+        self.scheduler.start_run()
+        self.egress.start_run()
+        PARSE_ERRORS.start_run()
+
+        # Scrape all retailers concurrently, matching listings as each retailer finishes
+        matcher = ProductMatcher()
         all_deals = []
-        for deals in results:
-            all_deals.extend(deals)
+        tasks = [self.scrape_retailer(scraper) for scraper in self.scrapers]
+        try:
+            for task in asyncio.as_completed(tasks):
+                deals = await task
+                matcher.add_many(deals)
+                all_deals.extend(deals)
+        finally:
+            await self.egress.close()
 
         print(f"Total deals scraped: {len(all_deals)}")
+        for egress in self.egress.status():
+            print(f"[egress] {egress['name']}: {egress['requests']} requests, "
+                  f"{egress['success_rate']:.0%} ok, latency {egress['latency_seconds']}s")
+        PARSE_ERRORS.print_summary()
+        try:
+            PARSE_ERRORS.save()
+        except OSError as e:
+            print(f"Could not save parse error exemplars: {e}")
+        return self.build_result(all_deals, matcher)
+
+    def build_result(self, all_deals: List[Deal], matcher: Optional[ProductMatcher] = None) -> Dict:
+        """Match, score, record and organise scraped deals into the cache format"""
+        if matcher is None:
+            matcher = ProductMatcher()
+            matcher.add_many(all_deals)
 
-        # Score all deals
+        # Link listings of the same product across retailers
+        product_groups = matcher.groups()
+        group_ids = {deal_id: group['id'] for group in product_groups for deal_id in group['deal_ids']}
         for deal in all_deals:
-            deal['scores'] = self.scorer.score_deal(deal)
+            deal.group_id = group_ids.get(deal.id)
+        print(f"Product groups: {len(product_groups)} products listed by more than one retailer")
+
+        # Record price history (raw points + daily rollups), then apply retention
+        saved = database.save_price_snapshots(all_deals)
+        removed = database.compact_price_history()
+        print(f"Price history: {saved} snapshots saved, {removed} old raw points compacted")
+
+        # Re-run the fake-discount analysis over the history, including today's prices
+        price_flags = {}
+        try:
+            # Deferred: needs numpy, so a host without it just skips the flag pass
+            from analyzer.price_flags import refresh_price_flags
+
+            summary = refresh_price_flags()
+            price_flags = database.get_price_flags((deal.asin, deal.retailer) for deal in all_deals)
+            print(f"Price flags: {summary['products']} products analysed in {summary['total_seconds']}s, "
+                  f"{summary['flagged']}")
+        except Exception as e:
+            print(f"Price flag analysis failed, scoring without it: {e}")
+
+        # Score all deals (as one batch, so percentile mode sees the whole crawl)
+        # and pick the ready-made top lists as they go
+        top_deals = TopDeals()
+        for deal, scores in zip(all_deals, self.scorer.score_batch(all_deals, price_flags)):
+            deal.scores = scores
+            top_deals.add(deal)
 
         # Organize by categories
         categories = self.category_organizer.organize_by_category(all_deals)
@@ -69,7 +147,9 @@ class ScrapingOrchestrator:
 
         return {
             'last_updated': datetime.now(timezone.utc).isoformat(),
-            'deals': all_deals,
+            'deals': [deal.to_dict() for deal in all_deals],
             'categories': categories,
-            'category_stats': category_stats
+            'category_stats': category_stats,
+            'product_groups': product_groups,
+            'top_deals': top_deals.to_dict()
         }
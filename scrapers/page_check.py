@@ -0,0 +1,62 @@
+"""
+Byte-level triage of fetched pages, before anything is parsed
+
+A robot check or an empty results page comes back as HTTP 200, so without
+this it would be parsed in full only to find no product cards. The
+classifier looks at the raw response bytes (substring and one compiled regex
+search, no decoding or HTML parsing) and returns a verdict:
+
+- PAGE_OK: result containers are present, worth parsing
+- PAGE_BLOCKED: a captcha / robot-check page; the fetch layer backs off the
+  host and retries, usually through another egress
+- PAGE_TRUNCATED: too small to be a real page; retried like a network error
+- PAGE_EMPTY: the retailer says there are no results; not parsed, not retried
+- PAGE_NO_RESULTS: a full page without result containers and without a "no
+  results" message; not parsed (a jump in these means the layout changed)
+
+Markers are per retailer; each scraper declares its own PageClassifier.
+"""
+
+from typing import Sequence
+import re
+
+PAGE_OK = 'ok'
+PAGE_BLOCKED = 'blocked'
+PAGE_TRUNCATED = 'truncated'
+PAGE_EMPTY = 'empty'
+PAGE_NO_RESULTS = 'no_results'
+
+# Verdicts for which the fetch is retried (the others are final)
+RETRY_VERDICTS = frozenset({PAGE_BLOCKED, PAGE_TRUNCATED})
+# Verdicts where there is nothing to parse
+EMPTY_VERDICTS = frozenset({PAGE_EMPTY, PAGE_NO_RESULTS})
+
+# Block pages are small and say so early; no need to scan a whole results page for them
+BLOCK_SCAN_BYTES = 16_384
+MIN_PAGE_BYTES = 2_048
+
+class PageClassifier:
+    """Verdict for a response body from a retailer's block, result and empty-page markers"""
+
+    def __init__(self, block_markers: Sequence[bytes], result_pattern: bytes,
+                 empty_markers: Sequence[bytes] = (), min_bytes: int = MIN_PAGE_BYTES,
+                 block_scan_bytes: int = BLOCK_SCAN_BYTES):
+        self.block_markers = tuple(block_markers)
+        self.result_pattern = re.compile(result_pattern)
+        self.empty_markers = tuple(empty_markers)
+        self.min_bytes = min_bytes
+        self.block_scan_bytes = block_scan_bytes
+
+    def classify(self, body: bytes) -> str:
+        # Results first: a real results page is the common case and is decided in one search
+        if self.result_pattern.search(body):
+            return PAGE_OK
+
+        head = body[:self.block_scan_bytes]
+        if any(marker in head for marker in self.block_markers):
+            return PAGE_BLOCKED
+        if any(marker in body for marker in self.empty_markers):
+            return PAGE_EMPTY
+        if len(body) < self.min_bytes:
+            return PAGE_TRUNCATED
+        return PAGE_NO_RESULTS
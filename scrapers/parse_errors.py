@@ -0,0 +1,121 @@
+"""
+Parse-failure accounting for product cards
+
+Instead of printing a traceback per card, scrapers record why a card was
+skipped: a missing element ('no_price') or an exception while reading a field
+('price:ValueError'). Recording is a counter bump; the first few cards per
+(retailer, reason) in a run are kept as HTML exemplars and only written to
+disk, with a summary, when the run ends. A broken selector then shows up as
+one reason with every card behind it, plus real markup to fix it against.
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import glob
+import json
+import os
+import re
+import threading
+import metrics
+
+PARSE_ERRORS_DIR = 'data/parse_errors'
+# Cards kept per (retailer, reason) per run, and how much of each card's HTML
+EXEMPLARS_PER_REASON = 3
+EXEMPLAR_MAX_CHARS = 20_000
+
+def _slug(text: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-') or 'unknown'
+
+class ParseErrorLog:
+    """Per-run parse failure counts and sampled card HTML"""
+
+    def __init__(self, directory: str = PARSE_ERRORS_DIR,
+                 exemplars_per_reason: int = EXEMPLARS_PER_REASON):
+        self.directory = directory
+        self.exemplars_per_reason = exemplars_per_reason
+        self.counts: Dict[Tuple[str, str], int] = {}
+        self.exemplars: Dict[Tuple[str, str], List[str]] = {}
+        self.cards_parsed: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def start_run(self):
+        with self._lock:
+            self.counts = {}
+            self.exemplars = {}
+            self.cards_parsed = {}
+
+    def parsed(self, retailer: str, cards: int = 1):
+        """Count cards that parsed, so failure rates can be reported"""
+        with self._lock:
+            self.cards_parsed[retailer] = self.cards_parsed.get(retailer, 0) + cards
+
+    def record(self, retailer: str, reason: str, card=None, error: Optional[Exception] = None):
+        """Count one failed card; its HTML is kept only while the reason has few exemplars"""
+        metrics.PARSE_FAILURES.inc(retailer=retailer, reason=reason)
+        key = (retailer, reason)
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+            samples = self.exemplars.setdefault(key, [])
+            if card is None or len(samples) >= self.exemplars_per_reason:
+                return
+            # str(card) serialises the subtree: only paid for the cards that are kept
+            html = str(card)[:EXEMPLAR_MAX_CHARS]
+            samples.append(f'<!-- {error!r} -->\n{html}' if error is not None else html)
+
+    def summary(self) -> Dict:
+        """Failures by retailer and reason for this run, with failure rates"""
+        with self._lock:
+            counts = dict(self.counts)
+            parsed = dict(self.cards_parsed)
+
+        retailers: Dict[str, Dict] = {}
+        for (retailer, reason), count in sorted(counts.items()):
+            entry = retailers.setdefault(retailer, {'cards_parsed': parsed.get(retailer, 0),
+                                                    'failures': 0, 'reasons': {}})
+            entry['reasons'][reason] = count
+            entry['failures'] += count
+        for retailer, entry in retailers.items():
+            total = entry['cards_parsed'] + entry['failures']
+            entry['failure_rate'] = round(entry['failures'] / total, 4) if total else 0.0
+
+        return {
+            'total_failures': sum(counts.values()),
+            'retailers': retailers
+        }
+
+    def save(self) -> str:
+        """Write this run's exemplars and summary.json (replacing the previous run's); returns its path"""
+        with self._lock:
+            exemplars = {key: list(samples) for key, samples in self.exemplars.items()}
+
+        os.makedirs(self.directory, exist_ok=True)
+        for old in glob.glob(os.path.join(self.directory, '*', '*.html')):
+            os.remove(old)
+
+        files: Dict[str, Dict[str, List[str]]] = {}
+        for (retailer, reason), samples in sorted(exemplars.items()):
+            retailer_dir = os.path.join(self.directory, _slug(retailer))
+            os.makedirs(retailer_dir, exist_ok=True)
+            for index, html in enumerate(samples, 1):
+                path = os.path.join(retailer_dir, f'{_slug(reason)}-{index}.html')
+                with open(path, 'w') as f:
+                    f.write(html)
+                files.setdefault(retailer, {}).setdefault(reason, []).append(path)
+
+        path = os.path.join(self.directory, 'summary.json')
+        with open(path, 'w') as f:
+            json.dump({
+                'generated_at': datetime.now(timezone.utc).isoformat(),
+                **self.summary(),
+                'exemplars': files
+            }, f, indent=2)
+        return path
+
+    def print_summary(self):
+        for retailer, entry in self.summary()['retailers'].items():
+            reasons = ', '.join(f'{reason}={count}' for reason, count in
+                                sorted(entry['reasons'].items(), key=lambda item: -item[1]))
+            print(f"[{retailer}] {entry['failures']} cards skipped "
+                  f"({entry['failure_rate']:.1%}): {reasons}")
+
+PARSE_ERRORS = ParseErrorLog()
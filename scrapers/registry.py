@@ -0,0 +1,34 @@
+from importlib import import_module
+from importlib.metadata import entry_points
+from typing import Dict, List, Type
+import pkgutil
+
+# Third-party packages can ship scrapers by declaring an entry point in this group
+ENTRY_POINT_GROUP = 'blackfriday_deals.scrapers'
+
+_registry: Dict[str, Type] = {}
+
+def register_scraper(cls: Type) -> Type:
+    """Class decorator adding a BaseScraper subclass to the registry"""
+    _registry[cls.__name__] = cls
+    return cls
+
+def discover_scrapers() -> List[Type]:
+    """Registered scraper classes, after importing scrapers/retailers/ modules and entry points
+
+    Retailer scrapers live in their own package, so infrastructure modules
+    added to scrapers/ are never imported as retailers.
+    """
+    from scrapers import retailers
+
+    for module in pkgutil.iter_modules(retailers.__path__):
+        if not module.name.startswith('_'):
+            import_module(f'scrapers.retailers.{module.name}')
+
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            register_scraper(entry_point.load())
+        except Exception as e:
+            print(f"[registry] Skipping scraper plugin {entry_point.name}: {e}")
+
+    return [_registry[name] for name in sorted(_registry)]
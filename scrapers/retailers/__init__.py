@@ -0,0 +1 @@
+"""Retailer scrapers: every module in this package is imported by discover_scrapers()"""
@@ -0,0 +1,284 @@
+from scrapers.base import BaseScraper
+from scrapers.deal import Deal
+from scrapers.crawl_policy import AdaptiveCrawlPolicy, DEFAULT_PAGE_BUDGET
+from scrapers.page_check import PageClassifier
+from scrapers.parse_errors import PARSE_ERRORS
+from scrapers.registry import register_scraper
+from scrapers.urls import AMAZON_AU_BASE_URL, canonicalize_url
+from typing import List, Dict, Optional, Tuple
+import re
+import time
+import metrics
+
+# Only deals with at least this discount are listed
+MIN_DISCOUNT_PCT = 10
+
+# Checked on the raw bytes of each results page before it is parsed
+AMAZON_PAGE_CLASSIFIER = PageClassifier(
+    block_markers=(
+        b'/errors/validateCaptcha',
+        b'Type the characters you see in this image',
+        b"Sorry, we just need to make sure you're not a robot",
+        b'api-services-support@amazon.com',  # "To discuss automated access to Amazon data..."
+        b'Sorry! Something went wrong!',     # The "dogs of Amazon" error page
+    ),
+    # What the parser selects: [data-asin]:not([data-asin=""])
+    result_pattern=rb'data-asin=["\']?[A-Z0-9]',
+    empty_markers=(b'No results for', b'did not match any products')
+)
+
+@register_scraper
+class AmazonAUScraper(BaseScraper):
+    """Scraper for Amazon Australia Black Friday deals"""
+
+    host = 'www.amazon.com.au'
+    max_concurrency = 2
+    requests_per_second = 1.0
+    page_budget = DEFAULT_PAGE_BUDGET
+    page_classifier = AMAZON_PAGE_CLASSIFIER
+    supports_distributed = True
+
+    @classmethod
+    def create(cls) -> 'AmazonAUScraper':
+        return cls(crawl_policy=AdaptiveCrawlPolicy(page_budget=cls.page_budget))
+
+    def __init__(self, crawl_policy: Optional[AdaptiveCrawlPolicy] = None,
+                 keep_raw_urls: bool = False):
+        super().__init__('Amazon AU')
+        self.base_url = AMAZON_AU_BASE_URL
+        # Keep the original (often ad-tracking) link alongside the canonical URL
+        self.keep_raw_urls = keep_raw_urls
+        # Decides pagination depth per category; None = fixed pages_per_category
+        self.crawl_policy = crawl_policy
+        # Product categories for Black Friday deals
+        self.deals_categories = [
+            ('gaming', 'Gaming'),
+            ('electronics', 'Electronics'),
+            ('home & kitchen', 'Home & Kitchen'),
+            ('sports & fitness', 'Sports & Fitness'),
+            ('computers & accessories', 'Computers'),
+            ('smart home', 'Smart Home'),
+            ('beauty & personal care', 'Beauty & Personal Care'),
+            ('tools & home improvement', 'Tools & DIY'),
+            # New categories
+            ('innovative gadgets', 'Cool Gadgets & Tools'),
+            ('desk setup productivity', 'Office & Stationery'),
+            ('health gadgets fitness', 'Health & Wellness'),
+            ('car accessories', 'Automotive'),
+            ('watches bags jewelry', 'Fashion & Accessories')
+        ]
+
+    def parse_product_card(self, card) -> Optional[Dict]:
+        """Parse a single product card from Amazon"""
+        with metrics.timed(metrics.PARSE_CARD_SECONDS):
+            return self._parse_product_card(card)
+
+    def _parse_failed(self, reason: str, card, error: Optional[Exception] = None) -> None:
+        """Account for a skipped card (see scrapers/parse_errors.py)"""
+        PARSE_ERRORS.record(self.retailer_name, reason, card, error)
+        return None
+
+    def _parse_product_card(self, card) -> Optional[Dict]:
+        # Which field is being read, so an exception is attributed to its selector
+        field = 'title'
+        try:
+            # Extract title from image alt/aria-label text (Amazon AU structure)
+            img_elem = card.select_one('img')
+            if not img_elem:
+                return self._parse_failed('no_image', card)
+            # Try aria-label first, fall back to alt
+            title = img_elem.get('aria-label', '') or img_elem.get('alt', '')
+            title = title.strip()
+            if not title:
+                return self._parse_failed('no_title', card)
+
+            # Extract URL from first link (often a kilobyte-long ad-tracking URL)
+            field = 'url'
+            link_elem = card.select_one('a[href]')
+            if not link_elem:
+                return self._parse_failed('no_link', card)
+            raw_url = link_elem.get('href', '')
+            if not raw_url.startswith('http'):
+                raw_url = self.base_url + raw_url
+
+            # Resolve to https://www.amazon.com.au/dp/<ASIN> using the card's data-asin
+            url = canonicalize_url(raw_url, card.get('data-asin'), self.base_url)
+
+            # Extract current price
+            field = 'price'
+            price_whole = card.select_one('.a-price-whole')
+            price_fraction = card.select_one('.a-price-fraction')
+            if not price_whole:
+                return self._parse_failed('no_price', card)
+
+            # Combine whole and fractional parts with decimal point
+            whole_part = price_whole.get_text(strip=True).replace(',', '').rstrip('.')
+            fraction_part = price_fraction.get_text(strip=True) if price_fraction else '00'
+            price = float(f"{whole_part}.{fraction_part}")
+
+            # Extract original price
+            field = 'original_price'
+            original_price_elem = card.select_one('.a-text-price span')
+            original_price = price
+            if original_price_elem:
+                original_text = original_price_elem.get_text(strip=True)
+                original_text = re.sub(r'[^\d.]', '', original_text)
+                if original_text:
+                    original_price = float(original_text)
+
+            # Extract rating
+            field = 'rating'
+            rating = 0
+            rating_elem = card.select_one('i.a-icon-star span')
+            if rating_elem:
+                rating_text = rating_elem.get_text(strip=True)
+                match = re.search(r'(\d+\.?\d*)', rating_text)
+                if match:
+                    rating = float(match.group(1))
+
+            # Extract review count
+            field = 'review_count'
+            review_count = 0
+            review_elem = card.select_one('span.a-size-base')
+            if review_elem:
+                review_text = review_elem.get_text(strip=True).replace(',', '')
+                if review_text.isdigit():
+                    review_count = int(review_text)
+
+            # Extract image (use the same img element we found for the title)
+            image = img_elem.get('src', '') if img_elem else ''
+
+            raw_deal = {
+                'title': title,
+                'price': price,
+                'original_price': original_price,
+                'url': url,
+                'image': image,
+                'rating': rating,
+                'review_count': review_count,
+                'category': 'Electronics'  # Default category
+            }
+            if self.keep_raw_urls and raw_url != url:
+                raw_deal['raw_url'] = raw_url
+
+            return raw_deal
+
+        except Exception as e:
+            return self._parse_failed(f'{field}:{type(e).__name__}', card, e)
+
+    def select_deals(self, raw_deals: List[Dict]) -> List[Deal]:
+        """Standardise a page of raw deals, keeping only 10%+ discounts"""
+        return [deal for deal in self.standardize_deals(raw_deals) if deal.discount_pct >= MIN_DISCOUNT_PCT]
+
+    def search_url(self, search_term: str, page_num: int) -> str:
+        """Results page URL for a category search term"""
+        # Search with "deal" keyword to prioritize discounted items
+        return f'{self.base_url}/s?k={search_term}+deal&page={page_num}'
+
+    def parse_results_page(self, html: str, category_name: str,
+                           skip_asins=frozenset()) -> Tuple[int, List[Dict]]:
+        """Parse one results page into (cards found, raw deals with asin and category)
+
+        Cards whose ASIN is in skip_asins (already seen in this crawl) are not parsed.
+        """
+        from bs4 import BeautifulSoup  # Deferred: only scraping processes pay for bs4
+
+        soup = BeautifulSoup(html, 'html.parser')
+        product_cards = soup.select('[data-asin]:not([data-asin=""])')
+
+        raw_deals = []
+        page_asins = set()
+        for card in product_cards:
+            asin = card.get('data-asin', '')
+            if asin in skip_asins or asin in page_asins:
+                continue
+
+            raw_deal = self.parse_product_card(card)
+            if raw_deal and raw_deal['price'] > 0:
+                raw_deal['asin'] = asin
+                raw_deal['category'] = category_name
+                raw_deals.append(raw_deal)
+                page_asins.add(asin)
+
+        PARSE_ERRORS.parsed(self.retailer_name, len(raw_deals))
+        return len(product_cards), raw_deals
+
+    def _should_fetch_page(self, category_name: str, page_num: int,
+                           last_page_deals: Optional[int], pages_per_category: int) -> bool:
+        """Ask the crawl policy (if any) whether to fetch another page"""
+        if self.crawl_policy is None:
+            return page_num <= pages_per_category
+        return self.crawl_policy.should_fetch(category_name, page_num, last_page_deals)
+
+    async def scrape(self, pages_per_category: int = 3) -> List[Deal]:
+        """Scrape discounted deals from Amazon AU (filtering for 10%+ discounts)
+
+        Args:
+            pages_per_category: Number of pages per category (default 3 = ~100 deals per category).
+                With a crawl policy this is only the depth used for categories without history.
+        """
+        print(f"[{self.retailer_name}] Scraping deals from {len(self.deals_categories)} categories...")
+
+        all_deals = []
+        seen_asins = set()
+
+        if self.crawl_policy:
+            self.crawl_policy.start_run(
+                self.retailer_name,
+                [category_name for _, category_name in self.deals_categories],
+                default_pages=pages_per_category
+            )
+
+        for search_term, category_name in self.deals_categories:
+            print(f"\n[{self.retailer_name}] === {category_name} ===")
+            category_deals = 0
+            page_num = 1
+            page_deals = None
+
+            while self._should_fetch_page(category_name, page_num, page_deals, pages_per_category):
+                html = await self.fetch_page(self.search_url(search_term, page_num))
+                if html == '':
+                    # Classified from the bytes as a page without results: nothing deeper either
+                    print(f"[{self.retailer_name}] No results on {category_name} page {page_num}")
+                    if self.crawl_policy:
+                        self.crawl_policy.record_page(category_name, page_num, 0, 0)
+                    page_num += 1
+                    break
+                if not html:
+                    print(f"[{self.retailer_name}] Failed to fetch {category_name} page {page_num}")
+                    if self.crawl_policy:
+                        self.crawl_policy.record_page(category_name, page_num, 0, 0, fetched=False)
+                    page_deals = None
+                    page_num += 1
+                    continue
+
+                parse_start = time.perf_counter()
+                cards_found, raw_deals = self.parse_results_page(html, category_name, seen_asins)
+                print(f"[{self.retailer_name}] Page {page_num}: {cards_found} products found")
+
+                page_deals = 0
+                for deal in self.select_deals(raw_deals):
+                    all_deals.append(deal)
+                    seen_asins.add(deal.asin)
+                    page_deals += 1
+                    category_deals += 1
+
+                parse_seconds = time.perf_counter() - parse_start
+                metrics.PARSE_PAGE_SECONDS.observe(parse_seconds)
+                if cards_found and parse_seconds > 0:
+                    metrics.PARSE_CARDS_PER_SECOND.observe(cards_found / parse_seconds)
+
+                print(f"[{self.retailer_name}] → {page_deals} deals with 10%+ discount")
+                if self.crawl_policy:
+                    self.crawl_policy.record_page(category_name, page_num, cards_found, page_deals)
+                self.report_progress(category=category_name, page=page_num,
+                                     deals_found=len(all_deals), status='running')
+                page_num += 1
+
+            if self.crawl_policy:
+                self.crawl_policy.finish_category(category_name)
+            print(f"[{self.retailer_name}] {category_name}: {category_deals} total deals ({page_num - 1} pages)")
+
+        self.deals = all_deals
+        print(f"\n[{self.retailer_name}] ✅ TOTAL: {len(all_deals)} deals across all categories")
+        return all_deals
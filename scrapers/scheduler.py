@@ -0,0 +1,113 @@
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Optional
+import asyncio
+import time
+import metrics
+
+# On a throttling signal the host's rate is multiplied by this; each good page adds back RATE_RECOVERY of the configured rate
+BACKOFF_FACTOR = 0.5
+RATE_RECOVERY = 0.1
+MIN_RATE_FRACTION = 0.05
+
+class HostBudget:
+    """Limits for one host: concurrent requests, request rate and pages per run"""
+
+    def __init__(self, host: str, max_concurrency: int, requests_per_second: float,
+                 page_budget: Optional[int] = None):
+        self.host = host
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self.max_rate = requests_per_second  # Configured rate; backoff lowers requests_per_second below it
+        self.page_budget = page_budget
+        self.pages_used = 0
+        self.next_request_at = 0.0
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+    def tighten(self, max_concurrency: int, requests_per_second: float, page_budget: Optional[int]):
+        """Merge another scraper's limits for the same host (strictest wins)"""
+        self.max_concurrency = min(self.max_concurrency, max_concurrency)
+        self.requests_per_second = min(self.requests_per_second, requests_per_second)
+        self.max_rate = min(self.max_rate, requests_per_second)
+        if page_budget is not None:
+            self.page_budget = page_budget if self.page_budget is None else min(self.page_budget, page_budget)
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+
+class FetchScheduler:
+    """Shared per-host fetch limits for every scraper in a run
+
+    Each host gets a semaphore (max concurrency), a pacing slot so requests
+    start at most `requests_per_second` apart, and a page budget. Scrapers for
+    different hosts never wait on each other, so adding retailers adds
+    throughput, while scrapers sharing a host share its limits.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, sleep=asyncio.sleep):
+        self.clock = clock
+        self.sleep = sleep
+        self.hosts: Dict[str, HostBudget] = {}
+
+    def configure(self, host: str, max_concurrency: int = 1, requests_per_second: float = 1.0,
+                  page_budget: Optional[int] = None) -> HostBudget:
+        """Declare limits for a host; a second declaration can only tighten them"""
+        budget = self.hosts.get(host)
+        if budget is None:
+            budget = self.hosts[host] = HostBudget(host, max_concurrency, requests_per_second, page_budget)
+        else:
+            budget.tighten(max_concurrency, requests_per_second, page_budget)
+        return budget
+
+    def start_run(self):
+        """Reset page counts, pacing and backoff (and rebind semaphores to the current event loop)"""
+        for budget in self.hosts.values():
+            budget.pages_used = 0
+            budget.requests_per_second = budget.max_rate
+            budget.next_request_at = 0.0
+            budget.semaphore = asyncio.Semaphore(budget.max_concurrency)
+
+    def charge_page(self, host: str) -> bool:
+        """Count one page against the host's budget; False once it is spent"""
+        budget = self.hosts.get(host)
+        if budget is None:
+            return True
+        if budget.page_budget is not None and budget.pages_used >= budget.page_budget:
+            return False
+        budget.pages_used += 1
+        return True
+
+    def back_off(self, host: str, cooldown: float = 0.0):
+        """Throttling signal (robot check, 429): halve the host's rate and hold its next request for `cooldown`s"""
+        budget = self.hosts.get(host)
+        if budget is None:
+            return
+        budget.requests_per_second = max(budget.requests_per_second * BACKOFF_FACTOR,
+                                         budget.max_rate * MIN_RATE_FRACTION)
+        budget.next_request_at = max(budget.next_request_at, self.clock() + cooldown)
+        metrics.FETCH_BACKOFFS.inc(host=host)
+        print(f"[scheduler] Backing off {host}: {budget.requests_per_second:.2f} req/s, "
+              f"next request in {cooldown:.0f}s")
+
+    def recover(self, host: str):
+        """A good page: step the host's rate back up towards its configured limit"""
+        budget = self.hosts.get(host)
+        if budget is not None and budget.requests_per_second < budget.max_rate:
+            budget.requests_per_second = min(budget.requests_per_second + budget.max_rate * RATE_RECOVERY,
+                                             budget.max_rate)
+
+    @asynccontextmanager
+    async def request(self, host: str):
+        """Hold a concurrency slot for one request, starting it no sooner than the rate allows"""
+        budget = self.hosts.get(host)
+        if budget is None:
+            yield
+            return
+
+        wait_start = self.clock()
+        async with budget.semaphore:
+            # Reserve the next start time before sleeping, so waiters queue in order
+            now = self.clock()
+            start_at = max(now, budget.next_request_at)
+            budget.next_request_at = start_at + 1 / budget.requests_per_second
+            if start_at > now:
+                await self.sleep(start_at - now)
+            metrics.FETCH_THROTTLE_SECONDS.observe(self.clock() - wait_start)
+            yield
@@ -0,0 +1,47 @@
+from typing import Optional
+import re
+
+AMAZON_AU_BASE_URL = 'https://www.amazon.com.au'
+
+ASIN_PATTERN = re.compile(r'[A-Z0-9]{10}')
+
+# Amazon ASIN locations, in priority order: /dp/ASIN, /product/ASIN, data-asin, /ASIN/
+ASIN_URL_PATTERNS = [
+    re.compile(r'/dp/([A-Z0-9]{10})'),
+    re.compile(r'/product/([A-Z0-9]{10})'),
+    re.compile(r'data-asin="([A-Z0-9]{10})"'),
+    re.compile(r'/([A-Z0-9]{10})/')
+]
+
+def is_asin(value: str) -> bool:
+    """Check that a value looks like an Amazon ASIN"""
+    return bool(value) and ASIN_PATTERN.fullmatch(value) is not None
+
+def extract_asin(url: str) -> Optional[str]:
+    """Extract ASIN from Amazon URL"""
+    if not url:
+        return None
+
+    for pattern in ASIN_URL_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return match.group(1)
+
+    return None
+
+def canonical_product_url(asin: str, base_url: str = AMAZON_AU_BASE_URL) -> str:
+    """Short, stable product page URL for an ASIN"""
+    return f'{base_url}/dp/{asin}'
+
+def canonicalize_url(url: str, asin: Optional[str] = None,
+                     base_url: str = AMAZON_AU_BASE_URL) -> str:
+    """Resolve a (possibly ad-tracking) product link to its canonical /dp/ URL
+
+    Uses the card's data-asin when given, otherwise an ASIN found in the URL.
+    URLs with no recognisable ASIN are returned unchanged.
+    """
+    if not is_asin(asin or ''):
+        asin = extract_asin(url)
+    if not asin:
+        return url
+    return canonical_product_url(asin, base_url)
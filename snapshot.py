@@ -0,0 +1,230 @@
+"""
+Read-only deals snapshot shared by every web worker through mmap
+
+The deals cache (JSON) is compiled once into a compact snapshot file:
+
+    header | body | record offsets/lengths | id blob | id offsets | id order
+           | category ordinals | meta JSON
+
+The body is the exact /api/deals document (compact JSON) and each deal's
+record is a slice of it, so the full response and single-deal lookups come
+straight from the mapped pages. Deals are found by id with a binary search
+over the sorted id order, and by category through packed ordinal ranges.
+
+The first worker to see a newer cache builds the snapshot under a file lock
+and renames it into place; every worker then maps the same file. A worker
+still serving from the old mapping keeps a valid view until it lets go.
+"""
+
+from array import array
+from typing import Dict, Iterator, List, Optional
+import json
+import mmap
+import os
+import struct
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process build lock
+    fcntl = None
+
+from analyzer.ranking import TopDeals
+
+MAGIC = b'BFDSNAP1'
+# magic, source cache mtime, meta offset, meta length
+HEADER = struct.Struct('<8sdQQ')
+COMPACT = (',', ':')
+
+def snapshot_path_for(cache_path: str) -> str:
+    return os.path.splitext(cache_path)[0] + '.snapshot'
+
+def _pad(f, alignment: int = 8):
+    f.write(b'\0' * (-f.tell() % alignment))
+
+def write_snapshot(data: Dict, path: str, source_mtime: float = 0.0):
+    """Compile a deals cache document into a snapshot file, replacing it atomically"""
+    deals = data.get('deals', [])
+    records = [json.dumps(deal, separators=COMPACT).encode() for deal in deals]
+    rest = {key: value for key, value in data.items() if key != 'deals'}
+    tail = json.dumps(rest, separators=COMPACT).encode()
+
+    ids = [deal['id'].encode() for deal in deals]
+    ordinals = {deal_id: index for index, deal_id in enumerate(ids)}
+    sections = {}
+
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        f.write(b'\0' * HEADER.size)
+
+        # Body: {"deals":[record,record,...],<rest of the document>}
+        body_start = f.tell()
+        f.write(b'{"deals":[')
+        offsets, lengths = array('Q'), array('I')
+        for index, record in enumerate(records):
+            if index:
+                f.write(b',')
+            offsets.append(f.tell())
+            lengths.append(len(record))
+            f.write(record)
+        f.write(b']' + (b',' + tail[1:] if rest else b'}'))
+        sections['body'] = [body_start, f.tell() - body_start]
+
+        _pad(f)
+        sections['record_offsets'] = f.tell()
+        f.write(offsets.tobytes())
+        sections['record_lengths'] = f.tell()
+        f.write(lengths.tobytes())
+
+        # Ids in deal order, newline-terminated, plus where each starts
+        sections['id_blob'] = f.tell()
+        id_offsets = array('I', [0])
+        for deal_id in ids:
+            f.write(deal_id + b'\n')
+            id_offsets.append(id_offsets[-1] + len(deal_id) + 1)
+        _pad(f)
+        sections['id_offsets'] = f.tell()
+        f.write(id_offsets.tobytes())
+        sections['id_order'] = f.tell()
+        f.write(array('I', sorted(range(len(ids)), key=ids.__getitem__)).tobytes())
+
+        # Each category is a [start, count] range of this ordinal array
+        sections['category_ordinals'] = f.tell()
+        categories = {}
+        start = 0
+        for category, category_ids in data.get('categories', {}).items():
+            members = array('I', [ordinals[deal_id.encode()] for deal_id in category_ids
+                                  if deal_id.encode() in ordinals])
+            f.write(members.tobytes())
+            categories[category] = [start, len(members)]
+            start += len(members)
+
+        meta = json.dumps({
+            'deal_count': len(deals),
+            'last_updated': data.get('last_updated'),
+            'sections': sections,
+            'categories': categories,
+            'product_groups': data.get('product_groups', []),
+            # Caches written before top lists existed get them computed here
+            'top_deals': data.get('top_deals') or TopDeals().add_many(deals).to_dict()
+        }, separators=COMPACT).encode()
+        meta_offset = f.tell()
+        f.write(meta)
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, source_mtime, meta_offset, len(meta)))
+
+    os.replace(tmp_path, path)
+
+def read_source_mtime(path: str) -> Optional[float]:
+    """The cache mtime a snapshot was built from (None if missing or invalid)"""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+    except OSError:
+        return None
+    if len(header) < HEADER.size:
+        return None
+    magic, source_mtime, _, _ = HEADER.unpack(header)
+    return source_mtime if magic == MAGIC else None
+
+def ensure_snapshot(cache_path: str, snapshot_path: str) -> bool:
+    """Rebuild the snapshot if the cache has changed; returns whether this call built it"""
+    source_mtime = os.path.getmtime(cache_path)
+    if read_source_mtime(snapshot_path) == source_mtime:
+        return False
+
+    with open(snapshot_path + '.lock', 'a') as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        # Another worker may have built it while we waited for the lock
+        if read_source_mtime(snapshot_path) == source_mtime:
+            return False
+        with open(cache_path, 'r') as f:
+            data = json.load(f)
+        write_snapshot(data, snapshot_path, source_mtime)
+    return True
+
+class DealSnapshot:
+    """Read-only, memory-mapped view of one snapshot file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.source_mtime, meta_offset, meta_length = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f'Not a deals snapshot: {path}')
+        self.meta = json.loads(self._map[meta_offset:meta_offset + meta_length])
+
+        count = self.meta['deal_count']
+        sections = self.meta['sections']
+        view = memoryview(self._map)
+        self._record_offsets = view[sections['record_offsets']:][:8 * count].cast('Q')
+        self._record_lengths = view[sections['record_lengths']:][:4 * count].cast('I')
+        self._id_offsets = view[sections['id_offsets']:][:4 * (count + 1)].cast('I')
+        self._id_order = view[sections['id_order']:][:4 * count].cast('I')
+        self._category_ordinals = view[sections['category_ordinals']:meta_offset].cast('I')
+        self._id_blob = sections['id_blob']
+
+        self.groups = {group['id']: group for group in self.meta['product_groups']}
+        self.top = self.meta['top_deals']
+
+    def __len__(self) -> int:
+        return self.meta['deal_count']
+
+    @property
+    def last_updated(self) -> Optional[str]:
+        return self.meta['last_updated']
+
+    def body(self) -> memoryview:
+        """The whole /api/deals document, as mapped bytes"""
+        start, length = self.meta['sections']['body']
+        return memoryview(self._map)[start:start + length]
+
+    def record(self, ordinal: int) -> bytes:
+        """One deal's JSON"""
+        offset = self._record_offsets[ordinal]
+        return self._map[offset:offset + self._record_lengths[ordinal]]
+
+    def deal(self, ordinal: int) -> Dict:
+        return json.loads(self.record(ordinal))
+
+    def deal_id(self, ordinal: int) -> str:
+        return self._id_bytes(ordinal).decode()
+
+    def ordinal(self, deal_id: str) -> Optional[int]:
+        """Position of a deal, by binary search over the sorted ids"""
+        key = deal_id.encode()
+        order = self._id_order
+        low, high = 0, len(order)
+        while low < high:
+            middle = (low + high) // 2
+            if self._id_bytes(order[middle]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(order) and self._id_bytes(order[low]) == key:
+            return order[low]
+        return None
+
+    def get(self, deal_id: str) -> Optional[Dict]:
+        ordinal = self.ordinal(deal_id)
+        return None if ordinal is None else self.deal(ordinal)
+
+    def deals(self) -> Iterator[Dict]:
+        """Every deal, decoded one at a time"""
+        for ordinal in range(len(self)):
+            yield self.deal(ordinal)
+
+    def category_ordinals(self, category: str) -> List[int]:
+        start, count = self.meta['categories'].get(category, (0, 0))
+        return self._category_ordinals[start:start + count].tolist()
+
+    def category_ids(self, category: str) -> List[str]:
+        return [self.deal_id(ordinal) for ordinal in self.category_ordinals(category)]
+
+    def _id_bytes(self, ordinal: int) -> bytes:
+        start = self._id_blob + self._id_offsets[ordinal]
+        end = self._id_blob + self._id_offsets[ordinal + 1] - 1
+        return self._map[start:end]
@@ -9,6 +9,15 @@ let filters = {
     minDiscount: 0,
     minRating: 0
 };
+let searchQuery = '';
+let searchResults = null;  // Server-ranked results while a search is active
+let searchTimer = null;
+let dealsById = new Map();
+let dealsSeq = null;  // Last delta batch applied (null until /api/deals has loaded)
+// Category view: pages of server-rendered cards (/api/deals/cards), windowed
+let cardView = {request: 0, params: null, pages: new Map(), nextPage: 0, pageCount: 0, loading: false};
+let renderTimer = null;
+let datasetVersion = null;  // last_updated of the loaded dataset (see /api/deals/version)
 
 // DOM elements
 const refreshBtn = document.getElementById('refresh-btn');
@@ -17,14 +26,23 @@ const refreshText = document.getElementById('refresh-text');
 const lastUpdated = document.getElementById('last-updated');
 const dealCount = document.getElementById('deal-count');
 const progressBar = document.getElementById('progress-bar');
+const progressFill = progressBar.querySelector('.progress-fill');
 const dealsContainer = document.getElementById('deals-container');
 const discountFilter = document.getElementById('discount-filter');
 const ratingFilter = document.getElementById('rating-filter');
 const discountValue = document.getElementById('discount-value');
 const ratingValue = document.getElementById('rating-value');
+const searchInput = document.getElementById('search-input');
 const modal = document.getElementById('deal-modal');
 const closeBtn = document.querySelector('.close-btn');
 
+// Pages far outside the viewport give up their cards (keeping their height)
+const pageObserver = new IntersectionObserver(onPageVisibility, { rootMargin: '2000px 0px' });
+// The end of the list pulls in the next page
+const sentinelObserver = new IntersectionObserver((entries) => {
+    if (entries.some(entry => entry.isIntersecting)) loadNextPage();
+}, { rootMargin: '800px 0px' });
+
 // Initialize
 loadDeals();
 setupEventListeners();
@@ -37,13 +55,33 @@ function setupEventListeners() {
     discountFilter.addEventListener('input', (e) => {
         filters.minDiscount = parseInt(e.target.value);
         discountValue.textContent = filters.minDiscount + '%';
-        renderDeals();
+        searchQuery ? scheduleSearch() : scheduleRender();
     });
 
     ratingFilter.addEventListener('input', (e) => {
         filters.minRating = parseFloat(e.target.value);
         ratingValue.textContent = filters.minRating === 0 ? 'Any' : filters.minRating + '★';
-        renderDeals();
+        searchQuery ? scheduleSearch() : scheduleRender();
+    });
+
+    // Search (debounced, ranked server-side)
+    searchInput.addEventListener('input', (e) => {
+        searchQuery = e.target.value.trim();
+        if (!searchQuery) {
+            clearTimeout(searchTimer);
+            searchResults = null;
+            renderDeals();
+            return;
+        }
+        scheduleSearch();
+    });
+
+    // One listener for every card, however many pages are rendered
+    dealsContainer.addEventListener('click', (e) => {
+        const card = e.target.closest('.deal-card');
+        if (!card) return;
+        const deal = dealsById.get(card.dataset.id) || (searchResults || []).find(d => d.id === card.dataset.id);
+        if (deal) showDealModal(deal);
     });
 
     // Modal close
@@ -58,9 +96,19 @@ function setupEventListeners() {
     });
 
     // WebSocket events
-    socket.on('scraping_progress', (data) => {
-        console.log('Progress:', data);
-        refreshText.textContent = `${data.retailer}: ${data.deals_found} deals`;
+    socket.on('connect', () => {
+        // On reconnect, ask only for the batches missed while disconnected
+        socket.emit('subscribe', { since: dealsSeq });
+    });
+
+    socket.on('deals_delta', (batch) => applyDelta(batch, false));
+
+    socket.on('deals_resume', (batch) => {
+        if (batch.reset) {
+            loadDeals();
+        } else {
+            applyDelta(batch, true);
+        }
     });
 
     socket.on('scraping_complete', (data) => {
@@ -75,7 +123,10 @@ function setupEventListeners() {
             refreshText.textContent = 'Refresh Deals';
         }, 2000);
 
-        loadDeals();
+        // Deltas are applied as they arrive; only reload without a baseline
+        if (dealsSeq === null || data.seq > dealsSeq) {
+            loadDeals();
+        }
     });
 
     socket.on('scraping_error', (data) => {
@@ -93,6 +144,9 @@ async function loadDeals() {
 
         allDeals = data.deals || [];
         categories = data.categories || {};
+        dealsById = new Map(allDeals.map(deal => [deal.id, deal]));
+        dealsSeq = data.seq ?? null;
+        datasetVersion = data.last_updated || null;
 
         // Update last updated
         if (data.last_updated) {
@@ -114,6 +168,81 @@ async function loadDeals() {
     }
 }
 
+function applyDelta(batch, resumed) {
+    (batch.progress || []).forEach(item => {
+        const page = item.category ? ` (${item.category} p${item.page})` : '';
+        refreshText.textContent = `${item.retailer}: ${item.deals_found} deals${page}`;
+    });
+
+    if (dealsSeq === null || batch.seq <= dealsSeq) return;
+    if (!resumed && batch.seq > dealsSeq + 1) {
+        // Missed a batch: let the server replay the gap
+        socket.emit('subscribe', { since: dealsSeq });
+        return;
+    }
+    dealsSeq = batch.seq;
+
+    const upserts = batch.upserts || [];
+    const removed = batch.removed || [];
+    if (upserts.length === 0 && removed.length === 0) return;
+
+    removed.forEach(id => {
+        const deal = dealsById.get(id);
+        if (!deal) return;
+        dealsById.delete(id);
+        removeFromCategory(deal.category, id);
+    });
+
+    upserts.forEach(deal => {
+        const previous = dealsById.get(deal.id);
+        if (previous && previous.category !== deal.category) {
+            removeFromCategory(previous.category, deal.id);
+        }
+        dealsById.set(deal.id, deal);
+        if (!categories[deal.category]) categories[deal.category] = [];
+        if (!categories[deal.category].includes(deal.id)) categories[deal.category].push(deal.id);
+    });
+
+    allDeals = Array.from(dealsById.values());
+    if (!currentCategory && Object.keys(categories).length > 0) {
+        currentCategory = Object.keys(categories)[0];
+    }
+    renderCategoryButtons();
+    searchQuery ? scheduleSearch() : refreshCardView();
+}
+
+function removeFromCategory(category, id) {
+    const ids = categories[category];
+    if (!ids) return;
+    const index = ids.indexOf(id);
+    if (index !== -1) ids.splice(index, 1);
+    if (ids.length === 0) delete categories[category];
+}
+
+function scheduleSearch() {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(runSearch, 200);
+}
+
+async function runSearch() {
+    const query = searchQuery;
+    const params = new URLSearchParams({ q: query, limit: 100 });
+    if (filters.minDiscount > 0) params.set('min_discount', filters.minDiscount);
+    if (filters.minRating > 0) params.set('min_rating', filters.minRating);
+
+    try {
+        const response = await fetch(`/api/search?${params}`);
+        const data = await response.json();
+
+        // Ignore responses for queries the user has already typed past
+        if (query !== searchQuery) return;
+        searchResults = data.results || [];
+        renderDeals();
+    } catch (error) {
+        console.error('Search failed:', error);
+    }
+}
+
 function renderCategoryButtons() {
     const categoryList = document.getElementById('category-list');
     const sortedCategories = Object.keys(categories).sort();
@@ -130,43 +259,167 @@ function renderCategoryButtons() {
 
 function selectCategory(category) {
     currentCategory = category;
+    searchInput.value = '';
+    searchQuery = '';
+    searchResults = null;
     document.querySelectorAll('.collection-btn').forEach(btn => {
         btn.classList.toggle('active', btn.dataset.category === category);
     });
     renderDeals();
 }
 
+function scheduleRender() {
+    clearTimeout(renderTimer);
+    renderTimer = setTimeout(renderDeals, 120);
+}
+
 function renderDeals() {
-    // Get deals for current category
-    const categoryDealIds = categories[currentCategory] || [];
-    let deals = allDeals.filter(d => categoryDealIds.includes(d.id));
-
-    // Apply filters
-    deals = deals.filter(d => {
-        if (filters.minDiscount > 0 && d.discount_pct < filters.minDiscount) return false;
-        if (filters.minRating > 0 && d.rating < filters.minRating) return false;
-        return true;
-    });
+    if (searchResults !== null) {
+        renderSearchResults();
+    } else {
+        loadCardView();
+    }
+}
 
-    dealCount.textContent = `${deals.length} deals`;
+function showEmptyState() {
+    dealsContainer.innerHTML = `
+        <div class="empty-state">
+            <h2>No deals found</h2>
+            <p>Try adjusting your filters or refresh deals</p>
+        </div>
+    `;
+}
 
-    if (deals.length === 0) {
-        dealsContainer.innerHTML = `
-            <div class="empty-state">
-                <h2>No deals found</h2>
-                <p>Try adjusting your filters or refresh deals</p>
-            </div>
-        `;
+function resetCardView() {
+    cardView.request++;  // Responses for the previous view are dropped
+    pageObserver.disconnect();
+    sentinelObserver.disconnect();
+}
+
+function renderSearchResults() {
+    // Search results are already filtered and ranked by the server (at most 100)
+    resetCardView();
+    dealCount.textContent = `${searchResults.length} deals`;
+    if (searchResults.length === 0) {
+        showEmptyState();
         return;
     }
+    dealsContainer.innerHTML = searchResults.map(deal => createDealCard(deal)).join('');
+}
 
-    dealsContainer.innerHTML = deals.map(deal => createDealCard(deal)).join('');
+function cardViewParams() {
+    const params = new URLSearchParams({ category: currentCategory || '' });
+    if (filters.minDiscount > 0) params.set('min_discount', filters.minDiscount);
+    if (filters.minRating > 0) params.set('min_rating', filters.minRating);
+    return params;
+}
 
-    // Add click handlers
-    document.querySelectorAll('.deal-card').forEach(card => {
-        card.addEventListener('click', () => {
-            showDealModal(allDeals.find(d => d.id === card.dataset.id));
-        });
+async function fetchCardPage(params, page) {
+    const query = new URLSearchParams(params);
+    query.set('page', page);
+    const response = await fetch(`/api/deals/cards?${query}`);
+    return {
+        html: await response.text(),
+        total: parseInt(response.headers.get('X-Total-Count') || '0'),
+        pageCount: parseInt(response.headers.get('X-Page-Count') || '0')
+    };
+}
+
+async function loadCardView() {
+    resetCardView();
+    const request = cardView.request;
+    const params = cardViewParams();
+
+    try {
+        const first = await fetchCardPage(params, 0);
+        if (request !== cardView.request) return;
+
+        cardView = { request, params, pages: new Map([[0, first.html]]), nextPage: 1,
+                     pageCount: first.pageCount, loading: false };
+        dealCount.textContent = `${first.total} deals`;
+        if (first.total === 0) {
+            showEmptyState();
+            return;
+        }
+
+        dealsContainer.innerHTML = '<div class="deal-page-sentinel"></div>';
+        appendCardPage(0, first.html);
+        sentinelObserver.observe(dealsContainer.querySelector('.deal-page-sentinel'));
+    } catch (error) {
+        console.error('Failed to load deals:', error);
+    }
+}
+
+async function refreshCardView() {
+    // After a delta: re-fetch the pages already loaded, in place (scroll position kept)
+    if (searchResults !== null || cardView.params === null) return renderDeals();
+    const request = cardView.request;
+
+    try {
+        for (let page = 0; page < cardView.nextPage; page++) {
+            const result = await fetchCardPage(cardView.params, page);
+            if (request !== cardView.request) return;
+
+            cardView.pages.set(page, result.html);
+            cardView.pageCount = result.pageCount;
+            dealCount.textContent = `${result.total} deals`;
+            const element = dealsContainer.querySelector(`.deal-page[data-page="${page}"]`);
+            if (element && !element.dataset.evicted) element.innerHTML = result.html;
+        }
+    } catch (error) {
+        console.error('Failed to refresh deals:', error);
+    }
+}
+
+function appendCardPage(page, html) {
+    const element = document.createElement('div');
+    element.className = 'deal-page';
+    element.dataset.page = page;
+    element.innerHTML = html;
+    dealsContainer.insertBefore(element, dealsContainer.querySelector('.deal-page-sentinel'));
+    pageObserver.observe(element);
+}
+
+async function loadNextPage() {
+    if (cardView.loading || cardView.nextPage >= cardView.pageCount) return;
+    const request = cardView.request;
+    const page = cardView.nextPage;
+    cardView.loading = true;
+
+    try {
+        const result = await fetchCardPage(cardView.params, page);
+        if (request !== cardView.request) return;
+
+        cardView.pages.set(page, result.html);
+        cardView.nextPage = page + 1;
+        appendCardPage(page, result.html);
+    } catch (error) {
+        console.error('Failed to load more deals:', error);
+    } finally {
+        if (request === cardView.request) cardView.loading = false;
+    }
+
+    // Still at the end of the list (tall screen, short pages): keep going
+    const sentinel = dealsContainer.querySelector('.deal-page-sentinel');
+    if (request === cardView.request && sentinel && sentinel.getBoundingClientRect().top < window.innerHeight + 800) {
+        loadNextPage();
+    }
+}
+
+function onPageVisibility(entries) {
+    entries.forEach(entry => {
+        const element = entry.target;
+        if (entry.isIntersecting) {
+            if (element.dataset.evicted) {
+                element.innerHTML = cardView.pages.get(Number(element.dataset.page)) || '';
+                element.style.height = '';
+                delete element.dataset.evicted;
+            }
+        } else if (!element.dataset.evicted) {
+            element.style.height = `${element.offsetHeight}px`;
+            element.innerHTML = '';
+            element.dataset.evicted = '1';
+        }
     });
 }
 
@@ -226,12 +479,40 @@ function showDealModal(deal) {
                 <div>Legitimacy: ${deal.scores.legitimacy}</div>
             </div>
         </div>
+        <div id="modal-offers"></div>
         <a href="${deal.url}" target="_blank" style="display: block; background: #0071e3; color: white; padding: 1rem; text-align: center; border-radius: 8px; text-decoration: none; margin-top: 1.5rem;">
             View Deal →
         </a>
     `;
 
     modal.classList.add('show');
+
+    if (deal.group_id) {
+        loadOffers(deal);
+    }
+}
+
+async function loadOffers(deal) {
+    try {
+        const response = await fetch(`/api/deals/${deal.id}/offers`);
+        const data = await response.json();
+        const container = document.getElementById('modal-offers');
+        if (!container || !data.group || data.offers.length < 2) return;
+
+        container.innerHTML = `
+            <div style="margin: 1rem 0;">
+                <strong>Compare retailers:</strong>
+                ${data.offers.map(offer => `
+                    <div style="display: flex; justify-content: space-between; margin-top: 0.4rem;">
+                        <a href="${offer.url}" target="_blank" rel="noopener noreferrer">${offer.retailer}</a>
+                        <span>$${offer.price.toFixed(2)}${offer.id === data.best_deal_id ? ' · Best price' : ''}</span>
+                    </div>
+                `).join('')}
+            </div>
+        `;
+    } catch (error) {
+        console.error('Failed to load offers:', error);
+    }
 }
 
 async function startRefresh() {
@@ -243,6 +524,9 @@ async function startRefresh() {
     progressBar.classList.remove('hidden');
 
     try {
+        // Status version before the trigger, so only this job's updates are shown
+        const status = await (await fetch('/api/scrape-status')).json();
+
         // Trigger scraping via webhook to local machine
         const response = await fetch('/api/trigger-local-scrape', {
             method: 'POST',
@@ -252,9 +536,8 @@ async function startRefresh() {
         const result = await response.json();
 
         if (response.status === 202) {
-            refreshText.textContent = 'Scraper running on local machine...';
-            // Poll for updates since we don't have real-time feedback
-            pollForUpdates();
+            refreshText.textContent = 'Waiting for the local scraper...';
+            watchScrapeStatus(status.version);
         } else {
             refreshBtn.classList.remove('loading');
             refreshIcon.textContent = '❌';
@@ -280,53 +563,78 @@ async function startRefresh() {
     }
 }
 
-function pollForUpdates() {
-    // Poll every 10 seconds for new data
-    const pollInterval = setInterval(async () => {
+function finishRefresh(icon, text) {
+    refreshBtn.classList.remove('loading');
+    refreshIcon.textContent = icon;
+    refreshText.textContent = text;
+    progressBar.classList.add('hidden');
+    progressFill.style.width = '';
+
+    setTimeout(() => {
+        refreshIcon.textContent = '🔄';
+        refreshText.textContent = 'Refresh Deals';
+    }, 3000);
+}
+
+function showJobStatus(job) {
+    if (job.stage === 'scraping' || job.stage === 'starting') {
+        const pages = job.pages_total ? `${job.pages_done}/${job.pages_total} pages` : `${job.pages_done} pages`;
+        const eta = job.eta_seconds != null ? `, ~${Math.ceil(job.eta_seconds / 60)} min left` : '';
+        refreshText.textContent = `Scraping: ${pages}, ${job.deals_found} deals${eta}`;
+        progressFill.style.width = job.pages_total
+            ? `${Math.min(100, 100 * job.pages_done / job.pages_total)}%` : '';
+    } else if (job.stage === 'saving' || job.stage === 'publishing') {
+        refreshText.textContent = `Publishing ${job.deals_total} deals...`;
+        progressFill.style.width = '100%';
+    } else if (job.stage === 'complete') {
+        refreshText.textContent = 'Waiting for the new data to go live...';
+    }
+}
+
+function watchScrapeStatus(sinceVersion) {
+    // Live job status pushed by the local scraper (server-sent events)
+    const stream = new EventSource(`/api/scrape-status/stream?since=${sinceVersion}`);
+    let lastActivity = Date.now();
+    let checkingVersion = false;
+
+    const stop = () => {
+        stream.close();
+        clearInterval(versionTimer);
+    };
+
+    stream.onmessage = (event) => {
+        const job = JSON.parse(event.data);
+        lastActivity = Date.now();
+        showJobStatus(job);
+        if (job.stage === 'failed') {
+            stop();
+            finishRefresh('❌', job.error ? `Scrape failed: ${job.error}` : 'Scrape failed');
+        }
+    };
+
+    // The dataset itself is only fetched once its version has changed
+    const versionTimer = setInterval(async () => {
+        if (checkingVersion) return;
+        checkingVersion = true;
         try {
-            const response = await fetch('/api/deals');
-            const data = await response.json();
-
-            if (data.last_updated) {
-                const lastUpdateTime = new Date(data.last_updated);
-                const timeSinceUpdate = Date.now() - lastUpdateTime;
-
-                // If data was updated in the last 30 seconds, scraping is complete
-                if (timeSinceUpdate < 30000) {
-                    clearInterval(pollInterval);
-                    refreshBtn.classList.remove('loading');
-                    refreshIcon.textContent = '✓';
-                    refreshText.textContent = 'Refresh Complete';
-                    progressBar.classList.add('hidden');
-
-                    setTimeout(() => {
-                        refreshIcon.textContent = '🔄';
-                        refreshText.textContent = 'Refresh Deals';
-                    }, 2000);
-
-                    loadDeals();
-                }
+            const response = await fetch('/api/deals/version');
+            const version = await response.json();
+
+            if (version.version && version.version !== datasetVersion) {
+                stop();
+                finishRefresh('✓', 'Refresh Complete');
+                loadDeals();
+            } else if (Date.now() - lastActivity > 300000) {
+                // 5 minutes without a status update or a new dataset
+                stop();
+                finishRefresh('⏱️', 'Timed out - check local machine');
             }
         } catch (error) {
-            console.error('Poll error:', error);
+            console.error('Version check error:', error);
+        } finally {
+            checkingVersion = false;
         }
     }, 10000);
-
-    // Stop polling after 5 minutes
-    setTimeout(() => {
-        clearInterval(pollInterval);
-        if (refreshBtn.classList.contains('loading')) {
-            refreshBtn.classList.remove('loading');
-            refreshIcon.textContent = '⏱️';
-            refreshText.textContent = 'Timed out - check local machine';
-            progressBar.classList.add('hidden');
-
-            setTimeout(() => {
-                refreshIcon.textContent = '🔄';
-                refreshText.textContent = 'Refresh Deals';
-            }, 3000);
-        }
-    }, 300000);
 }
 
 function formatTimeAgo(date) {
@@ -0,0 +1,7 @@
+import pytest
+import database
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / 'price_history.db'))
+    database.init_database()
@@ -1,5 +1,5 @@
 import pytest
-from scrapers.amazon_au import AmazonAUScraper
+from scrapers.retailers.amazon_au import AmazonAUScraper
 
 @pytest.mark.asyncio
 async def test_amazon_scraper_initialization():
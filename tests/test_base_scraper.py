@@ -33,3 +33,23 @@ def test_standardize_deal():
     assert deal['discount_pct'] == 50
     assert 'scraped_at' in deal
     assert deal['title'] == 'Test Product'
+
+def test_standardize_deals_batch():
+    scraper = ConcreteScraper('Amazon AU')
+    raw_deals = [
+        {'asin': 'B08N5WRWNW', 'title': 'Tablet', 'price': 50, 'original_price': 100,
+         'url': 'https://aax-fe.amazon.com.au/x/c/tracking-1'},
+        {'asin': 'B07XJ8C8F5', 'title': 'Speaker', 'price': 80, 'original_price': 100,
+         'url': 'https://aax-fe.amazon.com.au/x/c/tracking-2'},
+    ]
+
+    deals = scraper.standardize_deals(raw_deals)
+
+    assert [d['discount_pct'] for d in deals] == [50, 20]
+    assert deals[0]['scraped_at'] == deals[1]['scraped_at']
+    assert deals[0]['id'].startswith('amazonau-')
+    assert deals[0]['id'] != deals[1]['id']
+
+    # The id follows the ASIN, not the tracking URL that changes every crawl
+    raw_deals[0]['url'] = 'https://aax-fe.amazon.com.au/x/c/tracking-3'
+    assert scraper.standardize_deals(raw_deals)[0]['id'] == deals[0]['id']
@@ -0,0 +1,101 @@
+from broadcast import DeltaBroadcaster, merge_batches
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def make_deal(deal_id, price=10.0, **extra):
+    deal = {'id': deal_id, 'title': f'Deal {deal_id}', 'price': price, 'original_price': 20.0,
+            'discount_pct': 50.0, 'category': 'Tech', 'scraped_at': '2025-11-20T00:00:00Z',
+            'scores': {'total': 70}}
+    deal.update(extra)
+    return deal
+
+def make_broadcaster(**kwargs):
+    sent = []
+    clock = FakeClock()
+    broadcaster = DeltaBroadcaster(lambda event, data: sent.append((event, data)), clock=clock, **kwargs)
+    return broadcaster, sent, clock
+
+def test_progress_is_coalesced_and_rate_limited():
+    broadcaster, sent, clock = make_broadcaster(interval=0.25)
+
+    broadcaster.publish_progress({'retailer': 'Amazon AU', 'page': 1, 'deals_found': 5})
+    assert len(sent) == 1  # First publish goes out immediately
+
+    clock.now = 0.1
+    broadcaster.publish_progress({'retailer': 'Amazon AU', 'page': 2, 'deals_found': 9})
+    broadcaster.publish_progress({'retailer': 'Amazon AU', 'page': 3, 'deals_found': 14})
+    assert len(sent) == 1
+
+    clock.now = 0.3
+    batch = broadcaster.flush()
+    assert len(sent) == 2
+    assert batch['seq'] == 2
+    assert batch['progress'] == [{'retailer': 'Amazon AU', 'page': 3, 'deals_found': 14}]
+    assert broadcaster.flush(force=True) is None  # Nothing pending
+
+def test_publish_deals_sends_only_changes():
+    broadcaster, sent, clock = make_broadcaster()
+    broadcaster.prime([make_deal('a'), make_deal('b'), make_deal('c')])
+
+    result = broadcaster.publish_deals([
+        make_deal('a', scraped_at='2025-11-21T00:00:00Z'),  # Re-scraped, unchanged
+        make_deal('b', price=8.0),
+        make_deal('d')
+    ])
+
+    assert result == {'changed': 2, 'removed': 1}
+    event, batch = sent[-1]
+    assert event == 'deals_delta'
+    assert sorted(deal['id'] for deal in batch['upserts']) == ['b', 'd']
+    assert batch['removed'] == ['c']
+
+def test_since_replays_missed_batches_as_one():
+    broadcaster, sent, clock = make_broadcaster()
+    broadcaster.prime([make_deal('a'), make_deal('b')])
+
+    broadcaster.publish_deals([make_deal('a', price=9.0), make_deal('b')])
+    clock.now = 1
+    broadcaster.publish_deals([make_deal('a', price=8.0)])
+    clock.now = 2
+    broadcaster.publish_deals([make_deal('a', price=8.0), make_deal('b')])
+
+    missed = broadcaster.since(0)
+    assert missed['seq'] == 3
+    assert [deal['price'] for deal in missed['upserts'] if deal['id'] == 'a'] == [8.0]
+    assert 'b' in {deal['id'] for deal in missed['upserts']}
+    assert missed['removed'] == []
+
+    assert broadcaster.since(3)['upserts'] == []
+
+def test_since_returns_none_when_batches_expired():
+    broadcaster, sent, clock = make_broadcaster(backlog=2)
+
+    for step in range(4):
+        clock.now = step
+        broadcaster.publish_progress({'retailer': 'Amazon AU', 'page': step})
+
+    assert broadcaster.since(0) is None
+    assert broadcaster.since(2)['seq'] == 4
+
+def test_merge_batches_removal_then_readd():
+    merged = merge_batches([
+        {'seq': 1, 'progress': [], 'upserts': [], 'removed': ['a']},
+        {'seq': 2, 'progress': [], 'upserts': [make_deal('a')], 'removed': []}
+    ])
+    assert merged['removed'] == []
+    assert [deal['id'] for deal in merged['upserts']] == ['a']
+
+def test_subscribe_with_malformed_since_gets_a_reset(monkeypatch):
+    import app
+
+    sent = []
+    monkeypatch.setattr(app, 'join_room', lambda room: None)
+    monkeypatch.setattr(app, 'emit', lambda event, data: sent.append((event, data)))
+
+    app.handle_subscribe({'since': 'abc'})
+    assert sent == [('deals_resume', {'seq': app.broadcaster.seq, 'reset': True})]
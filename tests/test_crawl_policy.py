@@ -0,0 +1,59 @@
+import database
+from scrapers.crawl_policy import AdaptiveCrawlPolicy
+
+def record_run(category, deals_per_page):
+    for page, deals in enumerate(deals_per_page, start=1):
+        database.save_page_yield('Amazon AU', category, page, 48, deals)
+
+def test_plan_uses_default_without_history(temp_db):
+    policy = AdaptiveCrawlPolicy(page_budget=50)
+    policy.start_run('Amazon AU', ['Gaming'], default_pages=3)
+
+    assert policy.planned['Gaming'] == 3
+
+def test_plan_follows_yield_history(temp_db):
+    record_run('Gaming', [20, 15, 12, 9])      # Still yielding at the deepest page
+    record_run('Automotive', [6, 1, 0])        # Dries up after page 1
+
+    policy = AdaptiveCrawlPolicy(page_budget=50, min_yield=3)
+    policy.start_run('Amazon AU', ['Gaming', 'Automotive'], default_pages=3)
+
+    assert policy.planned['Gaming'] == 5       # One page beyond known good depth
+    assert policy.planned['Automotive'] == 1
+
+def test_stops_early_on_thin_page(temp_db):
+    policy = AdaptiveCrawlPolicy(page_budget=50, min_yield=3)
+    policy.start_run('Amazon AU', ['Gaming'], default_pages=5)
+
+    assert policy.should_fetch('Gaming', 1)
+    assert policy.should_fetch('Gaming', 2, last_page_deals=10)
+    assert not policy.should_fetch('Gaming', 3, last_page_deals=1)
+
+def test_budget_reserves_pages_for_pending_categories(temp_db):
+    categories = ['Gaming', 'Electronics', 'Automotive']
+    policy = AdaptiveCrawlPolicy(page_budget=4, min_yield=3)
+    policy.start_run('Amazon AU', categories, default_pages=3)
+
+    policy.record_page('Gaming', 1, 48, 20)
+    policy.record_page('Gaming', 2, 48, 20)
+
+    # Two pages left, both reserved for the categories still to crawl
+    assert not policy.should_fetch('Gaming', 3, last_page_deals=20)
+    policy.finish_category('Gaming')
+    assert policy.should_fetch('Electronics', 1)
+
+def test_record_page_persists_yield(temp_db):
+    policy = AdaptiveCrawlPolicy(page_budget=10)
+    policy.start_run('Amazon AU', ['Gaming'])
+    policy.record_page('Gaming', 1, 48, 12)
+    policy.record_page('Gaming', 2, 0, 0, fetched=False)
+
+    assert policy.pages_used == 2
+    assert database.get_page_yields('Amazon AU', 'Gaming') == {1: [12]}
+
+def test_page_yields_read_only_recent_runs(temp_db):
+    for deals_found in range(8):
+        database.save_page_yield('Amazon AU', 'Gaming', 1, 48, deals_found)
+    database.save_page_yield('Amazon AU', 'Gaming', 2, 48, 30)
+
+    assert database.get_page_yields('Amazon AU', 'Gaming', runs=3) == {1: [7, 6, 5], 2: [30]}
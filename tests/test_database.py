@@ -0,0 +1,102 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+import database
+
+def create_deal(price, original_price=200):
+    return {
+        'asin': 'B08N5WRWNW',
+        'retailer': 'Amazon AU',
+        'price': price,
+        'original_price': original_price,
+        'title': 'Samsung Galaxy Tab',
+        'url': 'https://www.amazon.com.au/dp/B08N5WRWNW'
+    }
+
+def test_daily_rollups_maintained_on_insert(temp_db):
+    day = datetime.now(timezone.utc).replace(hour=1, minute=0, second=0, microsecond=0)
+    for hour, price in enumerate([120, 100, 110]):
+        database.save_price_snapshots([create_deal(price)], timestamp=day + timedelta(hours=hour))
+
+    history = database.get_price_history('B08N5WRWNW', 'Amazon AU', days=30)
+
+    assert len(history) == 1
+    assert history[0]['min_price'] == 100
+    assert history[0]['max_price'] == 120
+    assert history[0]['avg_price'] == 110
+    assert history[0]['price'] == 110  # Last price of the day
+
+def test_short_windows_read_raw_points(temp_db):
+    now = datetime.now(timezone.utc)
+    database.save_price_snapshots([create_deal(120)], timestamp=now - timedelta(hours=2))
+    database.save_price_snapshots([create_deal(100)], timestamp=now - timedelta(hours=1))
+
+    history = database.get_price_history('B08N5WRWNW', 'Amazon AU', days=1)
+
+    assert [h['price'] for h in history] == [100, 120]
+
+def test_products_stored_once(temp_db):
+    now = datetime.now(timezone.utc)
+    for hours in range(5):
+        database.save_price_snapshots([create_deal(100 + hours)], timestamp=now - timedelta(hours=hours))
+
+    stats = database.get_database_stats()
+
+    assert stats['unique_products'] == 1
+    assert stats['total_records'] == 5
+
+def test_compaction_keeps_rollups(temp_db):
+    now = datetime.now(timezone.utc)
+    database.save_price_snapshots([create_deal(150)], timestamp=now - timedelta(days=60))
+    database.save_price_snapshots([create_deal(100)], timestamp=now)
+
+    removed = database.compact_price_history(raw_days=14)
+    stats = database.get_database_stats()
+
+    assert removed == 1
+    assert stats['total_records'] == 1
+    assert stats['rollup_records'] == 2
+    assert len(database.get_price_history('B08N5WRWNW', 'Amazon AU', days=90)) == 2
+
+def test_legacy_table_is_migrated(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'legacy.db')
+    monkeypatch.setattr(database, 'DB_PATH', db_path)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+        CREATE TABLE price_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, asin TEXT, retailer TEXT, price REAL,
+            original_price REAL, title TEXT, url TEXT, timestamp DATETIME
+        )
+    ''')
+    conn.execute('INSERT INTO price_history (asin, retailer, price, original_price, title, url, timestamp) '
+                 'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                 ('B08N5WRWNW', 'Amazon AU', 99.0, 199.0, 'Tab', 'u', datetime.now().isoformat()))
+    conn.commit()
+    conn.close()
+
+    database.init_database()
+
+    assert database.get_database_stats()['total_records'] == 1
+    assert database.get_price_history('B08N5WRWNW', 'Amazon AU', days=30)[0]['price'] == 99.0
+
+def test_price_series_and_history_version(temp_db):
+    now = datetime.now(timezone.utc)
+    version = database.get_history_version()
+
+    database.save_price_snapshots([create_deal(120)], timestamp=now - timedelta(hours=2))
+    database.save_price_snapshots([create_deal(100)], timestamp=now - timedelta(hours=1))
+
+    series = database.get_price_series('B08N5WRWNW', 'Amazon AU', days=database.RAW_QUERY_MAX_DAYS)
+    assert [price for _, price in series] == [120, 100]
+    # Longer windows switch to the daily rollups at the same threshold as get_price_history
+    assert database.get_price_series('B08N5WRWNW', 'Amazon AU', days=7)[-1][1] == 100
+    assert database.get_history_version() == version + 2
+    assert database.get_price_series('B000000000', 'Amazon AU') == []
+
+def test_database_created_lazily_on_first_use(tmp_path, monkeypatch):
+    db_path = tmp_path / 'nested' / 'price_history.db'
+    monkeypatch.setattr(database, 'DB_PATH', str(db_path))
+
+    assert not db_path.exists()
+    assert database.get_database_stats()['total_records'] == 0
+    assert db_path.exists()
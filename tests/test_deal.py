@@ -0,0 +1,56 @@
+import pytest
+from analyzer.scorer import DealScorer
+from scrapers.deal import Deal
+
+def create_deal():
+    return Deal(
+        id='amazonau-0123456789ab',
+        title='Test Product',
+        price=50.0,
+        original_price=100.0,
+        discount_pct=50.0,
+        url='https://www.amazon.com.au/dp/B08N5WRWNW',
+        image='',
+        rating=4.5,
+        review_count=120,
+        category='Electronics',
+        retailer='Amazon AU',
+        scraped_at='2025-11-20T13:43:38Z',
+        asin='B08N5WRWNW'
+    )
+
+def test_deal_has_no_instance_dict():
+    deal = create_deal()
+    assert not hasattr(deal, '__dict__')
+
+def test_dict_style_access():
+    deal = create_deal()
+
+    assert deal['title'] == 'Test Product'
+    assert deal.get('category') == 'Electronics'
+    assert deal.get('scores', {}) == {}
+    assert 'price' in deal
+    assert 'scores' not in deal
+
+    deal['category'] = 'Gaming'
+    assert deal.category == 'Gaming'
+
+    with pytest.raises(KeyError):
+        deal['not_a_field']
+
+def test_json_round_trip():
+    deal = create_deal()
+    deal.scores = DealScorer().score(deal)
+
+    data = deal.to_dict()
+
+    assert data['scores']['total'] == deal.scores.total
+    assert 'raw_url' not in data
+    assert 'group_id' not in data
+    assert Deal.from_dict(data) == deal
+
+def test_scorer_accepts_records_and_dicts():
+    scorer = DealScorer()
+    deal = create_deal()
+
+    assert scorer.score(deal).to_dict() == scorer.score_deal(deal.to_dict())
@@ -0,0 +1,267 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import os
+import subprocess
+import sys
+import threading
+import time
+import pytest
+from werkzeug.serving import make_server
+from scrapers.retailers.amazon_au import AmazonAUScraper
+from scrapers.base import BaseScraper
+from scrapers.distributed import CrawlCoordinator, ScrapeWorker, WorkQueue, sign_payload, verify_signature
+from scrapers.egress import EgressPool
+from scrapers.scheduler import FetchScheduler
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def make_unit(unit_id, category='Gaming', page=1):
+    return {'id': unit_id, 'scraper': 'AmazonAUScraper', 'retailer': 'Amazon AU',
+            'category': category, 'page': page, 'url': f'https://example.com/{unit_id}'}
+
+def make_raw_deal(asin, price=50.0, original_price=100.0, category='Gaming'):
+    return {'title': f'Product {asin}', 'price': price, 'original_price': original_price,
+            'url': f'https://www.amazon.com.au/dp/{asin}', 'image': '', 'rating': 4.5,
+            'review_count': 10, 'category': category, 'asin': asin}
+
+def make_scraper(base_url='https://www.amazon.com.au', categories=2):
+    scraper = AmazonAUScraper()
+    scraper.base_url = base_url
+    scraper.deals_categories = scraper.deals_categories[:categories]
+    return scraper
+
+def test_signatures():
+    signature = sign_payload(b'{"a": 1}', 'secret')
+    assert verify_signature(b'{"a": 1}', signature, 'secret')
+    assert not verify_signature(b'{"a": 2}', signature, 'secret')
+    assert not verify_signature(b'{"a": 1}', '', 'secret')
+
+def test_expired_lease_is_reassigned():
+    clock = FakeClock()
+    queue = WorkQueue(lease_seconds=60, clock=clock)
+    queue.add(make_unit('u1'))
+    queue.add(make_unit('u2'))
+
+    assert [unit['id'] for unit in queue.lease('dead-worker', 2)] == ['u1', 'u2']
+    assert queue.lease('live-worker') == []
+
+    clock.now = 61
+    assert [unit['id'] for unit in queue.lease('live-worker', 2)] == ['u1', 'u2']
+    assert queue.complete('live-worker', 'u1', 20, [])
+
+    # The dead worker coming back late still counts, but only once
+    assert queue.complete('dead-worker', 'u2', 20, [])
+    assert not queue.complete('live-worker', 'u2', 20, [])
+    assert queue.done
+
+def test_failed_unit_is_retried_then_given_up():
+    queue = WorkQueue(max_attempts=2)
+    queue.add(make_unit('u1'))
+
+    queue.lease('w1')
+    queue.fail('w1', 'u1', 'blocked')
+    queue.lease('w2')
+    queue.fail('w2', 'u1', 'blocked')
+
+    assert queue.done
+    assert queue.failed == {'u1': 'blocked'}
+
+def test_thin_page_cancels_deeper_pages_and_merge_deduplicates():
+    coordinator = CrawlCoordinator(lambda: [make_scraper(categories=2)], pages_per_category=3)
+    assert coordinator.start_crawl() == 6
+
+    # Breadth-first: both first pages go out before any page 2
+    leased = coordinator.lease('w1', 2)['units']
+    assert [unit['page'] for unit in leased] == [1, 1]
+
+    gaming, electronics = leased
+    coordinator.complete('w1', gaming['id'], 3, [make_raw_deal(f'B00000000{i}') for i in range(3)])
+    # Electronics page 1 only has a 5%-off deal: pages 2 and 3 are cancelled
+    coordinator.complete('w1', electronics['id'], 1, [make_raw_deal('B00000001A', price=95.0)])
+    assert coordinator.queue.status()['cancelled'] == 2
+
+    remaining = coordinator.lease('w2', 10)['units']
+    assert [(unit['category'], unit['page']) for unit in remaining] == [('Gaming', 2), ('Gaming', 3)]
+    coordinator.complete('w2', remaining[0]['id'], 3, [make_raw_deal('B000000000'), make_raw_deal('B00000000X')])
+    coordinator.complete('w2', remaining[1]['id'], 0, [])
+    assert not coordinator.active
+
+    deals = coordinator.merge()
+    assert [deal.asin for deal in deals] == ['B000000000', 'B000000001', 'B000000002', 'B00000000X']
+
+def test_only_distributed_scrapers_are_planned():
+    class LocalOnlyScraper(BaseScraper):
+        deals_categories = [('laptops', 'Laptops')]
+
+        def __init__(self):
+            super().__init__('Local Only')
+
+        async def scrape(self):
+            return []
+
+    coordinator = CrawlCoordinator(lambda: [LocalOnlyScraper(), make_scraper(categories=1)], pages_per_category=2)
+    assert coordinator.start_crawl() == 2
+    assert list(coordinator.scrapers) == ['Amazon AU']
+
+def test_worker_resets_per_crawl_state_when_a_new_crawl_starts(monkeypatch):
+    import asyncio
+    from scrapers.parse_errors import PARSE_ERRORS
+
+    coordinator = CrawlCoordinator(lambda: [make_scraper(categories=1)], pages_per_category=1)
+    coordinator.start_crawl()
+    first = coordinator.lease('w1')
+    coordinator.start_crawl()
+    second = coordinator.lease('w1')
+    assert first['crawl'] and first['crawl'] != second['crawl']
+
+    worker = ScrapeWorker('http://coordinator.example', 'secret')
+    worker.scheduler = FetchScheduler()
+    worker.egress = EgressPool()
+    budget = worker.scheduler.configure('www.amazon.com.au', requests_per_second=2.0)
+    budget.pages_used = 500
+    worker.scheduler.back_off('www.amazon.com.au')
+
+    worker.crawl_id = first['crawl']
+    PARSE_ERRORS.record('Amazon AU', 'no_price')
+
+    def save_fails():
+        raise OSError('disk full')
+    monkeypatch.setattr(PARSE_ERRORS, 'save', save_fails)
+
+    # The previous crawl's parse errors are reported (a failed save is not fatal), then cleared
+    asyncio.run(worker.start_crawl(second['crawl']))
+    assert worker.crawl_id == second['crawl']
+    assert budget.pages_used == 0
+    assert budget.requests_per_second == 2.0
+    assert PARSE_ERRORS.counts == {}
+
+class ResultsPageHandler(BaseHTTPRequestHandler):
+    """Amazon-like results pages: three discounted cards per (term, page)"""
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        term = query['k'][0].split()[0]
+        page = int(query['page'][0])
+        time.sleep(0.1)
+
+        cards = []
+        for index in range(3):
+            asin = f'B{abs(hash(term)) % 1000:03d}{page:02d}{index:04d}'
+            cards.append(f'''
+                <div data-asin="{asin}">
+                    <a href="/dp/{asin}">link</a>
+                    <img src="https://example.com/{asin}.jpg" alt="{term} product {page}-{index}" />
+                    <span class="a-price-whole">50</span><span class="a-price-fraction">00</span>
+                    <span class="a-text-price"><span>$100.00</span></span>
+                </div>''')
+
+        body = ('<html><body>' + ''.join(cards) + '</body></html>').encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def test_crawl_with_two_worker_processes(monkeypatch, tmp_path):
+    import local_scraper_service
+
+    pages = ThreadingHTTPServer(('127.0.0.1', 0), ResultsPageHandler)
+    threading.Thread(target=pages.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{pages.server_address[1]}'
+
+    coordinator = CrawlCoordinator(lambda: [make_scraper(base_url, categories=2)], pages_per_category=2)
+    monkeypatch.setattr(local_scraper_service, 'SCRAPER_MODE', 'coordinator')
+    monkeypatch.setattr(local_scraper_service, '_coordinator', coordinator)
+    server = make_server('127.0.0.1', 0, local_scraper_service.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    coordinator_url = f'http://127.0.0.1:{server.server_port}'
+
+    try:
+        assert coordinator.start_crawl() == 4
+        workers = [
+            subprocess.Popen(
+                [sys.executable, os.path.join(REPO_ROOT, 'local_scraper_service.py'), '--mode', 'worker',
+                 '--coordinator', coordinator_url, '--exit-when-idle'],
+                # Run from a scratch directory, so the workers' data/ output stays out of the repo
+                cwd=tmp_path, env=dict(os.environ, PYTHONPATH=REPO_ROOT), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+            )
+            for _ in range(2)
+        ]
+        for worker in workers:
+            output, _ = worker.communicate(timeout=60)
+            assert worker.returncode == 0, output
+
+        assert coordinator.queue.status()['completed'] == 4
+        assert len(coordinator.workers) == 2
+        deals = coordinator.merge()
+        assert len(deals) == 12
+        assert len({deal.asin for deal in deals}) == 12
+    finally:
+        server.shutdown()
+        pages.shutdown()
+
+class FlakyCoordinator(CrawlCoordinator):
+    """Answers 500 (via an exception in the route) to the first register, the second lease and the first complete"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = {'register': 0, 'lease': 0, 'complete': 0}
+
+    def _flake(self, name, on_call):
+        self.calls[name] += 1
+        if self.calls[name] == on_call:
+            raise RuntimeError(f'{name} unavailable')
+
+    def register(self, *args, **kwargs):
+        self._flake('register', 1)
+        return super().register(*args, **kwargs)
+
+    def lease(self, *args, **kwargs):
+        self._flake('lease', 2)
+        return super().lease(*args, **kwargs)
+
+    def complete(self, *args, **kwargs):
+        self._flake('complete', 1)
+        return super().complete(*args, **kwargs)
+
+def test_worker_survives_coordinator_errors(monkeypatch, tmp_path):
+    import asyncio
+    import local_scraper_service
+    from scrapers.parse_errors import PARSE_ERRORS
+
+    monkeypatch.setattr(PARSE_ERRORS, 'directory', str(tmp_path / 'parse_errors'))
+
+    pages = ThreadingHTTPServer(('127.0.0.1', 0), ResultsPageHandler)
+    threading.Thread(target=pages.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{pages.server_address[1]}'
+
+    coordinator = FlakyCoordinator(lambda: [make_scraper(base_url, categories=1)], pages_per_category=2,
+                                   lease_seconds=0.5)
+    monkeypatch.setattr(local_scraper_service, 'SCRAPER_MODE', 'coordinator')
+    monkeypatch.setattr(local_scraper_service, '_coordinator', coordinator)
+    server = make_server('127.0.0.1', 0, local_scraper_service.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        assert coordinator.start_crawl() == 2
+        worker = ScrapeWorker(f'http://127.0.0.1:{server.server_port}', local_scraper_service.WEBHOOK_SECRET,
+                              batch_size=2, idle_seconds=0.05)
+        asyncio.run(asyncio.wait_for(worker.run(exit_when_idle=True), timeout=30))
+
+        # The failed register, lease and complete were all retried; the unreported unit was leased again
+        assert coordinator.calls['register'] >= 2
+        assert coordinator.queue.status()['completed'] == 2
+        assert len(coordinator.merge()) == 6
+    finally:
+        server.shutdown()
+        pages.shutdown()
@@ -0,0 +1,26 @@
+from analyzer.downsample import lttb, min_max
+
+SERIES = [(ts, 100.0) for ts in range(100)]
+SERIES[40] = (40, 60.0)   # Flash sale dip
+SERIES[70] = (70, 150.0)  # Pre-sale price hike
+
+def test_lttb_keeps_endpoints_and_extremes():
+    sampled = lttb(SERIES, 10)
+
+    assert len(sampled) == 10
+    assert sampled[0] == SERIES[0]
+    assert sampled[-1] == SERIES[-1]
+    assert (40, 60.0) in sampled
+    assert (70, 150.0) in sampled
+
+def test_min_max_keeps_extremes_in_time_order():
+    sampled = min_max(SERIES, 10)
+
+    assert (40, 60.0) in sampled
+    assert (70, 150.0) in sampled
+    assert sampled == sorted(sampled)
+    assert len(sampled) <= 10
+
+def test_short_series_returned_unchanged():
+    assert lttb(SERIES[:5], 10) == SERIES[:5]
+    assert min_max(SERIES[:5], 10) == SERIES[:5]
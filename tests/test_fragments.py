@@ -0,0 +1,74 @@
+import gzip
+import json
+import re
+from fragments import CardFragments
+from snapshot import DealSnapshot, write_snapshot
+
+def make_deal(index, total, discount_pct=30, rating=4.5, category='Audio', title=None):
+    return {'id': f'deal-{index}', 'title': title or f'Product {index}', 'price': 50.0, 'original_price': 80.0,
+            'discount_pct': discount_pct, 'url': f'https://example.com/{index}', 'image': '', 'rating': rating,
+            'review_count': 12, 'retailer': 'Amazon AU', 'category': category, 'scores': {'total': total}}
+
+def build(tmp_path, deals, page_size=2):
+    import app
+
+    categories = {}
+    for deal in deals:
+        categories.setdefault(deal['category'], []).append(deal['id'])
+    path = str(tmp_path / 'deals.snapshot')
+    write_snapshot({'deals': deals, 'categories': categories}, path, source_mtime=1.0)
+    return CardFragments(DealSnapshot(path), app.app.jinja_env.get_template('_deal_card.html'), page_size=page_size)
+
+def card_ids(html):
+    return re.findall(r'data-id="([^"]+)"', html.decode() if isinstance(html, bytes) else html)
+
+def test_pages_are_sorted_by_score_and_filtered(tmp_path):
+    deals = [make_deal(0, 40), make_deal(1, 90, discount_pct=10), make_deal(2, 70),
+             make_deal(3, 80, rating=3.0), make_deal(4, 99, category='Gaming')]
+    fragments = build(tmp_path, deals)
+
+    first = fragments.page('Audio', 0)
+    assert (first['total'], first['pages']) == (4, 2)
+    assert card_ids(first['html']) == ['deal-1', 'deal-3']
+    assert card_ids(fragments.page('Audio', 1)['html']) == ['deal-2', 'deal-0']
+    assert gzip.decompress(first['gzip']) == first['html']
+
+    filtered = fragments.page('Audio', 0, min_discount=20, min_rating=4)
+    assert filtered['total'] == 2
+    assert card_ids(filtered['html']) == ['deal-2', 'deal-0']
+    assert fragments.page('Nope', 0)['total'] == 0
+
+def test_cards_are_rendered_once_and_escaped(tmp_path):
+    fragments = build(tmp_path, [make_deal(0, 50, title='<script>alert(1)</script> Headphones')])
+
+    html = fragments.page('Audio', 0)['html'].decode()
+    assert '<script>' not in html
+    assert '&lt;script&gt;' in html
+    assert '$50.00' in html and '$80.00' in html and '30% off' in html
+    assert '★★★★★' in html  # 4.5 rounds up, as in the client
+
+    assert fragments.page('Audio', 0, min_rating=1) is not fragments.page('Audio', 0)
+    assert len(fragments._cards) == 1
+
+def test_cards_endpoint_is_compressed_and_revalidates(tmp_path, monkeypatch):
+    import app
+
+    deals = [make_deal(index, index) for index in range(60)]
+    cache = tmp_path / 'deals_cache.json'
+    cache.write_text(json.dumps({'deals': deals, 'categories': {'Audio': [deal['id'] for deal in deals]}}))
+    monkeypatch.setattr(app, 'CACHE_FILE', str(cache))
+    client = app.app.test_client()
+
+    response = client.get('/api/deals/cards?category=Audio', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['X-Total-Count'] == '60'
+    assert response.headers['X-Page-Count'] == '2'
+    assert card_ids(gzip.decompress(response.data))[:2] == ['deal-59', 'deal-58']
+
+    again = client.get('/api/deals/cards?category=Audio', headers={'Accept-Encoding': 'gzip',
+                                                                   'If-None-Match': response.headers['ETag']})
+    assert again.status_code == 304
+
+    plain = client.get('/api/deals/cards?category=Audio&page=1')
+    assert 'Content-Encoding' not in plain.headers
+    assert len(card_ids(plain.data)) == 12
@@ -0,0 +1,131 @@
+import json
+from local_link import LocalLink
+from scrapers.distributed import verify_signature
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=None):
+        self.status_code = status_code
+        self.body = body or {}
+
+    def json(self):
+        return self.body
+
+class FakeClient:
+    def __init__(self, response=None, error=None):
+        self.response = response or FakeResponse()
+        self.error = error
+        self.requests = []
+
+    def get(self, url):
+        return self._request('GET', url, None, {})
+
+    def post(self, url, content=None, headers=None):
+        return self._request('POST', url, content, headers)
+
+    def _request(self, method, url, content, headers):
+        self.requests.append((method, url, content, headers))
+        if self.error:
+            raise self.error
+        return self.response
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def make_link(client, clock=None, deferred=None):
+    """Background tasks run inline (the heartbeat as one check), or are queued in `deferred`"""
+    def spawn(target, *args):
+        if deferred is not None:
+            deferred.append((target, args))
+        else:
+            (link.check if target.__name__ == '_heartbeat' else target)(*args)
+
+    link = LocalLink('http://local:5002', 'secret', ttl_seconds=30, spawn=spawn,
+                     clock=clock or Clock(), client=client)
+    return link
+
+def test_health_is_served_from_cache_until_ttl():
+    client = FakeClient(FakeResponse(body={'status': 'online', 'service': 'local-scraper'}))
+    clock = Clock()
+    link = make_link(client, clock)
+
+    assert link.health()['status'] == 'online'
+    clock.now = 20
+    health = link.health()
+    assert health['status'] == 'online'
+    assert health['age_seconds'] == 20
+    assert health['local_data']['service'] == 'local-scraper'
+    assert len(client.requests) == 1
+
+    clock.now = 31
+    link.health()
+    assert len(client.requests) == 2
+
+def test_health_never_waits_for_the_link():
+    deferred = []
+    link = make_link(FakeClient(), deferred=deferred)
+
+    assert link.health()['status'] == 'unknown'
+    assert link.health()['status'] == 'unknown'
+    # Only the heartbeat is queued (its first check is already on the way), no request made yet
+    assert [target.__name__ for target, _ in deferred] == ['_heartbeat']
+
+def test_failed_check_marks_offline():
+    class ConnectTimeout(Exception):
+        pass
+
+    link = make_link(FakeClient(error=ConnectTimeout('timed out')))
+    health = link.health()
+    assert health['status'] == 'offline'
+    assert health['message'] == 'Local machine unreachable (timeout)'
+
+def test_post_signed_reports_result():
+    client = FakeClient(FakeResponse(202, {'status': 'accepted'}))
+    link = make_link(client)
+    results = []
+
+    link.post_signed('/webhook/trigger', {'timestamp': 'now'}, lambda result, error: results.append((result, error)))
+
+    method, url, content, headers = client.requests[0]
+    assert (method, url) == ('POST', 'http://local:5002/webhook/trigger')
+    assert json.loads(content) == {'timestamp': 'now'}
+    assert verify_signature(content, headers['X-Webhook-Signature'], 'secret')
+    assert results == [({'status': 'accepted'}, None)]
+
+def test_post_signed_reports_errors():
+    link = make_link(FakeClient(FakeResponse(500)))
+    results = []
+    link.post_signed('/webhook/trigger', {}, lambda result, error: results.append(error))
+    assert results == ['Local machine returned 500']
+
+    link = make_link(FakeClient(error=ConnectionError('refused')))
+    link.post_signed('/webhook/trigger', {}, lambda result, error: results.append(error))
+    assert results[-1] == 'refused'
+    assert link.health()['status'] == 'offline'
+
+def test_trigger_failure_becomes_job_status(monkeypatch):
+    import app
+
+    deferred = []
+    link = make_link(FakeClient(error=ConnectionError('refused')), deferred=deferred)
+    monkeypatch.setattr(app, 'local_link', link)
+    client = app.app.test_client()
+    version = app._job_status['version']
+
+    # Health isn't known yet, so the trigger is sent (later) rather than refused
+    response = client.post('/api/trigger-local-scrape')
+    assert response.status_code == 202
+    [(send, args)] = [(target, args) for target, args in deferred if target.__name__ == '_send']
+    send(*args)
+
+    status = client.get('/api/scrape-status').get_json()
+    assert status['version'] == version + 1
+    assert status['status']['stage'] == 'failed'
+    assert status['status']['error'] == 'refused'
+
+    # Now known to be offline: later triggers are refused without a send
+    assert client.post('/api/trigger-local-scrape').status_code == 503
+    assert client.get('/api/check-local-status').status_code == 503
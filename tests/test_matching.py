@@ -0,0 +1,63 @@
+from analyzer.matching import ProductMatcher, model_tokens, normalize_title
+
+def make_deal(deal_id, title, retailer, price, asin=''):
+    return {'id': deal_id, 'title': title, 'retailer': retailer, 'price': price, 'asin': asin}
+
+def test_normalize_title_joins_measures_and_drops_filler():
+    assert normalize_title('NEW Samsung 256 GB microSD Card (Genuine AU Stock)') == \
+        ['samsung', '256gb', 'microsd', 'card']
+
+def test_model_tokens_skip_measures():
+    assert model_tokens(['sony', 'wh', '1000xm5', '256gb', '4k']) == {'1000xm5'}
+
+def test_matches_same_product_across_retailers():
+    matcher = ProductMatcher()
+    amazon = make_deal('amazonau-1', 'Sony WH-1000XM5 Wireless Noise Cancelling Headphones Black',
+                       'Amazon AU', 398.0, 'B09Y2MYL5C')
+    jbhifi = make_deal('jbhifi-1', 'Sony WH1000XM5 Noise Cancelling Wireless Headphones (Black)',
+                       'JB Hi-Fi', 379.0)
+
+    matcher.add(amazon)
+    assert matcher.add(jbhifi) == matcher.group_id('amazonau-1')
+
+    [group] = matcher.groups()
+    assert group['best_deal_id'] == 'jbhifi-1'
+    assert group['best_price'] == 379.0
+    assert group['retailers'] == ['Amazon AU', 'JB Hi-Fi']
+
+def test_different_model_numbers_are_not_matched():
+    matcher = ProductMatcher()
+    matcher.add_many([
+        make_deal('amazonau-1', 'Sony WH-1000XM5 Wireless Headphones', 'Amazon AU', 398.0),
+        make_deal('jbhifi-1', 'Sony WH-1000XM4 Wireless Headphones', 'JB Hi-Fi', 298.0)
+    ])
+    assert matcher.groups() == []
+
+def test_same_retailer_listings_stay_separate():
+    matcher = ProductMatcher()
+    matcher.add_many([
+        make_deal('amazonau-1', 'Anker USB C Charger 65W', 'Amazon AU', 49.0, 'B0AAAAAAA1'),
+        make_deal('amazonau-2', 'Anker USB C Charger 65W', 'Amazon AU', 45.0, 'B0AAAAAAA2')
+    ])
+    assert matcher.groups() == []
+
+def test_groups_merge_transitively_and_incrementally():
+    matcher = ProductMatcher()
+    matcher.add(make_deal('amazonau-1', 'LEGO Star Wars Millennium Falcon 75375', 'Amazon AU', 129.0))
+    matcher.add(make_deal('bigw-1', 'LEGO 75375 Star Wars Millennium Falcon', 'Big W', 119.0))
+    matcher.add(make_deal('target-1', 'Lego Star Wars 75375 Millennium Falcon Building Kit', 'Target', 124.0))
+
+    [group] = matcher.groups()
+    assert group['id'] == 'grp-amazonau-1'
+    assert group['deal_ids'] == ['bigw-1', 'target-1', 'amazonau-1']
+    assert group['max_price'] == 129.0
+
+def test_model_less_listing_does_not_bridge_different_models():
+    matcher = ProductMatcher()
+    matcher.add(make_deal('amazonau-1', 'Sony WH-1000XM5 Wireless Noise Cancelling Headphones Black', 'Amazon AU', 398.0))
+    matcher.add(make_deal('jbhifi-1', 'Sony Wireless Noise Cancelling Headphones Black', 'JB Hi-Fi', 379.0))
+    # Close enough to the model-less listing on its own, but its group names the XM5
+    matcher.add(make_deal('bigw-1', 'Sony WH-1000XM4 Wireless Noise Cancelling Headphones Black', 'Big W', 298.0))
+
+    assert [group['deal_ids'] for group in matcher.groups()] == [['jbhifi-1', 'amazonau-1']]
+    assert matcher.group_id('bigw-1') == 'grp-bigw-1'
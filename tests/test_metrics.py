@@ -0,0 +1,57 @@
+import json
+from metrics import MetricsRegistry, timed
+
+def test_histogram_prometheus_output():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('fetch_seconds', 'Fetch latency', buckets=(0.1, 1))
+
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    output = registry.render_prometheus()
+
+    assert '# TYPE fetch_seconds histogram' in output
+    assert 'fetch_seconds_bucket{le="0.1"} 1' in output
+    assert 'fetch_seconds_bucket{le="1"} 2' in output
+    assert 'fetch_seconds_bucket{le="+Inf"} 3' in output
+    assert 'fetch_seconds_count 3' in output
+
+def test_counter_labels():
+    registry = MetricsRegistry()
+    responses = registry.counter('responses_total', 'Responses', ('status',))
+
+    responses.inc(status=200)
+    responses.inc(status=200)
+    responses.inc(status=503)
+
+    output = registry.render_prometheus()
+
+    assert 'responses_total{status="200"} 2' in output
+    assert 'responses_total{status="503"} 1' in output
+
+def test_run_summary_only_covers_current_run(tmp_path):
+    registry = MetricsRegistry()
+    histogram = registry.histogram('parse_seconds', 'Parse time', buckets=(0.01, 0.1))
+    retries = registry.counter('retries_total', 'Retries')
+
+    histogram.observe(0.05)
+    retries.inc()
+
+    registry.start_run()
+    with timed(histogram):
+        pass
+    retries.inc(2)
+
+    summary = registry.run_summary()
+
+    assert summary['parse_seconds']['count'] == 1
+    assert summary['parse_seconds']['p50'] == 0.01
+    assert summary['retries_total'] == {'total': 2}
+
+    path = registry.save_run_summary(str(tmp_path / 'deals_cache.json'))
+    with open(path) as f:
+        saved = json.load(f)
+
+    assert path.endswith('scrape_metrics.json')
+    assert saved['metrics']['retries_total'] == {'total': 2}
@@ -0,0 +1,54 @@
+from scrapers.retailers.amazon_au import AMAZON_PAGE_CLASSIFIER
+from scrapers.page_check import (PAGE_BLOCKED, PAGE_EMPTY, PAGE_NO_RESULTS, PAGE_OK, PAGE_TRUNCATED,
+                                 PageClassifier)
+from scrapers.scheduler import FetchScheduler
+
+PADDING = b'<script>var x = 1;</script>' * 200
+
+def test_results_page_is_ok():
+    page = b'<html>' + PADDING + b'<div data-asin="" class="ad"></div><div data-asin="B08N5WRWNW">Tab</div></html>'
+    assert AMAZON_PAGE_CLASSIFIER.classify(page) == PAGE_OK
+
+def test_robot_check_is_blocked():
+    page = (b'<html><h4>Enter the characters you see below</h4>'
+            b"<p>Sorry, we just need to make sure you're not a robot.</p>"
+            b'<form method="get" action="/errors/validateCaptcha"></form></html>')
+    assert AMAZON_PAGE_CLASSIFIER.classify(page) == PAGE_BLOCKED
+
+def test_results_win_over_block_markers_elsewhere_on_the_page():
+    page = b'<div data-asin="B08N5WRWNW"></div>' + PADDING + b'api-services-support@amazon.com'
+    assert AMAZON_PAGE_CLASSIFIER.classify(page) == PAGE_OK
+
+def test_empty_pages():
+    no_results = b'<html>' + PADDING + b'<span>No results for</span> <span>"widgets deal"</span></html>'
+    assert AMAZON_PAGE_CLASSIFIER.classify(no_results) == PAGE_EMPTY
+    # A full page with no containers and no explanation: most likely a layout change
+    assert AMAZON_PAGE_CLASSIFIER.classify(b'<html>' + PADDING + b'</html>') == PAGE_NO_RESULTS
+    assert AMAZON_PAGE_CLASSIFIER.classify(b'<html></html>') == PAGE_TRUNCATED
+
+def test_block_markers_only_scanned_near_the_top():
+    classifier = PageClassifier([b'captcha'], rb'data-asin="B', block_scan_bytes=100)
+    assert classifier.classify(b'captcha' + b' ' * 5000) == PAGE_BLOCKED
+    assert classifier.classify(b' ' * 5000 + b'captcha') == PAGE_NO_RESULTS
+
+def test_back_off_and_recover():
+    clock = [100.0]
+    scheduler = FetchScheduler(clock=lambda: clock[0])
+    budget = scheduler.configure('example.com', requests_per_second=2.0)
+
+    scheduler.back_off('example.com', cooldown=30)
+    scheduler.back_off('example.com')
+    assert budget.requests_per_second == 0.5
+    assert budget.next_request_at == 130
+
+    for _ in range(20):
+        scheduler.recover('example.com')
+    assert budget.requests_per_second == 2.0  # Never above the configured rate
+
+    for _ in range(10):
+        scheduler.back_off('example.com')
+    assert budget.requests_per_second == 0.1  # Floor
+
+    scheduler.start_run()
+    assert budget.requests_per_second == 2.0
+    scheduler.back_off('unknown.example')  # No limits declared: nothing to slow down
@@ -0,0 +1,55 @@
+import json
+import os
+from bs4 import BeautifulSoup
+from scrapers.retailers.amazon_au import AmazonAUScraper
+from scrapers.parse_errors import ParseErrorLog, PARSE_ERRORS
+
+def make_card(price='599'):
+    html = f'''
+    <div data-asin="B08N5WRWNW">
+        <a href="/dp/B08N5WRWNW"><img src="x.jpg" alt="Samsung Galaxy Tab" /></a>
+        <span class="a-price-whole">{price}</span>
+    </div>
+    '''
+    return BeautifulSoup(html, 'html.parser').find('div')
+
+def test_counts_by_reason_and_keeps_few_exemplars(tmp_path):
+    log = ParseErrorLog(str(tmp_path), exemplars_per_reason=2)
+    card = make_card()
+    for _ in range(5):
+        log.record('Amazon AU', 'no_price', card)
+    log.record('Amazon AU', 'price:ValueError', card, ValueError('bad'))
+    log.parsed('Amazon AU', 4)
+
+    summary = log.summary()
+    entry = summary['retailers']['Amazon AU']
+    assert summary['total_failures'] == 6
+    assert entry['reasons'] == {'no_price': 5, 'price:ValueError': 1}
+    assert entry['failure_rate'] == 0.6
+    assert len(log.exemplars[('Amazon AU', 'no_price')]) == 2
+
+def test_save_writes_exemplars_and_replaces_previous_run(tmp_path):
+    log = ParseErrorLog(str(tmp_path))
+    log.record('Amazon AU', 'price:ValueError', make_card(), ValueError('bad'))
+    path = log.save()
+
+    saved = json.load(open(path))
+    [exemplar] = saved['exemplars']['Amazon AU']['price:ValueError']
+    html = open(exemplar).read()
+    assert "ValueError('bad')" in html and 'B08N5WRWNW' in html
+
+    log.start_run()
+    log.save()
+    assert not os.path.exists(exemplar)
+    assert json.load(open(path))['total_failures'] == 0
+
+def test_scraper_records_failure_reason_instead_of_raising():
+    PARSE_ERRORS.start_run()
+    scraper = AmazonAUScraper()
+
+    assert scraper.parse_product_card(make_card(price='five')) is None
+    assert scraper.parse_product_card(BeautifulSoup('<div data-asin="B1"></div>', 'html.parser').find('div')) is None
+
+    reasons = PARSE_ERRORS.summary()['retailers']['Amazon AU']['reasons']
+    assert reasons == {'price:ValueError': 1, 'no_image': 1}
+    PARSE_ERRORS.start_run()
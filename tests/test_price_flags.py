@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pytest
+import database
+from analyzer import price_flags
+from analyzer.price_flags import (FLAG_INFLATED, FLAG_LOWEST, FLAG_NOT_BELOW_BASELINE,
+                                  FLAG_ORIGINAL_NEVER_CHARGED)
+from analyzer.scorer import DealScorer
+
+AS_OF = datetime(2026, 11, 28, 12, tzinfo=timezone.utc)
+
+def record_history(asin, prices, original_price, as_of=AS_OF):
+    """One snapshot per day, the last price on as_of"""
+    for offset, price in enumerate(prices):
+        day = as_of - timedelta(days=len(prices) - 1 - offset)
+        database.save_price_snapshots([{'asin': asin, 'retailer': 'Amazon AU', 'price': price,
+                                        'original_price': original_price}], timestamp=day)
+
+def stored_flags(asin):
+    return database.get_price_flags([(asin, 'Amazon AU')])[(asin, 'Amazon AU')]
+
+def test_forward_fill_and_rolling_median():
+    values = np.array([[np.nan, 1, np.nan, 3, np.nan]], dtype=np.float32)
+    filled = price_flags.forward_fill(values)
+    assert np.array_equal(filled, [[np.nan, 1, 1, 3, 3]], equal_nan=True)
+    assert np.array_equal(price_flags.rolling_median(filled, 3), [[np.nan, np.nan, np.nan, 1, 3]],
+                          equal_nan=True)
+
+def test_row_medians_ignore_gaps():
+    values = np.array([[np.nan, 4, 1, 3], [np.nan] * 4, [2, 2, 8, np.nan]], dtype=np.float32)
+    medians, counts = price_flags.row_medians(values)
+    assert np.array_equal(medians, [3, np.nan, 2], equal_nan=True)
+    assert counts.tolist() == [3, 0, 3]
+
+def test_inflated_before_sale_flagged(temp_db):
+    # $100 for two months, marked up to $140 three weeks out, "40% off" back to $100
+    record_history('B000000001', [100] * 60 + [140] * 25 + [100] * 5, original_price=170)
+    summary = price_flags.refresh_price_flags(as_of=AS_OF)
+    assert summary['products'] == 1
+
+    flags = stored_flags('B000000001')
+    assert FLAG_INFLATED in flags['flags']
+    assert FLAG_NOT_BELOW_BASELINE in flags['flags']
+    assert flags['baseline_price'] == 100
+    assert flags['peak_price'] == 140
+    assert flags['inflation_ratio'] == pytest.approx(1.4)
+    assert flags['change_points'] == 2
+
+def test_genuine_drop_not_flagged(temp_db):
+    record_history('B000000002', [100] * 85 + [70] * 5, original_price=100)
+    price_flags.refresh_price_flags(as_of=AS_OF)
+
+    flags = stored_flags('B000000002')
+    assert flags['flags'] == [FLAG_LOWEST]
+    assert flags['real_discount_pct'] == pytest.approx(30)
+
+def test_original_never_charged(temp_db):
+    record_history('B000000003', [80] * 30, original_price=200)
+    price_flags.refresh_price_flags(as_of=AS_OF)
+
+    flags = stored_flags('B000000003')
+    assert FLAG_ORIGINAL_NEVER_CHARGED in flags['flags']
+    # Too new for a baseline
+    assert flags['baseline_price'] is None and flags['real_discount_pct'] is None
+
+def test_incremental_load_matches_rebuild(temp_db):
+    record_history('B000000001', [100] * 60 + [140] * 25, original_price=170, as_of=AS_OF - timedelta(days=5))
+    price_flags.refresh_price_flags(as_of=AS_OF - timedelta(days=5))
+
+    # Five more days, plus a product that is new since the cached array was written
+    record_history('B000000001', [100] * 5, original_price=170)
+    record_history('B000000004', [50] * 3, original_price=60)
+    cache_path = price_flags.cache_path_for(database.DB_PATH)
+    incremental = price_flags.load_price_matrix(as_of=AS_OF, cache_path=cache_path)
+    rebuilt = price_flags.load_price_matrix(as_of=AS_OF)
+
+    assert incremental.first_day == rebuilt.first_day
+    assert np.array_equal(incremental.product_ids, rebuilt.product_ids)
+    assert np.array_equal(incremental.prices, rebuilt.prices, equal_nan=True)
+    assert np.array_equal(incremental.originals, rebuilt.originals, equal_nan=True)
+
+def test_scorer_uses_history_flags():
+    scorer = DealScorer()
+    market_range = {'min': 50, 'max': 100, 'median': 75}
+
+    assert scorer.calculate_legitimacy_score(100, 200, market_range,
+                                             {'flags': [FLAG_INFLATED, FLAG_LOWEST]}) == 15
+    assert scorer.calculate_legitimacy_score(100, 200, None,
+                                             {'flags': [], 'real_discount_pct': 25}) == 100
+    assert scorer.calculate_legitimacy_score(100, 200, None,
+                                             {'flags': [], 'real_discount_pct': None}) == 60
+
+    deals = [{'asin': 'B000000001', 'retailer': 'Amazon AU', 'price': 100, 'original_price': 200,
+              'discount_pct': 50, 'rating': 4.5, 'review_count': 100}]
+    flags = {('B000000001', 'Amazon AU'): {'flags': [FLAG_INFLATED]}}
+    assert scorer.score_batch(deals, flags)[0].legitimacy == 15
+
+def test_orchestrator_imports_without_numpy():
+    import os
+    import subprocess
+    import sys
+
+    # The local scraper service must still start (and scrape unflagged) on a host without numpy
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, '-c', "import sys; sys.modules['numpy'] = None; import scrapers.orchestrator"],
+                   cwd=repo_root, check=True)
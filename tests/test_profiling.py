@@ -0,0 +1,81 @@
+import asyncio
+import json
+import os
+import time
+import pytest
+import profiling
+
+def spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+@pytest.fixture
+def profiles_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILES_DIR', str(tmp_path / 'profiles'))
+    return tmp_path / 'profiles'
+
+def test_sampler_records_collapsed_stacks():
+    profiler = profiling.SamplingProfiler(interval=0.001)
+    profiler.start()
+    spin(0.1)
+    profiler.stop()
+
+    assert profiler.samples > 10
+    line = profiler.folded().splitlines()[0]
+    stack, count = line.rsplit(' ', 1)
+    assert int(count) > 0 and 'spin (tests/test_profiling.py:' in stack
+
+    hot = profiler.hot_functions()
+    assert any(entry['function'].startswith('spin ') and entry['self_pct'] > 50 for entry in hot)
+    assert all(entry['total'] >= entry['self'] for entry in hot)
+
+def test_async_session_traces_tasks(profiles_dir):
+    async def fetch():
+        await asyncio.sleep(0.01)
+
+    async def parse():
+        spin(0.06)  # Holds the loop: reported as a slow step
+
+    async def run():
+        async with profiling.ProfileSession('scrape', interval=0.002) as session:
+            await asyncio.gather(fetch(), fetch(), parse())
+        return session, asyncio.get_running_loop().get_task_factory()
+
+    session, task_factory = asyncio.run(run())
+
+    assert sorted(os.listdir(session.path)) == ['hot.txt', 'stacks.folded', 'summary.json', 'tasks.json']
+    with open(os.path.join(session.path, 'tasks.json')) as f:
+        tasks = json.load(f)
+    by_name = {group['task']: group for group in tasks['tasks']}
+    assert by_name['test_async_session_traces_tasks.<locals>.fetch']['count'] == 2
+    assert by_name['test_async_session_traces_tasks.<locals>.parse']['busy_seconds'] >= 0.06
+    assert tasks['slow_steps'][0]['task'].endswith('parse')
+    # The loop's task factory is restored afterwards
+    assert task_factory is None
+
+def test_old_profiles_pruned(profiles_dir):
+    for index in range(5):
+        (profiles_dir / f'2026010{index}-000000-000000-scrape').mkdir(parents=True)
+    profiling.prune_profiles(str(profiles_dir), keep=2)
+    assert sorted(os.listdir(profiles_dir)) == ['20260103-000000-000000-scrape', '20260104-000000-000000-scrape']
+
+def test_routes_profiled_only_on_request(profiles_dir, monkeypatch):
+    import app
+
+    monkeypatch.setattr(app, 'CACHE_FILE', str(profiles_dir.parent / 'missing.json'))
+    client = app.app.test_client()
+
+    assert client.get('/api/search?q=tv').status_code == 200
+    assert not profiles_dir.exists()
+
+    # Neither a signature for another path nor a stale one counts
+    for headers in (profiling.profile_headers('/api/deals', app.WEBHOOK_SECRET),
+                    profiling.profile_headers('/api/search', app.WEBHOOK_SECRET,
+                                              time.time() - profiling.PROFILE_SIGNATURE_MAX_AGE_SECONDS - 60)):
+        response = client.get('/api/search?q=tv', headers=headers)
+        assert response.status_code == 200 and not profiles_dir.exists()
+
+    response = client.get('/api/search?q=tv', headers=profiling.profile_headers('/api/search', app.WEBHOOK_SECRET))
+    assert response.status_code == 200
+    assert [name.endswith('-web-search_deals') for name in os.listdir(profiles_dir)] == [True]
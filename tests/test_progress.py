@@ -0,0 +1,106 @@
+import json
+import threading
+import time
+from progress import JobProgress, ProgressReporter
+from scrapers.distributed import sign_payload
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_job_progress_counts_pages_and_estimates_eta():
+    clock = FakeClock()
+    job = JobProgress('job-1', clock=clock)
+    job.set_pages(0, 10)
+
+    for page in (1, 2):
+        clock.now += 3
+        job.update({'retailer': 'Amazon AU', 'category': 'Gaming', 'page': page,
+                    'deals_found': page * 20, 'status': 'running'})
+
+    status = job.snapshot()
+    assert (status['stage'], status['pages_done'], status['deals_found']) == ('scraping', 2, 40)
+    assert status['eta_seconds'] == 24  # 3 s per page, 8 pages left
+
+    job.update({'retailer': 'Amazon AU', 'deals_found': 45, 'status': 'complete'})
+    job.set_stage('complete', version='2025-11-28T00:00:00+00:00')
+    status = job.snapshot()
+    assert status['pages_done'] == 2 and status['deals_found'] == 45
+    assert status['eta_seconds'] is None
+    assert status['version'] == '2025-11-28T00:00:00+00:00'
+
+def test_reporter_coalesces_to_latest_status():
+    sent = []
+    reporter = ProgressReporter('http://web.example/api/scrape-status', 'secret',
+                                min_interval=0.3, post=sent.append)
+
+    for pages in range(20):
+        reporter.report({'stage': 'scraping', 'pages_done': pages})
+    assert reporter.flush(timeout=2)
+    reporter.report({'stage': 'complete', 'pages_done': 20})
+    started = time.monotonic()
+    assert reporter.flush(timeout=2)
+
+    # A burst becomes at most a couple of posts, always ending on the latest
+    assert len(sent) <= 3
+    assert sent[-2]['pages_done'] == 19
+    # Terminal stages skip the interval
+    assert sent[-1] == {'stage': 'complete', 'pages_done': 20}
+    assert time.monotonic() - started < 0.2
+
+def post_status(client, status, secret):
+    payload = json.dumps(status).encode()
+    return client.post('/api/scrape-status', data=payload,
+                       headers={'X-Webhook-Signature': sign_payload(payload, secret)})
+
+def test_web_app_relays_job_status():
+    import app
+
+    client = app.app.test_client()
+    assert post_status(client, {'stage': 'scraping'}, 'wrong-secret').status_code == 403
+
+    version = client.get('/api/scrape-status').get_json()['version']
+
+    # A long-poll is answered as soon as a newer status arrives
+    timer = threading.Timer(0.2, post_status, (app.app.test_client(), {'stage': 'scraping', 'pages_done': 3},
+                                                app.WEBHOOK_SECRET))
+    timer.start()
+    started = time.monotonic()
+    result = client.get(f'/api/scrape-status?since={version}').get_json()
+    assert time.monotonic() - started < 5
+    assert result == {'version': version + 1, 'status': {'stage': 'scraping', 'pages_done': 3}}
+
+    # The event stream starts with anything newer than ?since
+    response = client.get(f'/api/scrape-status/stream?since={version}', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    event = next(response.response).decode()
+    response.close()
+    event_id, data = event.rstrip('\n').split('\n')
+    assert event_id == f'id: {version + 1}'
+    assert json.loads(data[len('data: '):]) == result['status']
+
+def test_malformed_job_status_rejected():
+    import app
+
+    client = app.app.test_client()
+    version = client.get('/api/scrape-status').get_json()['version']
+
+    for payload in (b'{not json', b'[1, 2]', b'"scraping"'):
+        response = client.post('/api/scrape-status', data=payload,
+                               headers={'X-Webhook-Signature': sign_payload(payload, app.WEBHOOK_SECRET)})
+        assert response.status_code == 400
+    assert client.get('/api/scrape-status').get_json()['version'] == version
+
+def test_deals_version_endpoint(tmp_path, monkeypatch):
+    import app
+
+    cache = tmp_path / 'deals_cache.json'
+    cache.write_text(json.dumps({'last_updated': '2025-11-28T00:00:00+00:00', 'deals': []}))
+    monkeypatch.setattr(app, 'CACHE_FILE', str(cache))
+
+    version = app.app.test_client().get('/api/deals/version').get_json()
+    assert version['version'] == '2025-11-28T00:00:00+00:00'
+    assert version['deal_count'] == 0
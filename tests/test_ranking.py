@@ -0,0 +1,30 @@
+import random
+from analyzer.ranking import TopDeals, TopK, percentile_ranks
+
+def test_percentile_ranks_share_mid_rank_on_ties():
+    assert percentile_ranks([10, 20, 20, 40]) == [12.5, 50.0, 50.0, 87.5]
+    assert percentile_ranks([7]) == [50.0]
+    assert percentile_ranks([]) == []
+
+def test_top_k_matches_full_sort():
+    rng = random.Random(3)
+    scores = [rng.randint(0, 100) for _ in range(1000)]
+    top = TopK(10)
+    for index, score in enumerate(scores):
+        top.push(score, index)
+
+    # Stable: among equal scores the earlier item wins
+    expected = sorted(range(len(scores)), key=lambda index: (-scores[index], index))[:10]
+    assert top.items() == expected
+
+def test_top_deals_overall_and_per_category():
+    deals = [
+        {'id': 'a', 'category': 'Gaming', 'scores': {'total': 70}},
+        {'id': 'b', 'category': 'Audio', 'scores': {'total': 90}},
+        {'id': 'c', 'category': 'Gaming', 'scores': {'total': 85}},
+        {'id': 'd', 'category': 'Gaming', 'scores': {'total': 40}}
+    ]
+    top = TopDeals(k=2).add_many(deals).to_dict()
+
+    assert top['overall'] == ['b', 'c']
+    assert top['categories'] == {'Gaming': ['c', 'a'], 'Audio': ['b']}
@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+from scrapers.retailers.amazon_au import AmazonAUScraper
+from scrapers.registry import discover_scrapers
+from scrapers.scheduler import FetchScheduler
+
+def test_discovers_registered_scrapers():
+    assert AmazonAUScraper in discover_scrapers()
+
+def test_discovery_imports_only_retailer_modules():
+    assert all(cls.__module__.startswith('scrapers.retailers.') for cls in discover_scrapers())
+
+def test_amazon_scraper_declares_host_limits():
+    scraper = AmazonAUScraper.create()
+    assert scraper.host == 'www.amazon.com.au'
+    assert scraper.crawl_policy.page_budget == AmazonAUScraper.page_budget
+
+@pytest.mark.asyncio
+async def test_requests_are_paced_per_host():
+    scheduler = FetchScheduler()
+    scheduler.configure('slow.example', max_concurrency=4, requests_per_second=20)
+    scheduler.configure('fast.example', max_concurrency=4, requests_per_second=1000)
+    loop = asyncio.get_running_loop()
+    origin = loop.time()
+    started = []
+
+    async def fetch(host):
+        async with scheduler.request(host):
+            started.append((host, loop.time() - origin))
+
+    await asyncio.gather(*(fetch('slow.example') for _ in range(3)), fetch('fast.example'))
+
+    slow = [at for host, at in started if host == 'slow.example']
+    assert [round(b - a, 2) >= 0.05 for a, b in zip(slow, slow[1:])] == [True, True]
+    fast = [at for host, at in started if host == 'fast.example']
+    assert fast[0] < 0.02  # Not queued behind the slow host
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped():
+    scheduler = FetchScheduler()
+    scheduler.configure('example.com', max_concurrency=2, requests_per_second=1000)
+    active = peak = 0
+
+    async def fetch():
+        nonlocal active, peak
+        async with scheduler.request('example.com'):
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.001)
+            active -= 1
+
+    await asyncio.gather(*(fetch() for _ in range(6)))
+    assert peak == 2
+
+def test_shared_host_takes_strictest_limits_and_budget():
+    scheduler = FetchScheduler()
+    scheduler.configure('example.com', max_concurrency=4, requests_per_second=2, page_budget=3)
+    budget = scheduler.configure('example.com', max_concurrency=2, requests_per_second=5, page_budget=None)
+
+    assert (budget.max_concurrency, budget.requests_per_second, budget.page_budget) == (2, 2, 3)
+    assert [scheduler.charge_page('example.com') for _ in range(4)] == [True, True, True, False]
+    assert scheduler.charge_page('unknown.example')
+
+    scheduler.start_run()
+    assert scheduler.charge_page('example.com')
@@ -70,3 +70,31 @@ def test_total_score():
     assert 'price_tier' in scores
     assert 'legitimacy' in scores
     assert 0 <= scores['total'] <= 100
+
+def test_percentile_mode_ranks_within_batch():
+    scorer = DealScorer(mode='percentile')
+    deals = [
+        {'discount_pct': 20, 'rating': 4.1, 'review_count': 50, 'price': 30, 'original_price': 40},
+        {'discount_pct': 40, 'rating': 4.3, 'review_count': 500, 'price': 60, 'original_price': 100},
+        {'discount_pct': 60, 'rating': 0, 'review_count': 0, 'price': 90, 'original_price': 220}
+    ]
+
+    first, second, third = scorer.score_batch(deals)
+
+    # 4.1 and 4.3 stars share a fixed tier, but rank apart within the crawl
+    assert scorer.calculate_quality_score(4.1) == scorer.calculate_quality_score(4.3)
+    assert first.quality < second.quality
+    assert third.discount > second.discount > first.discount
+    # Unrated / unreviewed stays at 0 instead of taking a rank
+    assert third.quality == 0 and third.credibility == 0
+    assert first.legitimacy == second.legitimacy == third.legitimacy
+    assert all(0 <= scores.total <= 100 for scores in (first, second, third))
+
+def test_absolute_batch_matches_single_scores():
+    scorer = DealScorer()
+    deal = {'discount_pct': 50, 'rating': 4.5, 'review_count': 500, 'price': 600, 'original_price': 1200}
+    assert scorer.score_batch([deal])[0] == scorer.score(deal)
+
+def test_unknown_mode_rejected():
+    with pytest.raises(ValueError):
+        DealScorer(mode='relative')
@@ -0,0 +1,85 @@
+from analyzer.search import SearchIndex, tokenize
+
+def create_deal(deal_id, title, total=50, category='Electronics', rating=4.5):
+    return {
+        'id': deal_id,
+        'title': title,
+        'category': category,
+        'price': 100,
+        'discount_pct': 30,
+        'rating': rating,
+        'scores': {'total': total}
+    }
+
+DEALS = [
+    create_deal('d1', 'FIFINE USB Microphone for Gaming and Streaming'),
+    create_deal('d2', 'Logitech Wireless Gaming Mouse', category='Gaming'),
+    create_deal('d3', 'Samsung Galaxy Tab S9 Wireless Charger', rating=3.0),
+    create_deal('d4', 'USB-C Cable 2m Fast Charging', total=90),
+]
+
+def test_tokenize():
+    assert tokenize('USB-C Cable, for the Gaming PC') == ['usb', 'c', 'cable', 'gaming', 'pc']
+
+def test_search_ranks_matching_titles():
+    index = SearchIndex()
+    index.build(DEALS)
+
+    results = index.search('usb')
+
+    assert [deal['id'] for _, deal in results] == ['d4', 'd1']  # Higher deal score lifts d4
+
+def test_all_terms_must_match_with_prefix_on_last():
+    index = SearchIndex()
+    index.build(DEALS)
+
+    assert [deal['id'] for _, deal in index.search('wireless gam')] == ['d2']
+    assert [deal['id'] for _, deal in index.search('wire')] != []
+    assert index.search('wireless microphone') == []
+
+def test_non_positive_limit_returns_nothing():
+    index = SearchIndex()
+    index.build(DEALS)
+
+    assert index.search('usb', limit=0) == []
+    assert index.search('usb', limit=-1) == []
+
+def test_filters():
+    index = SearchIndex()
+    index.build(DEALS)
+
+    assert [deal['id'] for _, deal in index.search('wireless', category='Gaming')] == ['d2']
+    assert [deal['id'] for _, deal in index.search('wireless', min_rating=4)] == ['d2']
+
+def test_sync_is_incremental():
+    index = SearchIndex()
+    index.build(DEALS)
+
+    updated = [DEALS[0], DEALS[1], create_deal('d5', 'Sony Noise Cancelling Headphones')]
+    changes = index.sync(updated)
+
+    assert changes == {'added': 1, 'updated': 0, 'removed': 2}
+    assert len(index) == 3
+    assert index.search('samsung') == []
+    assert [deal['id'] for _, deal in index.search('headph')] == ['d5']
+
+def test_sync_matches_full_rebuild():
+    index = SearchIndex()
+    index.build(DEALS)
+
+    updated = [create_deal('d1', DEALS[0]['title'], total=95), DEALS[1], DEALS[3],
+               create_deal('d5', 'Anker USB Wireless Charger')]
+    index.sync(updated)
+    rebuilt = SearchIndex()
+    rebuilt.build(updated)
+
+    for query in ['usb', 'wireless', 'charg', 'gaming']:
+        assert index.search(query) == rebuilt.search(query)
+
+def test_selective_filters_score_matching_deals_only():
+    index = SearchIndex()
+    index.build(DEALS + [create_deal(f'x{i}', f'USB Hub {i}', rating=3.5) for i in range(50)])
+
+    assert [deal['id'] for _, deal in index.search('usb', min_rating=4, limit=5)] == ['d4', 'd1']
+    assert index.search('usb', category='Audio') == []
+    assert index.search('usb', min_discount=80) == []
@@ -0,0 +1,108 @@
+import json
+import os
+import subprocess
+import sys
+from snapshot import DealSnapshot, ensure_snapshot, read_source_mtime, write_snapshot
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def make_cache(count=5, price=10.0):
+    deals = [
+        {'id': f'amazon-au-B{index:09d}', 'title': f'Product {index} 🎧', 'price': price + index,
+         'category': 'Audio' if index % 2 else 'Gaming', 'scores': {'total': 50 + index}}
+        for index in range(count)
+    ]
+    categories = {}
+    for deal in deals:
+        categories.setdefault(deal['category'], []).append(deal['id'])
+    return {'last_updated': '2025-11-28T00:00:00+00:00', 'deals': deals, 'categories': categories,
+            'category_stats': {}, 'product_groups': []}
+
+def test_snapshot_round_trip(tmp_path):
+    cache = make_cache()
+    path = str(tmp_path / 'deals.snapshot')
+    write_snapshot(cache, path, source_mtime=123.5)
+
+    snapshot = DealSnapshot(path)
+    assert len(snapshot) == 5
+    assert snapshot.source_mtime == 123.5
+    assert snapshot.last_updated == cache['last_updated']
+    # The body is the whole document, byte-for-byte valid JSON
+    assert json.loads(bytes(snapshot.body())) == cache
+
+    for deal in cache['deals']:
+        assert snapshot.get(deal['id']) == deal
+    assert snapshot.get('amazon-au-B999999999') is None
+    assert snapshot.get('') is None
+    assert snapshot.category_ids('Audio') == cache['categories']['Audio']
+    assert snapshot.category_ids('Unknown') == []
+    # Older caches without top lists get them at build time
+    assert snapshot.top['overall'][0] == 'amazon-au-B000000004'
+
+def test_empty_snapshot(tmp_path):
+    path = str(tmp_path / 'deals.snapshot')
+    write_snapshot({'deals': []}, path)
+
+    snapshot = DealSnapshot(path)
+    assert len(snapshot) == 0
+    assert snapshot.get('anything') is None
+    assert json.loads(bytes(snapshot.body()))['deals'] == []
+
+def test_rebuild_swaps_file_without_breaking_open_mappings(tmp_path):
+    cache_path = tmp_path / 'deals_cache.json'
+    snapshot_path = str(tmp_path / 'deals_cache.snapshot')
+    cache_path.write_text(json.dumps(make_cache(price=10.0)))
+
+    assert ensure_snapshot(str(cache_path), snapshot_path)
+    assert not ensure_snapshot(str(cache_path), snapshot_path)  # Up to date
+    old = DealSnapshot(snapshot_path)
+
+    cache_path.write_text(json.dumps(make_cache(count=3, price=99.0)))
+    os.utime(cache_path, (1000, 1000))
+    assert ensure_snapshot(str(cache_path), snapshot_path)
+    assert read_source_mtime(snapshot_path) == 1000
+
+    # The old mapping still reads the old data; a new one sees the swap
+    assert old.get('amazon-au-B000000004')['price'] == 14.0
+    new = DealSnapshot(snapshot_path)
+    assert len(new) == 3
+    assert new.get('amazon-au-B000000000')['price'] == 99.0
+
+def test_one_of_several_workers_builds(tmp_path):
+    cache_path = tmp_path / 'deals_cache.json'
+    cache_path.write_text(json.dumps(make_cache(count=2000)))
+    script = ('import sys; from snapshot import ensure_snapshot; '
+              'print(ensure_snapshot(sys.argv[1], sys.argv[2]))')
+
+    workers = [
+        subprocess.Popen([sys.executable, '-c', script, str(cache_path), str(tmp_path / 'deals_cache.snapshot')],
+                         cwd=REPO_ROOT, stdout=subprocess.PIPE, text=True)
+        for _ in range(4)
+    ]
+    built = [worker.communicate(timeout=30)[0].strip() for worker in workers]
+    assert built.count('True') == 1
+
+def test_api_serves_deals_from_snapshot(tmp_path, monkeypatch):
+    import app
+
+    cache = make_cache()
+    cache_path = tmp_path / 'deals_cache.json'
+    cache_path.write_text(json.dumps(cache))
+    monkeypatch.setattr(app, 'CACHE_FILE', str(cache_path))
+    client = app.app.test_client()
+
+    document = client.get('/api/deals').get_json()
+    assert document['deals'] == cache['deals']
+    assert document['seq'] == app.broadcaster.seq
+
+    history = client.get('/api/deals/amazon-au-B000000001/history')
+    assert history.status_code == 200
+    assert client.get('/api/deals/nope/history').status_code == 404
+
+    results = client.get('/api/search?q=product').get_json()['results']
+    assert results[0]['id'] == 'amazon-au-B000000004'  # Highest score
+    assert results[0]['price'] == 14.0
+
+    top = client.get('/api/deals/top').get_json()['deals']
+    assert [deal['id'] for deal in client.get('/api/deals/top?limit=-1').get_json()['deals']] == []
+    assert len(client.get('/api/deals/top?limit=500').get_json()['deals']) == len(top) == 5
@@ -0,0 +1,25 @@
+from scrapers.urls import canonicalize_url, extract_asin, is_asin
+
+TRACKING_URL = 'https://aax-fe.amazon.com.au/x/c/JCqikPSb8sT4bPAPkgYpL_sAAAGaoYCvPAcAAAH2AQBvbm9f/clv1_CEuOPUxokZA0iHrVdfYjhn'
+
+def test_extract_asin():
+    assert extract_asin('https://www.amazon.com.au/dp/B08N5WRWNW?ref=deals') == 'B08N5WRWNW'
+    assert extract_asin('https://www.amazon.com.au/gp/product/B08N5WRWNW') == 'B08N5WRWNW'
+    assert extract_asin(TRACKING_URL) is None
+    assert extract_asin('') is None
+
+def test_canonicalize_uses_card_asin():
+    assert canonicalize_url(TRACKING_URL, 'B08N5WRWNW') == 'https://www.amazon.com.au/dp/B08N5WRWNW'
+
+def test_canonicalize_falls_back_to_url_asin():
+    url = 'https://www.amazon.com.au/Some-Product/dp/B08N5WRWNW/ref=sr_1_1?keywords=deal'
+    assert canonicalize_url(url) == 'https://www.amazon.com.au/dp/B08N5WRWNW'
+    assert canonicalize_url(url, asin='not-an-asin') == 'https://www.amazon.com.au/dp/B08N5WRWNW'
+
+def test_canonicalize_leaves_unknown_urls():
+    assert canonicalize_url(TRACKING_URL) == TRACKING_URL
+
+def test_is_asin():
+    assert is_asin('B08N5WRWNW')
+    assert not is_asin('B08N5')
+    assert not is_asin('')
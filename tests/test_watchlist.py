@@ -0,0 +1,146 @@
+import json
+import pytest
+import database
+from analyzer.watchlist import WatchlistIndex, group_by_rule
+
+def make_deal(asin, price, category='Audio', discount_pct=20):
+    return {'id': f'amazon-au-{asin}', 'asin': asin, 'title': f'Product {asin}', 'price': price,
+            'original_price': price * 2, 'discount_pct': discount_pct, 'category': category,
+            'url': f'https://www.amazon.com.au/dp/{asin}', 'scores': {'total': 50}}
+
+def rule(rule_id, kind, asin=None, category=None, max_price=None, min_discount=None):
+    return {'id': rule_id, 'kind': kind, 'asin': asin, 'category': category,
+            'max_price': max_price, 'min_discount': min_discount, 'label': None}
+
+def test_index_matches_each_rule_kind():
+    index = WatchlistIndex([
+        rule(1, 'asin', asin='B000000001', max_price=50),
+        rule(2, 'asin', asin='B000000002'),
+        rule(3, 'category', category='Audio', max_price=30),
+        rule(4, 'category', category='Audio', max_price=100),
+        rule(5, 'discount', min_discount=40),
+        rule(6, 'discount', category='Gaming', min_discount=10),
+    ])
+    deals = [
+        make_deal('B000000001', 45),                                    # 1, 4
+        make_deal('B000000002', 500, discount_pct=50),                  # 2, 5
+        make_deal('B000000003', 25),                                    # 3, 4
+        make_deal('B000000004', 25, category='Gaming', discount_pct=15) # 6
+    ]
+
+    pairs = sorted((match['rule_id'], match['deal_id'][-1]) for match in index.match(deals))
+    assert pairs == [(1, '1'), (2, '2'), (3, '3'), (4, '1'), (4, '3'), (5, '2'), (6, '4')]
+
+def test_thresholds_are_inclusive():
+    index = WatchlistIndex([rule(1, 'category', category='Audio', max_price=30),
+                            rule(2, 'discount', min_discount=20)])
+    matches = index.match([make_deal('B000000001', 30, discount_pct=20)])
+    assert [match['rule_id'] for match in matches] == [1, 2]
+
+def test_asin_taken_from_url_when_missing():
+    index = WatchlistIndex([rule(1, 'asin', asin='B000000009')])
+    deal = make_deal('B000000009', 10)
+    del deal['asin']
+    assert len(index.match([deal])) == 1
+
+def test_empty_index_does_not_consume_deals():
+    def deals():
+        raise AssertionError('should not be read')
+        yield
+    assert WatchlistIndex().match(deals()) == []
+
+def test_group_by_rule():
+    matches = [{'rule_id': 2, 'deal_id': 'a'}, {'rule_id': 1, 'deal_id': 'b'}, {'rule_id': 2, 'deal_id': 'c'}]
+    assert [(rule_id, len(group)) for rule_id, group in group_by_rule(matches)] == [(1, 1), (2, 2)]
+
+def test_rules_round_trip(temp_db):
+    version = database.get_watchlist_version()
+    added = database.add_watch_rule('category', category='Audio', max_price=30, label='Cheap audio')
+    assert database.get_watchlist_version() == version + 1
+
+    rules = database.list_watch_rules()
+    assert rules == [added]
+    assert rules[0]['asin'] is None and rules[0]['min_discount'] is None
+
+    assert database.delete_watch_rule(added['id'])
+    assert not database.delete_watch_rule(added['id'])
+    assert database.list_watch_rules() == []
+
+@pytest.mark.parametrize('kind, fields', [
+    ('price', {}),
+    ('asin', {}),
+    ('category', {'category': 'Audio'}),
+    ('discount', {'category': 'Audio'}),
+])
+def test_incomplete_rules_rejected(temp_db, kind, fields):
+    with pytest.raises(ValueError):
+        database.add_watch_rule(kind, **fields)
+
+def test_matches_delivered_once_per_drop(temp_db):
+    match = {'rule_id': 1, 'deal_id': 'amazon-au-B000000001', 'price': 40.0}
+    assert database.record_watch_matches([match]) == [match]
+    assert database.record_watch_matches([match]) == []
+    assert database.record_watch_matches([{**match, 'price': 45.0}]) == []
+
+    cheaper = {**match, 'price': 35.0}
+    assert database.record_watch_matches([cheaper]) == [cheaper]
+
+def test_rebound_then_drop_is_notified_again(temp_db):
+    match = {'rule_id': 1, 'deal_id': 'amazon-au-B000000001', 'price': 40.0}
+    assert database.record_watch_matches([match], [1]) == [match]
+
+    # Still matching at a higher price, then back down
+    assert database.record_watch_matches([{**match, 'price': 48.0}], [1]) == []
+    assert database.record_watch_matches([match], [1]) == [match]
+
+    # Stopped matching (above the target), then back under it
+    assert database.record_watch_matches([], [1]) == []
+    assert database.record_watch_matches([match], [1]) == [match]
+    # Other rules' rows are left alone
+    assert database.record_watch_matches([], [2]) == []
+    assert database.record_watch_matches([match], [1]) == []
+
+def test_watch_handler_skips_malformed_ids(monkeypatch):
+    import app
+
+    rooms, sent = [], []
+    monkeypatch.setattr(app, 'join_room', rooms.append)
+    monkeypatch.setattr(app, 'emit', lambda event, data: sent.append((event, data)))
+
+    app.handle_watch({'rule_ids': [1, '2', 'x', None, {}]})
+    assert rooms == ['watch:1', 'watch:2']
+    assert sent == [('watching', {'rule_ids': [1, 2]})]
+
+    app.handle_watch({'rule_ids': 'nope'})
+    assert sent[-1] == ('watching', {'rule_ids': []})
+
+def test_watchlist_api(temp_db, tmp_path, monkeypatch):
+    import app
+
+    deals = [make_deal('B000000001', 20), make_deal('B000000002', 80)]
+    cache_path = tmp_path / 'deals_cache.json'
+    cache_path.write_text(json.dumps({'last_updated': None, 'deals': deals,
+                                      'categories': {'Audio': [deal['id'] for deal in deals]}}))
+    monkeypatch.setattr(app, 'CACHE_FILE', str(cache_path))
+    monkeypatch.setattr(app, 'WATCH_WEBHOOK_URL', '')
+    client = app.app.test_client()
+
+    response = client.post('/api/watchlist', json={'kind': 'category', 'category': 'Audio', 'max_price': 50})
+    assert response.status_code == 201
+    created = response.get_json()
+    # Deals already below the target are matched (and recorded) straight away
+    assert [match['deal_id'] for match in created['matches']] == ['amazon-au-B000000001']
+
+    assert client.post('/api/watchlist', json={'kind': 'category'}).status_code == 400
+    assert client.get('/api/watchlist').get_json()['rules'] == [created['rule']]
+
+    # A new snapshot only reports what changed since the last notification
+    deals[1]['price'] = 45
+    cache_path.write_text(json.dumps({'last_updated': None, 'deals': deals,
+                                      'categories': {'Audio': [deal['id'] for deal in deals]}}))
+    matches = app.check_watchlist(iter(deals))
+    assert [match['deal_id'] for match in matches] == ['amazon-au-B000000002']
+
+    rule_id = created['rule']['id']
+    assert client.delete(f'/api/watchlist/{rule_id}').status_code == 200
+    assert client.delete(f'/api/watchlist/{rule_id}').status_code == 404